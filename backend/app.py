@@ -1,32 +1,57 @@
 from flask import Flask
 import os
 from dotenv import load_dotenv
-from routes import get_info_api, checkout_api, close_store_api
+from routes import get_info_api, checkout_api, close_store_api, metrics_api, profiler_api
 from flask_cors import CORS
 from db import db
+from utils.json_codec import CodecJSONProvider
+from cli import migrate_schema, register_commands
+from utils import cart_quote, intake_journal, kitchen, logging_setup, metrics, popularity, query_stats, rate_limit, review_token, stores, tickets
 
 load_dotenv()
 
 def create_app():
     app = Flask(__name__)
+    app.json = CodecJSONProvider(app)
+    logging_setup.init_app(app)
     CORS(app)
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///db.sqlite"
+    metrics.init_app(app)
+    query_stats.init_app(app)
+    rate_limit.init_app(app)
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///db.sqlite")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Storage encoding of new orders' items: "json" or "compact" (see utils/order_items_codec.py)
+    app.config["ORDER_ITEMS_ENCODING"] = os.getenv("ORDER_ITEMS_ENCODING", "json")
+    # Checkout writes orders to a local journal first, see utils/intake_journal.py
+    intake_journal.init_app(app)
+    review_token.init_app(app)
+    cart_quote.init_app(app)
+    popularity.init_app(app)
+    kitchen.init_app(app)
+    tickets.init_app(app)
+    # One database per shop location, see utils/stores.py
+    stores.init_app(app)
     db.init_app(app)
     app.register_blueprint(get_info_api.routes)
     app.register_blueprint(checkout_api.routes)
     app.register_blueprint(close_store_api.routes)
+    app.register_blueprint(metrics_api.routes)
+    app.register_blueprint(profiler_api.routes)
+    register_commands(app)
 
-    with app.app_context():
-        db.create_all()
+    @app.route("/")
+    def home():
+        return "This is steve's api"
+
+    # The schema is managed by `flask db migrate`, not at every boot
     return app
 
 
 
 
 if __name__ == "__main__":
+    # Development server; production runs gunicorn with wsgi.py and gunicorn.conf.py
     app = create_app()
-    @app.route("/")
-    def home():
-        return "This is steve's api"
+    with app.app_context():
+        migrate_schema()
     app.run(host="0.0.0.0", port=int(os.getenv('PORT', 5000)), threaded=True, debug=True)
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""Flask CLI commands for Steve's Place maintenance tasks.
+
+Commands are registered on the app in ``create_app`` and run with the
+``flask`` command, e.g. ``flask --app app order-items migrate --to compact``.
+"""
+
+import os
+import subprocess
+import sys
+from typing import List
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+from db import db
+from models.OrderTable import OrderTable
+from utils import order_items_codec, stores
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# First-party top-level modules and packages, listed individually in the startup report
+FIRST_PARTY = ("app", "cli", "db", "wsgi", "models", "routes", "utils")
+
+db_cli = AppGroup("db", help="Manage the database schema.")
+order_items_cli = AppGroup("order-items", help="Manage the storage encoding of order items.")
+
+
+@order_items_cli.command("migrate")
+@click.option("--to", "encoding", type=click.Choice(order_items_codec.ENCODINGS), required=True,
+              help="Encoding to convert existing rows to.")
+@click.option("--batch-size", default=500, show_default=True, help="Rows converted per transaction.")
+def migrate_order_items(encoding, batch_size):
+    """
+    Re-encode the stored items of existing orders.
+
+    Rows are read in id order and committed in batches, so the command can be
+    interrupted and run again; rows already in the target encoding are
+    skipped. Decoding is checked before a row is rewritten. Every store's
+    orders are converted.
+    """
+    converted = skipped = 0
+    for store_id in stores.all_stores():
+        with stores.store_context(store_id):
+            store_converted, store_skipped = _migrate_store_order_items(encoding, batch_size)
+        converted += store_converted
+        skipped += store_skipped
+    click.echo(f"Converted {converted} orders to {encoding}, {skipped} already {encoding}")
+
+
+def _migrate_store_order_items(encoding, batch_size):
+    converted = skipped = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(OrderTable.id, OrderTable.order_items)
+            .where(OrderTable.id > last_id)
+            .order_by(OrderTable.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for order_id, stored in rows:
+            last_id = order_id
+            if order_items_codec.encoding_of(stored) == encoding:
+                skipped += 1
+                continue
+            items = order_items_codec.loads(stored)
+            encoded = order_items_codec.dumps(items, encoding)
+            if order_items_codec.loads(encoded) != items:
+                raise click.ClickException(f"Order {order_id} does not round-trip, aborting")
+            # Core update: the rendered JSON is unaffected by the storage encoding
+            db.session.execute(
+                db.update(OrderTable).where(OrderTable.id == order_id).values(order_items=encoded)
+            )
+            converted += 1
+        db.session.commit()
+    return converted, skipped
+
+
+def migrate_schema() -> List[str]:
+    """
+    Bring the database schema of every store up to date with the models.
+
+    Creates missing tables, adds missing columns to existing tables and
+    creates missing indexes; nothing is dropped or altered. SQLite files are
+    switched to WAL journaling, so the read-only engines never block order
+    writes and are never blocked by them. Columns that are
+    NOT NULL without a server default cannot be added to a table with rows
+    and must be migrated by hand.
+
+    Returns:
+        List[str]: Description of each change made, prefixed with the store
+        id, empty when up to date
+
+    Raises:
+        click.ClickException: If a missing column cannot be added automatically
+    """
+    changes = []
+    for store in stores.all_stores().values():
+        engine = db.engines[store.bind_key]
+        changes.extend(f"{store.store_id}: {change}" for change in _migrate_engine(engine))
+    return changes
+
+
+def _migrate_engine(engine) -> List[str]:
+    preparer = engine.dialect.identifier_preparer
+    inspector = inspect(engine)
+    changes = []
+    if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        with engine.connect() as conn:
+            # Persistent: stored in the database file
+            if conn.exec_driver_sql("PRAGMA journal_mode").scalar() != "wal":
+                conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+                changes.append("enabled WAL journal mode")
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            table.create(engine)
+            changes.append(f"created table {table.name}")
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise click.ClickException(
+                    f"{table.name}.{column.name} is NOT NULL without a server default; migrate it by hand")
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(db.text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}"))
+            changes.append(f"added column {table.name}.{column.name}")
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(engine)
+                changes.append(f"created index {index.name}")
+    return changes
+
+
+@db_cli.command("migrate")
+def migrate_db():
+    """
+    Create missing tables, columns and indexes.
+
+    Run once per deploy, before the app starts serving; the app itself no
+    longer touches the schema at startup. Every store's database is migrated.
+    """
+    changes = migrate_schema()
+    for change in changes:
+        click.echo(change)
+    click.echo(f"Schema up to date ({len(changes)} changes)")
+
+
+def _is_first_party(module: str) -> bool:
+    return module.split(".")[0] in FIRST_PARTY
+
+
+@click.command("startup-report")
+@click.option("--top", default=25, show_default=True, help="Entries listed.")
+def startup_report(top):
+    """
+    Report what a worker spends its startup time on.
+
+    Starts a fresh interpreter with ``-X importtime``, imports the app and
+    calls ``create_app``, then lists the slowest imports: each first-party
+    module, and third-party packages by top-level name. "self" is the time
+    spent running the module's own code, "total" includes what it imports.
+    """
+    code = (
+        "import time; start = time.perf_counter(); from app import create_app; "
+        "imported = time.perf_counter(); create_app(); "
+        "print(imported - start, time.perf_counter() - imported)"
+    )
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, cwd=BACKEND_DIR)
+    if result.returncode != 0:
+        raise click.ClickException(f"App failed to start:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, total_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        if _is_first_party(module) or "." not in module:
+            entries.append((int(total_us) / 1000, int(self_us) / 1000, module))
+    import_seconds, init_seconds = (float(value) for value in result.stdout.split()[-2:])
+
+    click.echo(f"{'module':<40} {'self ms':>9} {'total ms':>9}")
+    for total_ms, self_ms, module in sorted(entries, reverse=True)[:top]:
+        click.echo(f"{module:<40} {self_ms:9.1f} {total_ms:9.1f}")
+    click.echo(f"\nimport app: {import_seconds * 1000:.1f} ms, create_app(): {init_seconds * 1000:.1f} ms, "
+               f"total {(import_seconds + init_seconds) * 1000:.1f} ms")
+
+
+def register_commands(app: Flask):
+    """Register the CLI command groups on the app."""
+    app.cli.add_command(db_cli)
+    app.cli.add_command(order_items_cli)
+    app.cli.add_command(startup_report)
@@ -1,3 +1,68 @@
+import functools
+
+from flask import Blueprint, g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+class StoreRoutingSession(Session):
+    """
+    Session that sends every statement to the database of the current store.
+
+    ``utils.stores`` records the store's bind keys on ``g`` when a request or
+    store context starts; without one the default (``main``) database is used.
+
+    In requests marked with ``use_reader`` or ``reads_from_reader``, SELECTs
+    go to the store's read-only engine so they never queue behind order
+    writes. Once the session writes, every later statement of the request
+    goes to the writer, so the request always reads its own writes.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            is_select = getattr(clause, "is_select", False)
+            if not is_select:
+                self.wrote = True
+            read_bind_key = g.get("store_read_bind_key")
+            if is_select and read_bind_key is not None and g.get("db_use_reader") and not self.wrote:
+                return self._db.engines[read_bind_key]
+            bind_key = g.get("store_bind_key")
+            if bind_key is not None:
+                return self._db.engines[bind_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_reader(blueprint: Blueprint):
+    """
+    Serve the reads of every request to a blueprint from the read-only engines.
+
+    Args:
+        blueprint: Blueprint whose routes only read, such as menu and dashboard routes
+    """
+    @blueprint.before_request
+    def _use_reader():
+        g.db_use_reader = True
+
+
+def reads_from_reader(view):
+    """
+    Serve the reads of one view from the read-only engines.
+
+    Example:
+        >>> @routes.route('/reorder', methods=['POST'])
+        ... @reads_from_reader
+        ... def reorder(): ...
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_use_reader = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
 # This is a global instance of SQLAlchemy it will be import in app.py
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy(session_options={"class_": StoreRoutingSession})
@@ -0,0 +1,88 @@
+"""Gunicorn settings for serving Steve's Place in production.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is loaded once in the master process (``preload_app``) and the
+workers are forked from it, so model modules, the menu tables and the
+provider SDKs are imported once and shared copy-on-write. Each worker
+runs several threads, since checkout requests mostly wait on Stripe,
+Twilio and the database.
+
+Worker processes are recycled after ``GUNICORN_MAX_REQUESTS`` requests
+(with jitter, so they do not all restart together). ``kill -HUP <master
+pid>`` reloads the configuration and replaces the workers gracefully;
+in-flight requests get ``graceful_timeout`` seconds to finish.
+
+Requests of one client are spread over the workers, so per-worker state
+that clients come back to must be shared: set ``QUOTE_STORE`` and
+``RATE_LIMIT_BACKEND`` to ``sqlite:///<path>`` on a multi-worker server,
+or route each client to one worker (sticky sessions) in front of gunicorn.
+
+Every setting can be overridden from the environment:
+
+- ``PORT``: listen port (default 5000)
+- ``WEB_CONCURRENCY``: worker processes (default 2 x available CPUs + 1)
+- ``GUNICORN_THREADS``: threads per worker (default 4)
+- ``GUNICORN_MAX_REQUESTS`` / ``GUNICORN_MAX_REQUESTS_JITTER``: recycling
+  (default 1000 / 100)
+- ``GUNICORN_TIMEOUT``: seconds before a silent worker is killed (default 90,
+  above the profiler endpoint's 60 second maximum)
+"""
+
+import os
+
+
+def available_cpus() -> int:
+    """
+    Return the CPUs this process may use, honouring container CPU limits.
+
+    Reads the cgroup v2 quota (``cpu.max``) when there is one, since
+    ``os.cpu_count`` reports the host's CPUs inside a container.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * available_cpus() + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+preload_app = True
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 90))
+graceful_timeout = 30
+keepalive = 5
+
+# Application logs go through utils/logging_setup.py; keep gunicorn's own on stderr
+accesslog = None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """Reset process state the worker inherited from the preloaded master."""
+    from db import db
+    from utils import intake_journal, kitchen, logging_setup, popularity
+    from wsgi import app
+
+    # The log writer thread does not survive fork
+    logging_setup.restart_listener()
+    # Database connections opened in the master must not be shared with workers
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    # Open the worker's intake journal now, so journals left by stopped workers are recovered at startup
+    intake_journal.get_journal(app)
+    # Count today's orders so far, so the first popular items request is answered from memory
+    popularity.warm(app)
+    # Load today's open orders, so the first prep list is answered from memory
+    kitchen.warm(app)
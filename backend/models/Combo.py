@@ -6,19 +6,21 @@ specific restrictions on side sizes and types.
 """
 
 from typing import Optional
+from .FoodItem import FoodItem
 from .Side import Side, SideSize, SideName
 from .Drink import Drink, DrinkSize
 COMBO_BASE_PRICE = 4.25
 DRINK_UPGRADE_COST = 0.50
 
-class Combo:
+class Combo(FoodItem):
     """
     Represents a combination meal with a side and drink.
     
     A combo meal offers a discounted price for ordering a side item and drink
     together. Combos have restrictions: only regular-sized sides are allowed,
     and premium sides (chicken salad, tuna salad) are excluded. Large drinks
-    and bottled drinks incur an upgrade cost.
+    and bottled drinks incur an upgrade cost. Instances are immutable, so the
+    side and drink must be hashable (a Side/Drink or a frozen combo schema).
     
     Attributes:
         side (Side): The side item included in the combo
@@ -35,6 +37,8 @@ class Combo:
         >>> drink = Drink(1, DrinkSize.REGULAR, FountainDrink.COKE, None)
         >>> combo = Combo(2, side, drink, "Extra napkins")
     """
+    __slots__ = ("_side", "_drink", "_special_instructions", "_quantity", "_price")
+
     def __init__(
         self,
         quantity: int,
@@ -43,12 +47,15 @@ class Combo:
         special_instructions: Optional[str],
 
     ):
-        self._side = side
-        self._drink = drink
-        self._special_instructions = special_instructions
-        self._quantity = quantity
+        self._set(
+            side=side,
+            drink=drink,
+            special_instructions=special_instructions,
+            quantity=quantity,
+        )
         self._validate()
-        self._price = self._calculate_price()
+        self._set(price=self._calculate_price())
+        self._seal()
 
 
     def _validate(self):
@@ -7,6 +7,7 @@ pricing logic.
 
 import enum
 from typing import Optional
+from .FoodItem import FoodItem
 
 class DrinkSize(enum.Enum):
     """
@@ -77,13 +78,14 @@ DRINK_PRICE_MAP = {
     DrinkSize.BOTTLE: 2.50
 }
 
-class Drink:
+class Drink(FoodItem):
     """
     Represents a drink order with size, type, and pricing.
     
     The Drink class handles both fountain drinks (available in regular/large)
     and bottled drinks (fixed size). It validates that the correct drink type
     is used for each size and calculates pricing based on size and quantity.
+    Instances are immutable.
     
     Attributes:
         quantity (int): Number of drinks ordered
@@ -100,6 +102,8 @@ class Drink:
         >>> print(f"Price: ${drink.price:.2f}")
         Price: $5.00
     """
+    __slots__ = ("_quantity", "_size", "_name", "_special_instructions", "_price")
+
     def __init__(
         self,
         quantity: int,
@@ -108,12 +112,15 @@ class Drink:
         special_instructions: Optional[str],
 
     ):
-        self._quantity = quantity
-        self._size = size
-        self._name = name
-        self._special_instructions = special_instructions
+        self._set(
+            quantity=quantity,
+            size=size,
+            name=name,
+            special_instructions=special_instructions,
+        )
         self._validate()
-        self._price = DRINK_PRICE_MAP[size] * quantity
+        self._set(price=DRINK_PRICE_MAP[size] * quantity)
+        self._seal()
         
     def _validate(self):
         """
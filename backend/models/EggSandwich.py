@@ -7,6 +7,8 @@ and the main EggSandwich class with pricing logic.
 
 from enum import Enum
 from typing import List, Optional
+from .FoodItem import FoodItem
+from .OptionMask import OptionMask
 
 
 class Egg(Enum):
@@ -130,6 +132,9 @@ class EggSandwichAddOns(Enum):
     CHEESE = "Cheese"
 
 
+# Bit positions of the stored masks; only ever append to these enums
+EGG_SANDWICH_TOPPINGS_MASK = OptionMask(EggSandwichToppings)
+EGG_SANDWICH_ADD_ONS_MASK = OptionMask(EggSandwichAddOns)
 
 EGG_SANDWICH_ADD_ONS_PRICE_MAP = {
     EggSandwichAddOns.MEAT: 1.50,
@@ -144,14 +149,14 @@ EGG_SANDWICH_ADD_ONS_PRICE_MAP = {
 
 CROISSANT_UPCHARGE = 0.75
 
-class EggSandwich:
+class EggSandwich(FoodItem):
     """
     Represents an egg sandwich order with customizable options and pricing.
     
     The EggSandwich class handles all aspects of egg sandwich customization
     including egg preparation, bread selection, meats, cheeses, toppings,
     and premium add-ons. It calculates pricing based on base price plus
-    any premium add-ons and croissant upcharge.
+    any premium add-ons and croissant upcharge. Instances are immutable.
     
     Attributes:
         quantity (int): Number of sandwiches ordered
@@ -161,9 +166,9 @@ class EggSandwich:
         grilled (Optional[bool]): Whether sandwich should be grilled
         meat (Optional[EggSandwichMeat]): Meat selection
         cheese (Optional[EggSandwichCheese]): Cheese selection
-        toppings (Optional[List[EggSandwichToppings]]): List of toppings
+        toppings (List[EggSandwichToppings]): Toppings, deduplicated (stored as a bitmask)
         special_instructions (Optional[str]): Special preparation notes
-        add_ons (Optional[List[EggSandwichAddOns]]): List of premium add-ons
+        add_ons (List[EggSandwichAddOns]): Premium add-ons, deduplicated (stored as a bitmask)
         price (float): Total price for all sandwiches
     
     Example:
@@ -181,6 +186,12 @@ class EggSandwich:
         ... )
         >>> print(f"Price: ${sandwich.price:.2f}")
     """
+    __slots__ = (
+        "_egg", "_bread", "_toasted", "_grilled", "_meat", "_cheese", "_toppings",
+        "_special_instructions", "_add_ons", "_quantity", "_price",
+    )
+    _option_masks = {"_toppings": EGG_SANDWICH_TOPPINGS_MASK, "_add_ons": EGG_SANDWICH_ADD_ONS_MASK}
+
     def __init__(
         self,
         quantity: int,
@@ -194,18 +205,21 @@ class EggSandwich:
         special_instructions: Optional[str],
         add_ons: Optional[List[EggSandwichAddOns]],
     ):
-        self._egg = egg
-        self._bread = bread
-        self._toasted = toasted
-        self._grilled = grilled
-        self._meat = meat
-        self._cheese = cheese
-        self._toppings = list(set(toppings))
-        self._special_instructions = special_instructions
-        self._add_ons = list(set(add_ons))
-        self._quantity = quantity
+        self._set(
+            egg=egg,
+            bread=bread,
+            toasted=toasted,
+            grilled=grilled,
+            meat=meat,
+            cheese=cheese,
+            toppings=EGG_SANDWICH_TOPPINGS_MASK.encode(toppings),
+            special_instructions=special_instructions,
+            add_ons=EGG_SANDWICH_ADD_ONS_MASK.encode(add_ons),
+            quantity=quantity,
+        )
         self._validate()
-        self._price = self._calculate_price()
+        self._set(price=self._calculate_price())
+        self._seal()
 
     def _validate(self):
         """
@@ -230,14 +244,14 @@ class EggSandwich:
         if self.egg == Egg.NO_EGG and not self.meat:
             raise ValueError("Egg or meat must be specified")
 
-        if self.egg == Egg.NO_EGG and EggSandwichAddOns.EGG in self.add_ons:
+        if self.egg == Egg.NO_EGG and EGG_SANDWICH_ADD_ONS_MASK.contains(self._add_ons, EggSandwichAddOns.EGG):
             raise ValueError("Can not have egg in add-ons if no egg is specified")
 
         
-        if not self.cheese and EggSandwichAddOns.CHEESE in self.add_ons:
+        if not self.cheese and EGG_SANDWICH_ADD_ONS_MASK.contains(self._add_ons, EggSandwichAddOns.CHEESE):
             raise ValueError("Can not have cheese in add-ons if no cheese is specified")
         
-        if not self.meat and EggSandwichAddOns.MEAT in self.add_ons:
+        if not self.meat and EGG_SANDWICH_ADD_ONS_MASK.contains(self._add_ons, EggSandwichAddOns.MEAT):
             raise ValueError("Can not have meat in add-ons if no meat is specified")
 
 
@@ -289,13 +303,13 @@ class EggSandwich:
         return self._cheese
     @property
     def toppings(self):
-        return self._toppings
+        return list(EGG_SANDWICH_TOPPINGS_MASK.decode(self._toppings))
     @property
     def special_instructions(self):
         return self._special_instructions
     @property
     def add_ons(self):
-        return self._add_ons
+        return list(EGG_SANDWICH_ADD_ONS_MASK.decode(self._add_ons))
     @property
     def price(self):
         return self._price
@@ -328,4 +342,5 @@ class EggSandwich:
             result += f"Add-ons: {', '.join(a.value for a in self.add_ons)}\n"
         if self.special_instructions:
             result += f"Special Instructions: {self.special_instructions}\n"
+        return result
 
@@ -0,0 +1,143 @@
+"""Base class for the food item models of Steve's Place.
+
+This module defines FoodItem, the immutable, slotted base shared by
+Sandwich, EggSandwich, Salad, Hotdog, Side, Drink and Combo. It gives every
+item value semantics (equality and a precomputed hash over its
+configuration), interning of identical configurations as flyweights, and a
+serializer generated once per class for storing orders.
+"""
+
+import weakref
+from typing import Any, Dict
+
+from .OptionMask import OptionMask
+
+
+def display_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Decode a stored item dictionary for display.
+
+    Topping and add-on selections are stored as bitmasks (see
+    ``models.OptionMask``); this turns them back into lists of names. Items
+    stored before masks were introduced already hold names and are returned
+    unchanged.
+
+    Args:
+        item: Serialized item as stored in ``OrderTable.order_items``
+
+    Returns:
+        dict: The item with every mask decoded into a list of display values
+
+    Example:
+        >>> display_item({'type': 'Hotdog', '_toppings': 3, ...})
+        {'type': 'Hotdog', '_toppings': ['Mustard', 'Ketchup'], ...}
+    """
+    cls = FoodItem.registry.get(item.get('type'))
+    if cls is None or not cls._option_masks:
+        return item
+    decoded = dict(item)
+    for name, mask in cls._option_masks.items():
+        if isinstance(decoded.get(name), int):
+            decoded[name] = mask.values(decoded[name])
+    return decoded
+
+
+def _build_serializer(cls: type):
+    """
+    Generate the ``serialize`` function for a FoodItem subclass.
+
+    The function body is a single dict literal over the class's slots, which
+    avoids reflecting over the instance on every call. Keys keep the
+    underscored attribute names used by previously stored orders.
+    """
+    entries = ", ".join(f"{name!r}: item.{name}" for name in cls.__slots__)
+    source = f"def serialize(item):\n    return {{'type': {cls.__name__!r}, 'price': item._price, {entries}}}\n"
+    namespace: Dict[str, Any] = {}
+    exec(source, namespace)
+    serialize = namespace["serialize"]
+    serialize.__qualname__ = f"{cls.__name__}.serialize"
+    serialize.__doc__ = f"Serialize a {cls.__name__} to a dictionary for order storage."
+    return serialize
+
+
+class FoodItem:
+    """
+    Immutable value object base for all food items.
+
+    Subclasses list their attributes in ``__slots__`` (underscored names, in
+    serialization order, ``_price`` included), assign them in ``__init__``
+    with ``_set`` and finish with ``_seal``. After that the instance cannot
+    be modified.
+
+    Two items are equal when they are the same class with the same
+    configuration. ``_price`` is derived from the configuration and is left
+    out of the comparison.
+
+    Topping and add-on selections are kept as integer masks; subclasses list
+    which slots hold masks, and their ``OptionMask``, in ``_option_masks``.
+
+    Attributes:
+        registry (Dict[str, type]): FoodItem subclasses by class name, as
+            stored in the ``type`` field of serialized items
+
+    Example:
+        >>> a = Hotdog(1, HotDogMeat.BEEF, [HotDogTopping.MUSTARD], None).interned()
+        >>> b = Hotdog(1, HotDogMeat.BEEF, [HotDogTopping.MUSTARD], None).interned()
+        >>> a is b
+        True
+    """
+    __slots__ = ("_hash", "__weakref__")
+
+    registry: Dict[str, type] = {}
+    _option_masks: Dict[str, OptionMask] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._key_slots = tuple(name for name in cls.__slots__ if name != "_price")
+        cls._interned = weakref.WeakValueDictionary()
+        cls.serialize = _build_serializer(cls)
+        FoodItem.registry[cls.__name__] = cls
+
+    def _set(self, **values):
+        """Assign slot attributes during ``__init__``."""
+        for name, value in values.items():
+            object.__setattr__(self, f"_{name}", value)
+
+    def _seal(self):
+        """Precompute the hash once every attribute is set."""
+        object.__setattr__(self, "_hash", hash((type(self).__name__, self._key())))
+
+    def _key(self) -> tuple:
+        """Return the configuration tuple used for equality and interning."""
+        return tuple(getattr(self, name) for name in self._key_slots)
+
+    def interned(self):
+        """
+        Return the shared instance for this configuration.
+
+        The first item built with a given configuration is kept (weakly) and
+        returned for every identical item after it, so a day of orders holds
+        one object per distinct configuration.
+
+        Returns:
+            FoodItem: The canonical instance equal to ``self``
+        """
+        return type(self)._interned.setdefault(self._key(), self)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._hash == other._hash and self._key() == other._key()
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        fields = ", ".join(f"{name[1:]}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
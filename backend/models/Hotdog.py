@@ -6,6 +6,8 @@ meat options, toppings, and the main Hotdog class with pricing logic.
 
 from enum import Enum
 from typing import List, Optional
+from .FoodItem import FoodItem
+from .OptionMask import OptionMask
 
 
 class HotDogMeat(Enum):
@@ -67,18 +69,22 @@ class HotDogTopping(Enum):
     MAYO = "Mayo"
     HOT_CHERRY_PEPPERS = "Hot Cherry Peppers"
 
-class Hotdog:
+
+# Bit positions of the stored toppings mask; only ever append to HotDogTopping
+HOT_DOG_TOPPINGS_MASK = OptionMask(HotDogTopping)
+
+class Hotdog(FoodItem):
     """
     Represents a hotdog order with customizable meat and toppings.
     
     The Hotdog class handles hotdog customization including meat selection
     and various toppings. Pricing is based on the specific meat type
-    and quantity ordered.
+    and quantity ordered. Instances are immutable.
     
     Attributes:
         quantity (int): Number of hotdogs ordered
         dog_type (HotDogMeat): Type of hotdog meat
-        toppings (List[HotDogTopping]): List of selected toppings
+        toppings (List[HotDogTopping]): Selected toppings, deduplicated (stored as a bitmask)
         special_instructions (Optional[str]): Special preparation notes
         price (float): Total price for all hotdogs
     
@@ -92,6 +98,9 @@ class Hotdog:
         >>> print(f"Price: ${hotdog.price:.2f}")
         Price: $6.50
     """
+    __slots__ = ("_dog_type", "_toppings", "_special_instructions", "_quantity", "_price")
+    _option_masks = {"_toppings": HOT_DOG_TOPPINGS_MASK}
+
     def __init__(
         self,
         quantity: int,
@@ -99,11 +108,14 @@ class Hotdog:
         toppings: Optional[List[HotDogTopping]],
         special_instructions: Optional[str],
     ):
-        self._dog_type = dog_type
-        self._toppings = list(set(toppings))
-        self._special_instructions = special_instructions
-        self._quantity = quantity
-        self._price = HOT_DOG_PRICE_MAP[dog_type] * quantity
+        self._set(
+            dog_type=dog_type,
+            toppings=HOT_DOG_TOPPINGS_MASK.encode(toppings),
+            special_instructions=special_instructions,
+            quantity=quantity,
+            price=HOT_DOG_PRICE_MAP[dog_type] * quantity,
+        )
+        self._seal()
 
     @property
     def quantity(self) -> int:
@@ -115,7 +127,7 @@ class Hotdog:
 
     @property
     def toppings(self) -> List[HotDogTopping]:
-        return self._toppings
+        return list(HOT_DOG_TOPPINGS_MASK.decode(self._toppings))
 
     @property
     def special_instructions(self) -> Optional[str]:
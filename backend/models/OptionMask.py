@@ -0,0 +1,123 @@
+"""Bitmask encoding for topping and add-on selections in Steve's Place.
+
+This module defines OptionMask, which maps each member of a topping or
+add-on enum to a fixed bit so a whole selection fits in one integer.
+Membership checks, deduplication and equality become integer operations,
+and stored order items carry a single number instead of a list of names.
+
+Bit positions follow the enum's declaration order. New members must be
+appended at the end of their enum and existing members must never be
+reordered or removed, otherwise masks already stored in orders would
+decode to the wrong options.
+"""
+
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+
+class OptionMask:
+    """
+    Codec between a set of enum options and an integer bitmask.
+
+    Attributes:
+        enum_cls (Type[Enum]): Enum family the mask encodes
+        members (Tuple[Enum, ...]): Members in bit order
+        bits (Dict[Enum, int]): Bit value of each member
+
+    Example:
+        >>> mask = OptionMask(HotDogTopping)
+        >>> value = mask.encode([HotDogTopping.KETCHUP, HotDogTopping.MUSTARD])
+        >>> value
+        3
+        >>> mask.contains(value, HotDogTopping.KETCHUP)
+        True
+        >>> mask.decode(value)
+        (<HotDogTopping.MUSTARD: 'Mustard'>, <HotDogTopping.KETCHUP: 'Ketchup'>)
+    """
+
+    def __init__(self, enum_cls: Type[Enum]):
+        self.enum_cls = enum_cls
+        self.members: Tuple[Enum, ...] = tuple(enum_cls)
+        self.bits: Dict[Enum, int] = {member: 1 << index for index, member in enumerate(self.members)}
+        self._bits_by_value: Dict[str, int] = {member.value: bit for member, bit in self.bits.items()}
+        self._decoded: Dict[int, Tuple[Enum, ...]] = {}
+
+    # Upper bound on cached decodings, so arbitrary masks cannot grow the cache without limit
+    MAX_CACHED_DECODES = 4096
+
+    def encode(self, options: Optional[Iterable[Enum]]) -> int:
+        """
+        Encode a selection of options, duplicates allowed, into a mask.
+
+        Args:
+            options: Selected enum members, may be None
+
+        Returns:
+            int: Bitmask of the selection
+        """
+        mask = 0
+        for option in options or ():
+            mask |= self.bits[option]
+        return mask
+
+    def encode_values(self, values: Iterable[str]) -> int:
+        """
+        Encode a selection given as display values, as found in older stored orders.
+
+        Args:
+            values: Enum values such as ``"Mayo"``
+
+        Returns:
+            int: Bitmask of the selection
+
+        Raises:
+            KeyError: If a value does not belong to the enum family
+        """
+        mask = 0
+        for value in values:
+            mask |= self._bits_by_value[value]
+        return mask
+
+    def decode(self, mask: int) -> Tuple[Enum, ...]:
+        """
+        Decode a mask into its options, in declaration order.
+
+        Decoded masks are cached, since a family has few distinct selections in practice.
+
+        Args:
+            mask: Bitmask produced by ``encode``
+
+        Returns:
+            Tuple of the selected enum members
+        """
+        options = self._decoded.get(mask)
+        if options is None:
+            options = tuple(member for member, bit in self.bits.items() if mask & bit)
+            if len(self._decoded) < self.MAX_CACHED_DECODES:
+                self._decoded[mask] = options
+        return options
+
+    def values(self, mask: int) -> List[str]:
+        """
+        Decode a mask into display values for API responses.
+
+        Args:
+            mask: Bitmask produced by ``encode``
+
+        Returns:
+            List of enum values such as ``["Mayo", "Onions"]``
+        """
+        return [option.value for option in self.decode(mask)]
+
+    def contains(self, mask: int, option: Enum) -> bool:
+        """
+        Check whether an option is part of a mask.
+
+        Args:
+            mask: Bitmask produced by ``encode``
+            option: Enum member to look for
+
+        Returns:
+            bool: True if the option is selected
+        """
+        return bool(mask & self.bits[option])
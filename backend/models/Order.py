@@ -12,6 +12,33 @@ from .Hotdog import Hotdog
 from .Side import Side
 from .EggSandwich import EggSandwich
 
+
+def price_cents(item) -> int:
+    """
+    Return a food item's price in whole cents.
+
+    Args:
+        item: Any food item instance
+
+    Returns:
+        int: The item price, rounded to the cent
+    """
+    return round(item.price * 100)
+
+
+def price_with_fee(price: float) -> float:
+    """
+    Add the 4% card processing fee to a price.
+
+    Args:
+        price (float): Order total without the fee
+
+    Returns:
+        float: Price plus 4% fee, rounded to 2 decimal places
+    """
+    return round(price * 1.04, 2)
+
+
 class Order:
     """
     Represents a complete customer order containing multiple food items.
@@ -23,6 +50,10 @@ class Order:
     Attributes:
         items (List[Union[Sandwich, Drink, Combo, Hotdog, Side, EggSandwich]]):
             List of food items in the order
+
+    The subtotal is kept in whole cents as items are added, so large orders
+    are priced as they are built, and a total does not depend on the order
+    the items were added in.
     
     Example:
         >>> order = Order()
@@ -35,6 +66,8 @@ class Order:
     """
     def __init__(self):
         self.items: List[Union[Sandwich, Drink, Combo, Hotdog, Side, EggSandwich]] = []
+        # Running sum of item prices in cents (items are immutable)
+        self._subtotal_cents = 0
         
     def add_item(self, item: Union[Sandwich, Drink, Combo, Hotdog, Side, EggSandwich]):
         """
@@ -45,6 +78,7 @@ class Order:
                   Side, or EggSandwich) to add to the order
         """
         self.items.append(item)
+        self._subtotal_cents += price_cents(item)
     
     def total_price(self) -> float:
         """
@@ -53,7 +87,7 @@ class Order:
         Returns:
             float: Sum of all item prices, rounded to 2 decimal places
         """
-        return round(sum(item.price for item in self.items), 2)
+        return self._subtotal_cents / 100
 
     def total_price_with_fee(self) -> float:
         """
@@ -65,7 +99,16 @@ class Order:
         Returns:
             float: Total price plus 4% fee, rounded to 2 decimal places
         """
-        return round(self.total_price() * 1.04, 2)
+        return price_with_fee(self.total_price())
+
+    def serialized_items(self) -> List[dict]:
+        """
+        Return the items as they are stored with the order.
+
+        Returns:
+            List[dict]: Each item's ``serialize()`` output
+        """
+        return [item.serialize() for item in self.items]
 
     def __str__(self):
         """
@@ -4,10 +4,35 @@ This module defines the OrderTable class which represents the database
 schema for storing customer orders with SQLAlchemy ORM.
 """
 
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime, timezone
-import json
 from db import db
+from utils import json_codec, order_items_codec, stores
+from models.FoodItem import display_item
+# Item models with option masks register themselves for display_item
+from models import EggSandwich, Hotdog, Salad, Sandwich  # noqa: F401
+
+# Bump whenever the public JSON shape produced by ``OrderTable._render`` changes,
+# so rows rendered by an older release are re-rendered on read.
+ORDER_RENDER_VERSION = 2
+
+
+def _isoformat(value):
+    """
+    Format a stored timestamp as an ISO 8601 string in UTC.
+
+    Timestamps are stored in UTC, but SQLite hands them back without tzinfo.
+    Naive values are therefore read as UTC so a freshly created row and the
+    same row loaded from the database format identically.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
 
 class OrderTable(db.Model):
     """
@@ -18,10 +43,12 @@ class OrderTable(db.Model):
     It provides methods for converting database records to dictionary format.
     
     Attributes:
-        id (int): Primary key, auto-incrementing order ID
+        id (int): Primary key, auto-incrementing order ID (unique within a store)
+        store_id (str): Location the order was placed at
         customer_name (str): Name of the customer placing the order
         phone_number (str): Customer's phone number for contact
-        order_items (str): JSON string containing serialized order items
+        order_items (str): Serialized order items, as JSON or in the compact
+            encoding of ``utils.order_items_codec``
         total_amount (float): Total price of the order
         payment_method (str): Payment method ('cash' or 'card')
         payment_status (str): Payment status ('pending', 'succeeded', 'failed')
@@ -29,6 +56,10 @@ class OrderTable(db.Model):
         payment_intent_id (str, optional): Stripe payment intent identifier
         created_at (datetime): Timestamp when the order was created
         pickup_at (datetime): Timestamp for order pickup
+        rendered_json (str, optional): Pre-rendered public JSON of the order, minus ``id``
+        rendered_version (int, optional): ``ORDER_RENDER_VERSION`` used for ``rendered_json``
+        intake_id (str, optional): Intake journal record the order was inserted from
+        completed_at (datetime, optional): When the kitchen finished the order, None while open
     
     Example:
         >>> order = OrderTable(
@@ -43,11 +74,20 @@ class OrderTable(db.Model):
         >>> db.session.commit()
     """
     __tablename__ = 'orders'
-    
+    # Recent orders of a customer, see recent_for_phone()
+    __table_args__ = (
+        db.Index('ix_orders_phone_number_created_at', 'phone_number', 'created_at'),
+        # One row per intake journal record, however often it is replayed
+        db.Index('ix_orders_intake_id', 'intake_id', unique=True),
+        # Orders completed since a kitchen board's last read, see utils/kitchen.py
+        db.Index('ix_orders_completed_at', 'completed_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    store_id = db.Column(db.String(32), nullable=False, server_default=stores.DEFAULT_STORE_ID)
     customer_name = db.Column(db.String(100), nullable=False)
     phone_number = db.Column(db.String(10), nullable=False)
-    order_items = db.Column(db.Text, nullable=False)  # JSON string of serialized items
+    order_items = db.Column(db.Text, nullable=False)  # Serialized items, see utils.order_items_codec
     total_amount = db.Column(db.Float, nullable=False)
     payment_method = db.Column(db.String(20), nullable=False)  # 'cash' or 'card'
     payment_status = db.Column(db.String(20), default='pending')  # 'pending', 'succeeded', 'failed'
@@ -62,18 +102,55 @@ class OrderTable(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     pickup_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
-    def __init__(self, customer_name, phone_number, order_items, total_amount, payment_method, payment_status, payment_intent_id=None, sms_verification_code=None, pickup_at=None):
+    # Public JSON rendered once at insert time, see to_json()
+    rendered_json = db.Column(db.Text, nullable=True)
+    rendered_version = db.Column(db.Integer, nullable=True)
+    # Id of the intake journal record the order was inserted from (utils/intake_journal.py)
+    intake_id = db.Column(db.String(32), nullable=True)
+    # Set when the kitchen finishes the order; not part of the public JSON
+    completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def __init__(self, customer_name, phone_number, order_items, total_amount, payment_method, payment_status, payment_intent_id=None, sms_verification_code=None, pickup_at=None, created_at=None, intake_id=None):
+        self.store_id = stores.current_store_id()
         self.customer_name = customer_name
         self.phone_number = phone_number
-        self.order_items = json.dumps(order_items) if isinstance(order_items, list) else order_items
+        if isinstance(order_items, list):
+            order_items = order_items_codec.dumps(order_items, self._items_encoding())
+        self.order_items = order_items
         self.total_amount = total_amount
         self.payment_method = payment_method
         self.payment_status = payment_status
         
         self.payment_intent_id = payment_intent_id
         self.sms_verification_code = sms_verification_code
-        self.pickup_at = pickup_at
+        self.intake_id = intake_id
+        # Set the timestamps up front so the row can be rendered before the insert.
+        # Pickup time is stored in UTC like created_at, whatever offset the client sent.
+        self.created_at = created_at or datetime.now(timezone.utc)
+        if pickup_at is None:
+            pickup_at = self.created_at
+        self.pickup_at = pickup_at.astimezone(timezone.utc) if pickup_at.tzinfo else pickup_at
+        self.refresh_rendered()
+
 
+    @classmethod
+    def recent_for_phone(cls, phone_number, limit):
+        """
+        Return a customer's most recent orders, newest first.
+
+        Served by the (phone_number, created_at) index, so the lookup does not
+        scan the table.
+
+        Args:
+            phone_number (str): Customer's 10-digit phone number
+            limit (int): Maximum number of orders to return
+
+        Returns:
+            List[OrderTable]: Up to ``limit`` orders
+        """
+        return cls.query.filter_by(phone_number=phone_number).order_by(
+            cls.created_at.desc(), cls.id.desc()
+        ).limit(limit).all()
 
     def __repr__(self):
         return f"<Order {self.id} {self.customer_name} {self.phone_number} {self.order_items} {self.total_amount} {self.payment_method} {self.payment_status} {self.payment_intent_id} {self.sms_verification_code} {self.created_at} {self.pickup_at}>"
@@ -85,7 +162,8 @@ class OrderTable(db.Model):
         
         Transforms the SQLAlchemy model instance into a dictionary format
         suitable for JSON serialization and API responses. Handles datetime
-        conversion to ISO format string and JSON parsing of order items.
+        conversion to ISO format string and JSON parsing of order items,
+        with topping and add-on masks decoded back into names.
         
         Returns:
             dict: Dictionary containing all order fields with appropriate
@@ -94,17 +172,94 @@ class OrderTable(db.Model):
         Example:
             >>> order_dict = order.to_dict()
             >>> print(order_dict['created_at'])
-            '2023-12-01T14:30:00'
+            '2023-12-01T14:30:00+00:00'
         """
         return {
             'id': self.id,
+            'store_id': self.store_id,
             'customer_name': self.customer_name,
             'phone_number': self.phone_number,
-            'order_items': json.loads(self.order_items) if isinstance(self.order_items, str) else self.order_items,
+            'order_items': self._display_items(),
             'total_amount': self.total_amount,
             'payment_method': self.payment_method,
             'payment_status': self.payment_status,
             'payment_intent_id': self.payment_intent_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'pickup_at': self.pickup_at.isoformat() if self.pickup_at else None,
+            'created_at': _isoformat(self.created_at),
+            'pickup_at': _isoformat(self.pickup_at),
         }
+
+    @staticmethod
+    def _items_encoding():
+        """Return the ``ORDER_ITEMS_ENCODING`` configured for new rows."""
+        if has_app_context():
+            return current_app.config.get("ORDER_ITEMS_ENCODING", "json")
+        return "json"
+
+    def _display_items(self):
+        """Return the stored order items, in either encoding, with option masks decoded for display."""
+        items = order_items_codec.loads(self.order_items) if isinstance(self.order_items, str) else self.order_items
+        return [display_item(item) for item in items]
+
+    def _render(self):
+        """
+        Render the public JSON of the order without its ``id``.
+
+        Order items are decoded for display once here, at write time, so reads
+        serve them without touching the stored masks. The ``id`` is left out
+        because it is only known after the insert; ``to_json`` adds it.
+
+        Returns:
+            str: JSON object text with every ``to_dict`` field except ``id``
+        """
+        head = json_codec.dumps({
+            'store_id': self.store_id,
+            'customer_name': self.customer_name,
+            'phone_number': self.phone_number,
+        })
+        tail = json_codec.dumps({
+            'total_amount': self.total_amount,
+            'payment_method': self.payment_method,
+            'payment_status': self.payment_status,
+            'payment_intent_id': self.payment_intent_id,
+            'created_at': _isoformat(self.created_at),
+            'pickup_at': _isoformat(self.pickup_at),
+        })
+        order_items = json_codec.dumps(self._display_items())
+        return f'{head[:-1]},"order_items":{order_items},{tail[1:]}'
+
+    def refresh_rendered(self):
+        """
+        Re-render ``rendered_json`` from the current column values.
+
+        Called on construction and before every update so the cached rendering
+        never goes stale.
+        """
+        self.rendered_json = self._render()
+        self.rendered_version = ORDER_RENDER_VERSION
+
+    def to_json(self):
+        """
+        Return the public JSON of the order as a string.
+
+        Produces the same document as ``json_codec.dumps(order.to_dict())`` but, for
+        rows rendered by the current release, without parsing ``order_items``:
+        the ``id`` is prefixed onto the stored rendering. Rows written before
+        pre-rendering existed, or by an older ``ORDER_RENDER_VERSION``, are
+        rendered on the fly.
+
+        Returns:
+            str: JSON object text for this order
+
+        Example:
+            >>> body = "[" + ",".join(order.to_json() for order in orders) + "]"
+        """
+        rendered = self.rendered_json
+        if rendered is None or self.rendered_version != ORDER_RENDER_VERSION:
+            rendered = self._render()
+        return f'{{"id":{json_codec.dumps(self.id)},{rendered[1:]}'
+
+
+@event.listens_for(OrderTable, 'before_update')
+def _refresh_rendered_before_update(mapper, connection, target):
+    """Keep ``rendered_json`` in sync when an order row is modified."""
+    target.refresh_rendered()
@@ -7,6 +7,8 @@ with pricing logic.
 
 from enum import Enum
 from typing import List, Optional
+from .FoodItem import FoodItem
+from .OptionMask import OptionMask
 
 
 class SaladChoice(Enum):
@@ -111,6 +113,16 @@ class SaladAddOns(Enum):
     MEAT = "Meat"
     DRESSING = "Dressing"
 
+
+# Bit positions of the stored masks; only ever append to these enums
+SALAD_TOPPINGS_MASK = OptionMask(SaladTopping)
+SALAD_ADD_ONS_MASK = OptionMask(SaladAddOns)
+SALAD_CHEESE_TOPPINGS = SALAD_TOPPINGS_MASK.encode([
+    SaladTopping.AMERICAN_CHEESE,
+    SaladTopping.PROVOLONE_CHEESE,
+    SaladTopping.SWISS_CHEESE,
+])
+
 SALAD_ADD_ONS_PRICE_MAP = {
     SaladAddOns.CHEESE: 0.75,
     SaladAddOns.EGGS: 1.00,
@@ -126,20 +138,21 @@ SALAD_PRICE_MAP = {
     SaladChoice.CHEF_TUNA: 9.50,
 }
 
-class Salad:
+class Salad(FoodItem):
     """
     Represents a salad order with customizable options and pricing.
     
     The Salad class handles all aspects of salad customization including
     base salad selection, toppings, dressings, and premium add-ons.
     It calculates pricing based on base price plus any premium add-ons.
+    Instances are immutable.
     
     Attributes:
         quantity (int): Number of salads ordered
         choice (SaladChoice): Base salad type
-        toppings (List[SaladTopping]): List of selected toppings
+        toppings (List[SaladTopping]): Selected toppings, deduplicated (stored as a bitmask)
         dressing (Optional[SaladDressing]): Selected dressing
-        add_ons (Optional[List[SaladAddOns]]): List of premium add-ons
+        add_ons (List[SaladAddOns]): Premium add-ons, deduplicated (stored as a bitmask)
         special_instructions (Optional[str]): Special preparation notes
         price (float): Total price for all salads
     
@@ -155,6 +168,9 @@ class Salad:
         >>> print(f"Price: ${salad.price:.2f}")
         Price: $10.25
     """
+    __slots__ = ("_choice", "_toppings", "_dressing", "_special_instructions", "_add_ons", "_quantity", "_price")
+    _option_masks = {"_toppings": SALAD_TOPPINGS_MASK, "_add_ons": SALAD_ADD_ONS_MASK}
+
     def __init__(
         self,
         quantity: int,
@@ -164,14 +180,17 @@ class Salad:
         special_instructions: Optional[str],
         add_ons: Optional[List[SaladAddOns]],
     ):
-        self._choice = choice
-        self._toppings = list(set(toppings))
-        self._dressing = dressing
-        self._special_instructions = special_instructions
-        self._add_ons = list(set(add_ons))
-        self._quantity = quantity
+        self._set(
+            choice=choice,
+            toppings=SALAD_TOPPINGS_MASK.encode(toppings),
+            dressing=dressing,
+            special_instructions=special_instructions,
+            add_ons=SALAD_ADD_ONS_MASK.encode(add_ons),
+            quantity=quantity,
+        )
         self._validate()
-        self._price = self._calculate_price()
+        self._set(price=self._calculate_price())
+        self._seal()
 
     def _validate(self):
         """
@@ -186,24 +205,18 @@ class Salad:
         """
 
         if self.choice == SaladChoice.GARDEN:
-            if SaladTopping.BACON in self.toppings:
+            if SALAD_TOPPINGS_MASK.contains(self._toppings, SaladTopping.BACON):
                 raise ValueError("Bacon is not allowed on Garden Salad")
-            if SaladAddOns.MEAT in self.add_ons:
+            if SALAD_ADD_ONS_MASK.contains(self._add_ons, SaladAddOns.MEAT):
                 raise ValueError("Meat is not allowed on Garden Salad")
             
-        if SaladAddOns.DRESSING in self.add_ons and not self.dressing:
+        if SALAD_ADD_ONS_MASK.contains(self._add_ons, SaladAddOns.DRESSING) and not self.dressing:
             raise ValueError("Dressing is required on Garden Salad")
         
-        if SaladAddOns.EGGS in self.add_ons and SaladTopping.EGGS not in self.toppings:
+        if SALAD_ADD_ONS_MASK.contains(self._add_ons, SaladAddOns.EGGS) and not SALAD_TOPPINGS_MASK.contains(self._toppings, SaladTopping.EGGS):
             raise ValueError("Eggs are required in the toppings to add Eggs")
 
-        if SaladAddOns.CHEESE in self.add_ons and not any(
-            t in self.toppings for t in [
-                SaladTopping.AMERICAN_CHEESE,
-                SaladTopping.PROVOLONE_CHEESE,
-                SaladTopping.SWISS_CHEESE,
-            ]
-        ):
+        if SALAD_ADD_ONS_MASK.contains(self._add_ons, SaladAddOns.CHEESE) and not self._toppings & SALAD_CHEESE_TOPPINGS:
             raise ValueError("Cheese is required in the toppings to add Cheese")
 
 
@@ -234,7 +247,7 @@ class Salad:
     
     @property
     def toppings(self) -> List[SaladTopping]:
-        return self._toppings
+        return list(SALAD_TOPPINGS_MASK.decode(self._toppings))
     
     @property
     def dressing(self) -> Optional[SaladDressing]:
@@ -245,8 +258,8 @@ class Salad:
         return self._special_instructions
     
     @property
-    def add_ons(self) -> Optional[List[SaladAddOns]]:
-        return self._add_ons
+    def add_ons(self) -> List[SaladAddOns]:
+        return list(SALAD_ADD_ONS_MASK.decode(self._add_ons))
     
     @property
     def price(self) -> float:
@@ -7,6 +7,8 @@ Sandwich class with complex pricing logic.
 
 from enum import Enum
 from typing import List, Optional
+from .FoodItem import FoodItem
+from .OptionMask import OptionMask
 
 
 class SandwichSize(Enum):
@@ -171,6 +173,10 @@ class SandwichAddOns(Enum):
     CHEESE = "Cheese"
 
 
+# Bit positions of the stored masks; only ever append to these enums
+SANDWICH_TOPPINGS_MASK = OptionMask(SandwichToppings)
+SANDWICH_ADD_ONS_MASK = OptionMask(SandwichAddOns)
+
 STANDARD_SANDWICH_PRICE_REGULAR = 7.00
 STANDARD_SANDWICH_PRICE_LARGE = 8.50
 
@@ -214,12 +220,13 @@ SANDWICH_ADD_ONS_PRICE_MAP = {
     },
 }
 
-class Sandwich:
+class Sandwich(FoodItem):
     """
     Represents a sandwich order with customizable options and complex pricing.
     
     The Sandwich class handles all aspects of sandwich customization including
     size selection, bread choice, meat, cheese, toppings, and premium add-ons.
+    Instances are immutable.
     
     Attributes:
         quantity (int): Number of sandwiches ordered
@@ -229,9 +236,9 @@ class Sandwich:
         toast (bool): Whether to toast the sandwich
         grilled (bool): Whether to grill the sandwich
         cheese (Optional[SandwichCheese]): Cheese selection
-        toppings (Optional[List[SandwichToppings]]): List of vegetable toppings and condiments
+        toppings (List[SandwichToppings]): Vegetable toppings and condiments, deduplicated (stored as a bitmask)
         special_instructions (Optional[str]): Special preparation notes
-        add_ons (Optional[List[SandwichAddOns]]): List of premium add-ons
+        add_ons (List[SandwichAddOns]): Premium add-ons, deduplicated (stored as a bitmask)
         price (float): Total price for all sandwiches
     
     Example:
@@ -250,6 +257,12 @@ class Sandwich:
         >>> print(f"Price: ${sandwich.price:.2f}")
         Price: $9.50
     """
+    __slots__ = (
+        "_size", "_bread", "_toast", "_grilled", "_meat", "_cheese", "_toppings",
+        "_special_instructions", "_add_ons", "_quantity", "_price",
+    )
+    _option_masks = {"_toppings": SANDWICH_TOPPINGS_MASK, "_add_ons": SANDWICH_ADD_ONS_MASK}
+
     def __init__(
         self,
         quantity: int,
@@ -263,19 +276,21 @@ class Sandwich:
         special_instructions: Optional[str],
         add_ons: Optional[List[SandwichAddOns]],
     ):
-
-        self._size = size
-        self._bread = bread
-        self._toast = toast
-        self._grilled = grilled
-        self._meat = meat
-        self._cheese = cheese
-        self._toppings = list(set(toppings))
-        self._special_instructions = special_instructions
-        self._add_ons = list(set(add_ons))
-        self._quantity = quantity
+        self._set(
+            size=size,
+            bread=bread,
+            toast=toast,
+            grilled=grilled,
+            meat=meat,
+            cheese=cheese,
+            toppings=SANDWICH_TOPPINGS_MASK.encode(toppings),
+            special_instructions=special_instructions,
+            add_ons=SANDWICH_ADD_ONS_MASK.encode(add_ons),
+            quantity=quantity,
+        )
         self._validate()
-        self._price = self._calculate_price()
+        self._set(price=self._calculate_price())
+        self._seal()
 
     def _validate(self):
         """
@@ -291,7 +306,7 @@ class Sandwich:
         """
 
 
-        if SandwichAddOns.CHEESE in self.add_ons and self.cheese is None:
+        if SANDWICH_ADD_ONS_MASK.contains(self._add_ons, SandwichAddOns.CHEESE) and self.cheese is None:
             raise ValueError("Cheese is required when adding cheese add-on.")
 
 
@@ -338,13 +353,13 @@ class Sandwich:
         return self._cheese
     @property
     def toppings(self):
-        return self._toppings
+        return list(SANDWICH_TOPPINGS_MASK.decode(self._toppings))
     @property
     def special_instructions(self):
         return self._special_instructions
     @property
     def add_ons(self):
-        return self._add_ons
+        return list(SANDWICH_ADD_ONS_MASK.decode(self._add_ons))
     @property
     def price(self):
         return self._price
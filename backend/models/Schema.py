@@ -6,7 +6,7 @@ Each schema corresponds to a food item model and defines the expected
 structure for API requests and responses.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Literal
 from .Side import SideName, SideSize, Chips
 from .Drink import DrinkSize, FountainDrink, BottleDrink
@@ -153,7 +153,11 @@ class ComboSideSchema(BaseModel):
         size (SideSize): is by default regular
         chips_type (Optional[Chips]): Type of chips
         special_instructions (str): is by default to None
+
+    Frozen so the combo that holds it stays hashable.
     """
+    model_config = ConfigDict(frozen=True)
+
     quantity: Literal[1] = Field(default=1, description="Quantity should be at combo level")
     name: SideName
     size: Literal[SideSize.REGULAR] = Field(default=SideSize.REGULAR, description="Size should be at combo level")
@@ -176,7 +180,10 @@ class ComboDrinkSchema(BaseModel):
         size (DrinkSize): Size of the drink
         special_instructions (str): is by default to None
 
+    Frozen so the combo that holds it stays hashable.
     """
+    model_config = ConfigDict(frozen=True)
+
     quantity: Literal[1] = Field(default=1, description="Quantity should be at combo level")
     name: FountainDrink | BottleDrink
     size: DrinkSize
@@ -7,6 +7,7 @@ pricing logic.
 
 import enum
 from typing import Optional
+from .FoodItem import FoodItem
 
 
 class SideSize(enum.Enum):
@@ -119,14 +120,14 @@ SIDE_PRICE_MAP = {
     }
 }
 
-class Side:
+class Side(FoodItem):
     """
     Represents a side item order with customizable options and pricing.
     
     The Side class handles side item customization including size selection,
     side type, and chip flavor selection for chip orders. It calculates
     pricing based on side type and size, with chip flavor included at no
-    extra charge.
+    extra charge. Instances are immutable.
     
     Attributes:
         quantity (int): Number of side items ordered
@@ -147,6 +148,8 @@ class Side:
         >>> print(f"Price: ${side.price:.2f}")
         Price: $3.50
     """
+    __slots__ = ("_name", "_size", "_chips_type", "_special_instructions", "_quantity", "_price")
+
     def _validate(self):
         """
         Validate side item configuration.
@@ -184,13 +187,16 @@ class Side:
         Raises:
             ValueError: If configuration is invalid (e.g., chips without flavor)
         """
-        self._name = name
-        self._size = size
-        self._chips_type = chips_type
-        self._special_instructions = special_instructions
-        self._quantity = quantity
+        self._set(
+            name=name,
+            size=size,
+            chips_type=chips_type,
+            special_instructions=special_instructions,
+            quantity=quantity,
+        )
         self._validate()
-        self._price = self._calculate_price()
+        self._set(price=self._calculate_price())
+        self._seal()
 
     def _calculate_price(self) -> float:
         """
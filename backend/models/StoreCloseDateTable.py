@@ -6,6 +6,7 @@ schema for storing store closed dates with SQLAlchemy ORM.
 
 from flask_sqlalchemy import SQLAlchemy
 from db import db
+from utils import stores
 
 class StoreClosedDateTable(db.Model):
     """
@@ -14,13 +15,18 @@ class StoreClosedDateTable(db.Model):
     This model stores information about dates when a store is closed,
     including one-time closures.
 
+    Each location keeps its closed dates in its own database (see
+    ``utils.stores``), so queries only ever see the current store's calendar.
+
     Attributes:
         id (int): Primary key for the table.
+        store_id (str): Location that is closed.
         date (date): Specific date when the store is closed.
     """
     __tablename__ = 'store_closed_dates'
 
     id = db.Column(db.Integer, primary_key=True)
+    store_id = db.Column(db.String(32), nullable=False, server_default=stores.DEFAULT_STORE_ID)
     date = db.Column(db.Date, nullable=False)
     
     def __init__(self, date):
@@ -28,6 +34,7 @@ class StoreClosedDateTable(db.Model):
         if self.query.filter_by(date=date).first():
             raise Exception("Duplicate date can not be created")
             
+        self.store_id = stores.current_store_id()
         self.date = date
     @classmethod
     def is_closed_on(cls, date):
@@ -1,22 +1,46 @@
-import json
 import logging
-from flask import Blueprint, request, jsonify
-from models.OrderTable import OrderTable, db
-from utils.checkout_api_helper import generate_sms_code, validate_order, verify_sms_code, serialize_food_item, pay_with_card, cancel_payment_intent, confirm_payment_intent
-import os
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
+from flask import Blueprint, current_app, request, jsonify
+from models.OrderTable import OrderTable
+from db import reads_from_reader
+from utils import json_codec
+from utils.checkout_api_helper import generate_sms_code, validate_order, validate_order_items, validate_streamed_order, verify_sms_code, pay_with_card, cancel_payment_intent, confirm_payment_intent, reprice_stored_order
+from utils.bulk_order import BulkLimits, BulkOrderError, read_bulk_order
+from utils.cart_quote import create_quote, update_quote
+from utils.review_token import issue_token
+from utils.ttl_cache import TTLCache
+from utils.metrics import stage
+from utils.logging_setup import mask_phone
+from utils.rate_limit import Rate, protect
+from utils import intake_journal, rate_limit, stores
+
 logger = logging.getLogger(__name__)
-file_handler = logging.FileHandler(os.path.join(log_dir, 'checkout_api.log'))
-file_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
 
 routes = Blueprint('checkout_api', __name__, url_prefix='/api/checkout')
+stores.use_store(routes)
+
+# Re-priced carts by (store id, order id). Stored items never change, so entries only
+# expire to pick up menu price changes.
+REORDER_CACHE_TTL = 10 * 60
+REORDER_MAX_CARTS = 10
+reorder_cache = TTLCache(ttl=REORDER_CACHE_TTL, max_size=4096)
+
+# Token buckets per endpoint, see utils/rate_limit.py. Every SMS sent costs
+# money, and verification codes must not be guessable by retrying.
+RATE_LIMITS = {
+    'send_sms_verification': [('ip', Rate(10, 60)), ('phone', Rate(3, 600)), ('global', Rate(20, 1))],
+    'verify_sms': [('ip', Rate(20, 60)), ('phone', Rate(10, 600))],
+    'confirm_payment': [('ip', Rate(10, 60)), ('phone', Rate(5, 600)), ('global', Rate(20, 1))],
+    'reorder': [('ip', Rate(30, 60))],
+    # Called on every cart change, so well above the checkout limits
+    'quote': [('ip', Rate(120, 60))],
+    'review': [('ip', Rate(60, 60))],
+    # The phone number is in the body; bulk_order takes it from the buckets of
+    # the form endpoint it stands in for once the body's order object is read
+    'bulk_order': [('ip', Rate(10, 60)), ('global', Rate(20, 1))],
+}
+# Endpoints waiting on Stripe or Twilio; beyond the concurrency limit they are shed
+PROVIDER_ENDPOINTS = {'send_sms_verification', 'verify_sms', 'confirm_payment', 'bulk_order'}
+protect(routes, RATE_LIMITS, PROVIDER_ENDPOINTS)
 
     
 @routes.route('/send_sms_verification', methods=['POST'])
@@ -33,13 +57,16 @@ def send_sms_verification():
         phone_number (str): 10-digit phone number for SMS verification
         order_items (str): JSON string containing array of order items
         order_price (str): Total order price as string
+        review_token (str, optional): Token from the review endpoint; skips re-pricing when it matches the cart
     
     Returns:
         JSON response with success status and message, or error details
         
     Status Codes:
         200: SMS verification code sent successfully
+        429: Rate limited per IP, per phone number or globally (see Retry-After)
         500: Failed to generate verification code or server error
+        503: Too many provider calls in progress, shed (see Retry-After)
     
     Raises:
         ValueError: If order validation fails
@@ -48,49 +75,160 @@ def send_sms_verification():
     logger.info(f"SMS verification request received from IP: {request.remote_addr}")
     try:
         # Parse form data
-        customer_name = request.form.get('customer_name')
-        phone_number = request.form.get('phone_number')
-        order_items = json.loads(request.form.get('order_items'))
-        order_price = float(request.form.get('order_price'))
-        pickup_at = request.form.get('pickup_at')
+        with stage('parse'):
+            customer_name = request.form.get('customer_name')
+            phone_number = request.form.get('phone_number')
+            order_items = json_codec.loads(request.form.get('order_items'))
+            order_price = float(request.form.get('order_price'))
+            pickup_at = request.form.get('pickup_at')
+            token = request.form.get('review_token')
         
-        logger.info(f"SMS verification request - Customer: {customer_name}, Phone: {phone_number}, Order Price: ${order_price}")
+        logger.info(f"SMS verification request - Customer: {customer_name}, Phone: {mask_phone(phone_number)}, Order Price: ${order_price}")
         
         try:
-            order, pickup_time = validate_order(customer_name, phone_number, order_items, order_price, pickup_at, card_payment=False)
+            order, pickup_time = validate_order(customer_name, phone_number, order_items, order_price, pickup_at, card_payment=False, token=token)
         except ValueError as e:
             logger.error(f"Order validation failed for {customer_name}: {str(e)}")
             return jsonify({'error': f'Order validation failed: {str(e)}'}), 400
     
-        # Generate verification code and temporary order ID
-        if not generate_sms_code(phone_number):
-            logger.error(f"Failed to generate SMS code for phone: {phone_number}")
-            return jsonify({'error': 'Failed to generate verification code'}), 500
-        else:
-            logger.info(f"SMS verification code sent successfully to {phone_number}")
-            return jsonify({
-                'success': True,
-                'message': 'Verification code sent successfully',
-            }), 200
+        # Generate verification code
+        return _send_verification_code(phone_number)
 
     except Exception as e:
-        logger.error(f"SMS verification failed for {phone_number}: {str(e)}")
+        logger.error(f"SMS verification failed for {mask_phone(phone_number)}: {str(e)}")
         return jsonify({'error': f'Failed to receive verification: {str(e)}'}), 500
 
+
+def _send_verification_code(phone_number):
+    """
+    Text an SMS verification code for a validated cash order.
+
+    Returns:
+        Tuple[Response, int]: JSON response and status code
+    """
+    if not generate_sms_code(phone_number):
+        logger.error(f"Failed to generate SMS code for phone: {mask_phone(phone_number)}")
+        return jsonify({'error': 'Failed to generate verification code'}), 500
+    logger.info(f"SMS verification code sent successfully to {mask_phone(phone_number)}")
+    return jsonify({
+        'success': True,
+        'message': 'Verification code sent successfully',
+    }), 200
+
+
+def _place_cash_order(customer_name, phone_number, order, pickup_time, sms_code):
+    """
+    Verify the SMS code of a validated cash order and journal the order.
+
+    Returns:
+        Tuple[Response, int]: JSON response and status code
+    """
+    if not verify_sms_code(phone_number, sms_code):
+        logger.error(f"Failed to verify SMS code for {mask_phone(phone_number)}")
+        return jsonify({'error': 'Failed to verify SMS code'}), 400
+
+    logger.info(f"SMS code verified successfully for {mask_phone(phone_number)}")
+    
+    try:
+        # After verified, journal the order; the applier inserts it into the database
+        with stage('journal'):
+            receipt = intake_journal.submit_order(
+                customer_name=customer_name,
+                phone_number=phone_number,
+                order_items=order.serialized_items(),
+                total_amount=order.total_price(),
+                payment_method='cash',
+                payment_status='pending',
+                sms_verification_code=sms_code,
+                pickup_at=pickup_time,
+            )
+    except OSError as e:
+        logger.error(f"Failed to journal cash order for {customer_name}: {str(e)}")
+        return jsonify({'error': f'Failed to create order: {str(e)}'}), 500
+    # Briefly wait for the row so a healthy database still has it before we answer
+    order_id = receipt.wait(current_app.config["INTAKE_APPLY_WAIT"])
+    logger.info(f"Cash order journaled - Intake ID: {receipt.intake_id}, Order ID: {order_id}, Customer: {customer_name}, Amount: ${order.total_price()}")
+
+    return jsonify({
+        'success': True,
+        'message': 'Order placed! Estimated time: Sandwich/EggSandwich: ~7-10 mins, Other items: ~3-7 mins (depends on kitchen workload)',
+    }), 200
+
+
+def _place_card_order(customer_name, phone_number, order, pickup_time, payment_method_id):
+    """
+    Charge a validated card order and journal it.
+
+    Returns:
+        Tuple[Response, int]: JSON response and status code
+    """
+    # Pay with card
+    payment_response = pay_with_card(payment_method_id, order.total_price_with_fee())
+    logger.info(f"Payment response for {customer_name}: {payment_response.get('status', 'unknown')}")
+    
+    if payment_response['status'] == 'requires_confirmation':
+        try:
+            # Payment successful - journal the order; the applier inserts it into the database
+            with stage('journal'):
+                receipt = intake_journal.submit_order(
+                    customer_name=customer_name,
+                    phone_number=phone_number,
+                    order_items=order.serialized_items(),
+                    total_amount=order.total_price_with_fee(),
+                    payment_method='card',
+                    payment_status='succeeded',
+                    payment_intent_id=payment_response['id'],
+                    pickup_at=pickup_time,
+                )
+        except OSError as e:
+            # The order is not recorded anywhere, so do not take the payment
+            cancel_payment_intent(payment_response['id'])
+            logger.error(f"Journal error for {customer_name}, payment intent cancelled: {str(e)}")
+            return jsonify({'error': f'Failed to create order: {str(e)}'}), 500
+
+        # Briefly wait for the row so a healthy database still links it to the payment
+        order_id = receipt.wait(current_app.config["INTAKE_APPLY_WAIT"])
+        logger.info(f"Card order journaled - Intake ID: {receipt.intake_id}, Order ID: {order_id}, Customer: {customer_name}, Amount: ${order.total_price_with_fee()}, Payment Intent: {payment_response['id']}")
+
+        metadata = {
+            'intake_id': receipt.intake_id,
+            'customer_name': customer_name,
+            'phone_number': phone_number,
+        }
+        if order_id is not None:
+            metadata['order_id'] = str(order_id)
+        confirm_payment_intent(payment_response['id'], metadata)
+        logger.info(f"Payment intent confirmed for Intake ID: {receipt.intake_id}")
+
+        return jsonify({
+            'success': True,
+            'message': 'Payment confirmed! Estimated time: Sandwich/EggSandwich: ~7-10 mins, Other items: ~3-7 mins (depends on kitchen workload)',
+        }), 200
+            
+    else:
+        logger.warning(f"Payment confirmation failed for {customer_name}: {payment_response.get('status', 'unknown')}")
+        return jsonify({
+            'error': 'Payment confirmation failed',
+            'status': payment_response.get('status', 'unknown')
+        }), 400
+
+
 @routes.route('/verify_sms', methods=['POST'])
 def verify_sms():
     """
     Verify SMS code and confirm cash order placement.
     
-    This endpoint verifies the SMS code sent to the customer and creates the order
-    in the database upon successful verification. The order is marked as 'pending'
-    with payment method 'cash'.
+    This endpoint verifies the SMS code sent to the customer and, upon successful
+    verification, records the order in the intake journal. The order is marked as
+    'pending' with payment method 'cash' and inserted into the database by the
+    journal's applier, so a stalled database does not fail the request.
     
     Form Data:
         customer_name (str): Customer's name (max 100 characters)
         phone_number (str): 10-digit phone number used for SMS verification
         order_items (str): JSON string containing array of order items
         order_price (str): Total order price as string
+        review_token (str, optional): Token from the review endpoint; skips re-pricing when it matches the cart
         sms_code (str): SMS verification code received by customer
     
     Returns:
@@ -98,62 +236,37 @@ def verify_sms():
         
     Status Codes:
         200: Order placed successfully
-        500: SMS verification failed, database error, or server error
+        429: Rate limited per IP or per phone number (see Retry-After)
+        500: SMS verification failed, journal write error, or server error
+        503: Too many provider calls in progress, shed (see Retry-After)
     
     Raises:
         ValueError: If order validation or SMS verification fails
-        Exception: For database errors or other server errors
+        Exception: For journal write errors or other server errors
     """
     logger.info(f"SMS verification attempt from IP: {request.remote_addr}")
     try:
         # Parse form data
-        customer_name = request.form.get('customer_name')
-        phone_number = request.form.get('phone_number')
-        order_items = json.loads(request.form.get('order_items'))
-        order_price = float(request.form.get('order_price'))
-        pickup_at = request.form.get('pickup_at')
-        sms_code = request.form.get('sms_code')
+        with stage('parse'):
+            customer_name = request.form.get('customer_name')
+            phone_number = request.form.get('phone_number')
+            order_items = json_codec.loads(request.form.get('order_items'))
+            order_price = float(request.form.get('order_price'))
+            pickup_at = request.form.get('pickup_at')
+            token = request.form.get('review_token')
+            sms_code = request.form.get('sms_code')
         
-        logger.info(f"SMS verification - Customer: {customer_name}, Phone: {phone_number}, Code: {sms_code}")
+        logger.info(f"SMS verification - Customer: {customer_name}, Phone: {mask_phone(phone_number)}")
         try:
-            order, pickup_time = validate_order(customer_name, phone_number, order_items, order_price, pickup_at, card_payment=False)
+            order, pickup_time = validate_order(customer_name, phone_number, order_items, order_price, pickup_at, card_payment=False, token=token)
         except ValueError as e:
             logger.error(f"Order validation failed for {customer_name}: {str(e)}")
             return jsonify({'error': f'Order validation failed: {str(e)}'}), 400
 
-        if not verify_sms_code(phone_number, sms_code):
-            logger.error(f"Failed to verify SMS code for {phone_number}")
-            return jsonify({'error': 'Failed to verify SMS code'}), 400
-
-        logger.info(f"SMS code verified successfully for {phone_number}")
-        
-        try:
-            # After verified, create order in database
-            order_db = OrderTable(
-                customer_name=customer_name,
-                phone_number=phone_number,
-                order_items=[serialize_food_item(item) for item in order.items],  # Serialize items
-                total_amount=order.total_price(),
-                payment_method='cash',
-                payment_status='pending',
-                sms_verification_code=sms_code,
-                pickup_at=pickup_time,
-            )
-            db.session.add(order_db)
-            db.session.commit()
-            logger.info(f"Cash order created successfully - Order ID: {order_db.id}, Customer: {customer_name}, Amount: ${order.total_price()}")
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Failed to create cash order for {customer_name}: {str(e)}")
-            return jsonify({'error': f'Failed to create order: {str(e)}'}), 500
-
-        return jsonify({
-            'success': True,
-            'message': 'Order placed! Estimated time: Sandwich/EggSandwich: ~7-10 mins, Other items: ~3-7 mins (depends on kitchen workload)',
-        }), 200
+        return _place_cash_order(customer_name, phone_number, order, pickup_time, sms_code)
 
     except Exception as e:
-        logger.error(f"SMS verification failed for {phone_number}: {str(e)}")
+        logger.error(f"SMS verification failed for {mask_phone(phone_number)}: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 
@@ -163,14 +276,16 @@ def confirm_payment():
     Confirm card payment and create order after successful payment processing.
     
     This endpoint processes card payments using Stripe, creates a payment intent,
-    and upon successful payment confirmation, creates the order in the database.
-    The order includes processing fees for card payments.
+    and upon successful payment confirmation, records the order in the intake
+    journal; the journal's applier inserts it into the database. The order
+    includes processing fees for card payments.
     
     Form Data:
         customer_name (str): Customer's name (max 100 characters)
         phone_number (str): 10-digit phone number for order contact
         order_items (str): JSON string containing array of order items
         order_price (str): Total order price as string (including fees)
+        review_token (str, optional): Token from the review endpoint; skips re-pricing when it matches the cart
         payment_method_id (str): Stripe payment method ID for card processing
     
     Returns:
@@ -179,84 +294,278 @@ def confirm_payment():
     Status Codes:
         200: Payment confirmed and order placed successfully
         400: Payment confirmation failed
-        500: Database error or server error
+        429: Rate limited per IP, per phone number or globally (see Retry-After)
+        500: Journal write error or server error
+        503: Too many provider calls in progress, shed (see Retry-After)
     
     Raises:
         ValueError: If order validation fails
-        Exception: For payment processing, database errors, or other server errors
+        Exception: For payment processing, journal write errors, or other server errors
         
     Note:
-        If database error occurs after payment, the payment intent is automatically cancelled
+        If the order cannot be journaled after payment, the payment intent is
+        automatically cancelled. The intent's metadata carries the journal's
+        ``intake_id``, and the ``order_id`` when the row was inserted in time.
     """
     logger.info(f"Card payment confirmation request from IP: {request.remote_addr}")
     try:
         # Parse form data
-        customer_name = request.form.get('customer_name')
-        phone_number = request.form.get('phone_number')
-        order_items = json.loads(request.form.get('order_items'))
-        order_price = float(request.form.get('order_price'))
-        pickup_at = request.form.get('pickup_at')
-
-        payment_method_id = request.form.get('payment_method_id')
+        with stage('parse'):
+            customer_name = request.form.get('customer_name')
+            phone_number = request.form.get('phone_number')
+            order_items = json_codec.loads(request.form.get('order_items'))
+            order_price = float(request.form.get('order_price'))
+            pickup_at = request.form.get('pickup_at')
+            token = request.form.get('review_token')
+            payment_method_id = request.form.get('payment_method_id')
         
-        logger.info(f"Card payment - Customer: {customer_name}, Phone: {phone_number}, Amount: ${order_price}")
+        logger.info(f"Card payment - Customer: {customer_name}, Phone: {mask_phone(phone_number)}, Amount: ${order_price}")
         try:
-            order, pickup_time = validate_order(customer_name, phone_number, order_items, order_price, pickup_at, card_payment=True)
+            order, pickup_time = validate_order(customer_name, phone_number, order_items, order_price, pickup_at, card_payment=True, token=token)
         except ValueError as e:
             logger.error(f"Order validation failed for {customer_name}: {str(e)}")
             return jsonify({'error': f'Order validation failed: {str(e)}'}), 400
 
-        # Pay with card
-        payment_response = pay_with_card(payment_method_id, order.total_price_with_fee())
-        logger.info(f"Payment response for {customer_name}: {payment_response.get('status', 'unknown')}")
-        
-        if payment_response['status'] == 'requires_confirmation':
-            try:
-                # Payment successful - create order
-                order_db = OrderTable(
-                    customer_name=customer_name,
-                    phone_number=phone_number,
-                    order_items=[serialize_food_item(item) for item in order.items],  # Serialize items
-                    total_amount=order.total_price_with_fee(),
-                    payment_method='card',
-                    payment_status='succeeded',
-                    payment_intent_id=payment_response['id'],
-                    pickup_at=pickup_time,
-                )
-                db.session.add(order_db)
-                db.session.commit()  # Commit the transaction
-                
-                logger.info(f"Card order created successfully - Order ID: {order_db.id}, Customer: {customer_name}, Amount: ${order.total_price_with_fee()}, Payment Intent: {payment_response['id']}")
-
-                confirm_payment_intent(payment_response['id'], {
-                    'order_id': str(order_db.id),
-                    'customer_name': customer_name,
-                    'phone_number': phone_number,
-                })
-                logger.info(f"Payment intent confirmed for Order ID: {order_db.id}")
-                
-                return jsonify({
-                    'success': True,
-                    'message': 'Payment confirmed! Estimated time: Sandwich/EggSandwich: ~7-10 mins, Other items: ~3-7 mins (depends on kitchen workload)',
-                }), 200
-                
-            except Exception as e:
-                # Handle database errors, this should never happen
-                db.session.rollback()
-                # Cancel the payment intent
-                cancel_payment_intent(payment_response['id'])
-                logger.error(f"Database error for {customer_name}, payment intent cancelled: {str(e)}")
-                return jsonify({'error': f'Database error: {str(e)}'}), 500
-                
-        else:
-            logger.warning(f"Payment confirmation failed for {customer_name}: {payment_response.get('status', 'unknown')}")
-            return jsonify({
-                'error': 'Payment confirmation failed',
-                'status': payment_response.get('status', 'unknown')
-            }), 400
-            
+        return _place_card_order(customer_name, phone_number, order, pickup_time, payment_method_id)
+
     except Exception as e:
         logger.error(f"Card payment server error for {customer_name}: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 
+@routes.route('/bulk_order', methods=['POST'])
+def bulk_order():
+    """
+    Place a catering-size order streamed as NDJSON or JSON.
+    
+    The body is read item by item (see ``utils/bulk_order.py``) instead of as
+    one form field: each item is validated and added to the running total as
+    it arrives, and the first invalid item ends the request without reading
+    the rest. Cash orders take two requests, like the form endpoints: without
+    ``sms_code`` a verification code is texted, then the same order is posted
+    again with it.
+    
+    Body:
+        NDJSON: the order object on the first line, then one item per line
+        JSON: {"order": {...}, "items": [...]}, with "order" first
+    
+    Order Object:
+        customer_name (str): Customer's name (max 100 characters)
+        phone_number (str): 10-digit phone number
+        pickup_at (str): Pickup time in ISO format
+        order_price (float): Total order price (including fees for card)
+        payment_method (str): "cash" or "card"
+        sms_code (str, optional): SMS verification code, cash only
+        payment_method_id (str): Stripe payment method ID, card only
+    
+    Returns:
+        JSON response as ``send_sms_verification``, ``verify_sms`` or
+        ``confirm_payment``
+        
+    Status Codes:
+        200: Verification code sent, or order placed
+        400: Malformed body, invalid order or item, or failed verification or payment
+        413: Body, line or item count over ``BULK_ORDER_MAX_BYTES`` / ``BULK_ORDER_MAX_ITEMS``
+        415: Body is neither NDJSON nor JSON
+        429: Rate limited per IP, per phone number or globally (see Retry-After)
+        500: Failed to send the code, journal write error, or server error
+        503: Too many provider calls in progress, shed (see Retry-After)
+    """
+    logger.info(f"Bulk order request from IP: {request.remote_addr}")
+    limits = BulkLimits.from_env()
+    if request.content_length is not None and request.content_length > limits.max_bytes:
+        return jsonify({'error': 'Bulk order body too large'}), 413
+    phone_number = None
+    try:
+        with stage('parse'):
+            header, items = read_bulk_order(request.stream, request.mimetype, limits)
+        try:
+            customer_name = str(header.get('customer_name', ''))
+            phone_number = str(header.get('phone_number', ''))
+            payment_method = header.get('payment_method')
+            sms_code = header.get('sms_code')
+            if payment_method not in ('cash', 'card'):
+                raise ValueError('payment_method must be "cash" or "card"')
+            payment_method_id = header.get('payment_method_id')
+            if payment_method == 'card' and (not isinstance(payment_method_id, str) or not payment_method_id):
+                raise ValueError('payment_method_id is required for card orders')
+            # The per-phone buckets of the form endpoints apply, so they cannot be bypassed
+            endpoint = 'confirm_payment' if payment_method == 'card' else 'verify_sms' if sms_code else 'send_sms_verification'
+            limited = rate_limit.check(endpoint, 'phone', phone_number, dict(RATE_LIMITS[endpoint])['phone'])
+            if limited is not None:
+                return limited
+
+            logger.info(f"Bulk order - Customer: {customer_name}, Phone: {mask_phone(phone_number)}, Payment: {payment_method}")
+            order, pickup_time = validate_streamed_order(customer_name, phone_number, items, float(header.get('order_price')),
+                                                         str(header.get('pickup_at', '')), card_payment=payment_method == 'card')
+        except (TypeError, ValueError, AssertionError) as e:
+            logger.error(f"Bulk order validation failed for {mask_phone(phone_number)}: {str(e)}")
+            return jsonify({'error': f'Order validation failed: {str(e)}'}), 400
+        logger.info(f"Bulk order validated - {len(order.items)} items, Amount: ${order.total_price()}")
+
+        if payment_method == 'card':
+            return _place_card_order(customer_name, phone_number, order, pickup_time, payment_method_id)
+        if not sms_code:
+            return _send_verification_code(phone_number)
+        return _place_cash_order(customer_name, phone_number, order, pickup_time, str(sms_code))
+
+    except BulkOrderError as e:
+        logger.warning(f"Bulk order rejected from IP: {request.remote_addr}: {str(e)}")
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        logger.error(f"Bulk order server error for {mask_phone(phone_number)}: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@routes.route('/reorder', methods=['POST'])
+@reads_from_reader
+def reorder():
+    """
+    Return a customer's most recent carts, re-priced against the current menu.
+
+    Lets repeat customers place a previous order again without rebuilding the
+    cart. Orders are looked up by phone number and only returned when the
+    customer name matches the one on the order, so a phone number alone does
+    not reveal order history. Re-priced carts are cached per order.
+
+    Form Data:
+        customer_name (str): Customer's name as given on the past orders
+        phone_number (str): 10-digit phone number of the past orders
+        limit (str, optional): Number of carts to return (1-10, default 3)
+
+    Returns:
+        JSON response with the carts, newest first, each with its items in the
+        ``order_items`` format of the checkout endpoints, current prices and any
+        items no longer available, or error details
+
+    Status Codes:
+        200: Carts returned (possibly an empty list)
+        400: Invalid phone number or limit
+        429: Rate limited per IP (see Retry-After)
+        500: Server error
+    """
+    logger.info(f"Reorder request received from IP: {request.remote_addr}")
+    phone_number = request.form.get('phone_number', '')
+    try:
+        customer_name = request.form.get('customer_name', '')
+        limit = request.form.get('limit', '3')
+        if not phone_number.isdigit() or len(phone_number) != 10:
+            return jsonify({'error': 'Phone number must be 10 digits'}), 400
+        if not (limit.isascii() and limit.isdigit()) or not 1 <= int(limit) <= REORDER_MAX_CARTS:
+            return jsonify({'error': f'Limit must be between 1 and {REORDER_MAX_CARTS}'}), 400
+
+        name = customer_name.strip().casefold()
+        orders = [
+            order for order in OrderTable.recent_for_phone(phone_number, REORDER_MAX_CARTS)
+            if order.customer_name.strip().casefold() == name
+        ][:int(limit)]
+        carts = [reorder_cache.get_or_set((order.store_id, order.id), lambda order=order: reprice_stored_order(order)) for order in orders]
+        logger.info(f"Reorder - Phone: {mask_phone(phone_number)}, Carts: {len(carts)}")
+        return jsonify({'success': True, 'carts': carts}), 200
+
+    except Exception as e:
+        logger.error(f"Reorder failed for {mask_phone(phone_number)}: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@routes.route('/quote', methods=['POST'])
+def quote():
+    """
+    Price a cart on the server, or apply cart changes to an earlier quote.
+
+    Without ``quote_id`` the whole cart in ``order_items`` is priced and a
+    quote handle returned. With it, only the ``deltas`` are validated and
+    priced against the quote's lines. Submitting the quoted ``order_price``
+    (or ``order_price_with_fee`` for cards) at checkout always matches.
+
+    Form Data:
+        order_items (str): JSON array of cart items, to create a quote
+        quote_id (str): Handle of an earlier quote, to update it
+        deltas (str): JSON array of ``add``, ``update`` and ``remove`` deltas
+
+    Returns:
+        JSON response with the quote handle, totals, the prices of the added
+        or updated lines and the removed line ids, or error details
+
+    Status Codes:
+        200: Cart priced
+        400: Invalid cart item or delta
+        404: Quote expired or unknown; create it again from the full cart
+        429: Rate limited per IP (see Retry-After)
+        500: Server error
+    """
+    quote_id = request.form.get('quote_id')
+    try:
+        try:
+            with stage('pricing'):
+                if quote_id:
+                    deltas = json_codec.loads(request.form.get('deltas') or '[]')
+                    if not isinstance(deltas, list):
+                        raise ValueError('deltas must be a JSON array')
+                    result = update_quote(stores.current_store_id(), quote_id, deltas)
+                else:
+                    order_items = json_codec.loads(request.form.get('order_items') or '[]')
+                    if not isinstance(order_items, list):
+                        raise ValueError('order_items must be a JSON array')
+                    result = create_quote(stores.current_store_id(), order_items)
+        except KeyError:
+            return jsonify({'error': 'Quote expired, send the full cart again'}), 404
+        except ValueError as e:
+            logger.info(f"Quote rejected: {str(e)}")
+            return jsonify({'error': f'Invalid cart: {str(e)}'}), 400
+        return jsonify({'success': True, **result}), 200
+
+    except Exception as e:
+        logger.error(f"Quote failed: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+
+@routes.route('/review', methods=['POST'])
+def review():
+    """
+    Price a cart for checkout and sign the result as a review token.
+
+    The token is signed by the server and holds no server-side state. Passing
+    it as ``review_token`` to a checkout endpoint with the same cart and
+    payment method skips validating and pricing the cart again. Tokens expire
+    after ``REVIEW_TOKEN_TTL`` seconds and when the menu changes; checkout
+    then re-prices in full.
+
+    Form Data:
+        order_items (str): JSON array of cart items, as they will be sent to checkout
+        payment_method (str): ``cash`` or ``card``
+
+    Returns:
+        JSON response with the token, its expiry and the order price without
+        and with the card fee, or error details
+
+    Status Codes:
+        200: Cart reviewed
+        400: Invalid cart item or payment method
+        429: Rate limited per IP (see Retry-After)
+        500: Server error
+    """
+    try:
+        try:
+            payment_method = request.form.get('payment_method')
+            if payment_method not in ('cash', 'card'):
+                raise ValueError('payment_method must be "cash" or "card"')
+            order_items = json_codec.loads(request.form.get('order_items') or '[]')
+            if not isinstance(order_items, list):
+                raise ValueError('order_items must be a JSON array')
+            with stage('validate'):
+                order = validate_order_items(order_items)
+        except ValueError as e:
+            logger.info(f"Review rejected: {str(e)}")
+            return jsonify({'error': f'Invalid cart: {str(e)}'}), 400
+
+        return jsonify({
+            'success': True,
+            **issue_token(order_items, order, card_payment=payment_method == 'card'),
+            'order_price': order.total_price(),
+            'order_price_with_fee': order.total_price_with_fee(),
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Review failed: {str(e)}")
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
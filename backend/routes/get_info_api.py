@@ -1,4 +1,3 @@
-import json
 import logging
 from flask import request, Response, Blueprint
 import os
@@ -18,20 +17,19 @@ from models.Side import SIDE_PRICE_MAP, SideName, Chips, SideSize
 from models.Combo import COMBO_BASE_PRICE, DRINK_UPGRADE_COST
 from models.OrderTable import OrderTable
 from models.StoreCloseDateTable import StoreClosedDateTable
+from sqlalchemy import func
+
+from db import use_reader
+from utils import json_codec, kitchen, menu_search, popularity, stores
 
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
-file_handler = logging.FileHandler(os.path.join(log_dir, 'get_info_api.log'))
-file_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-logging.getLogger().addHandler(file_handler)
+logger = logging.getLogger(__name__)
 
 routes = Blueprint('get_info_api', __name__, url_prefix='/api/get_info')
+stores.use_store(routes)
+# Menu and dashboard reads never touch the writer connection
+use_reader(routes)
 
 
 
@@ -40,7 +38,8 @@ def get_category():
     """
     Get all available food categories.
     
-    Returns a list of all food categories available in the menu system.
+    Returns a list of all food categories available in the menu system,
+    leaving out the categories the requested store does not sell.
     
     Returns:
         JSON response containing array of category names
@@ -51,8 +50,9 @@ def get_category():
     Example Response:
         ["Hotdog", "Sandwich", "EggSandwich", "Salad", "Drink", "Side", "Combo"]
     """
-    answer = [category.value for category in Category]
-    return Response(json.dumps(answer), mimetype='application/json')
+    disabled = stores.disabled_categories()
+    answer = [category.value for category in Category if category.value not in disabled]
+    return Response(json_codec.dumps(answer), mimetype='application/json')
 
 @routes.route('/get_menu', methods=['GET'])
 def get_menu():
@@ -61,7 +61,8 @@ def get_menu():
     
     Returns a comprehensive menu structure containing all food categories,
     items, and their corresponding prices. Prices are formatted as strings
-    with two decimal places.
+    with two decimal places. Categories the requested store does not sell
+    are left out.
     
     Returns:
         JSON response containing complete menu structure with categories,
@@ -121,8 +122,94 @@ def get_menu():
             "Upgrade to Large Drink": f"{COMBO_BASE_PRICE + DRINK_UPGRADE_COST:.2f}",
         }}
     ]
+    for category in stores.disabled_categories():
+        menu.pop(category, None)
+
+    return Response(json_codec.dumps(menu), mimetype='application/json')
+
+@routes.route('/search', methods=['GET'])
+def search():
+    """
+    Search menu items and options by name, for the kiosk search bar.
+
+    Matches every word of the query against the words of item and option
+    names, as a prefix or with one typo, without case or accents. Items of
+    categories the requested store does not sell are left out.
+
+    Query Parameters:
+        q (str): Search text, e.g. "pastr" or "jalap" (at most 64 characters)
+        limit (str, optional): Maximum number of results (1-25, default 10)
+
+    Returns:
+        JSON response with the best matches first
+
+    Status Codes:
+        200: Successfully returned matches (possibly none)
+        400: Query too long or invalid limit
+
+    Response Structure:
+        {
+            "query": "pastr",
+            "results": [{"name": "Hot Pastrami", "category": "Sandwich", "option": "Meat",
+                         "price": {"Regular": "7.00", "Large": "8.50"}}, ...]
+        }
+    """
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', str(menu_search.DEFAULT_LIMIT))
+    if len(query) > menu_search.MAX_QUERY_LENGTH:
+        return Response(json_codec.dumps({'error': f'Query must be at most {menu_search.MAX_QUERY_LENGTH} characters'}), status=400, mimetype='application/json')
+    if not (limit.isascii() and limit.isdigit()) or not 1 <= int(limit) <= menu_search.MAX_LIMIT:
+        return Response(json_codec.dumps({'error': f'Limit must be between 1 and {menu_search.MAX_LIMIT}'}), status=400, mimetype='application/json')
+
+    results = menu_search.search(query, int(limit), stores.disabled_categories())
+    return Response(json_codec.dumps({'query': query, 'results': results}), mimetype='application/json')
+
+@routes.route('/popular', methods=['GET'])
+def popular():
+    """
+    Get the most ordered categories, items and options, today or in the last hour.
+
+    Used to order the menu by what is selling and to hint the most popular
+    choices on the customize pages. Answered from in-memory counts that are
+    kept up to date as orders come in (see ``utils.popularity``), without
+    reading today's orders again.
 
-    return Response(json.dumps(menu), mimetype='application/json')
+    Query Parameters:
+        window (str, optional): ``today`` (Eastern Time, default) or ``hour``
+        k (str, optional): Names returned per list (1-20, default 5)
+        category (str, optional): Only return this category's items and options
+
+    Returns:
+        JSON response with the top categories and, per category, the top
+        names of each option group with their order counts
+
+    Status Codes:
+        200: Successfully returned popular items (possibly empty lists)
+        400: Invalid window, k or category
+
+    Response Structure:
+        {
+            "window": "today",
+            "categories": [{"name": "Sandwich", "count": 42}, ...],
+            "options": {"Sandwich": {"Meat": [{"name": "Hot Pastrami", "count": 12}, ...],
+                                     "Add Ons": [...]}, ...}
+        }
+    """
+    window = request.args.get('window', 'today')
+    k = request.args.get('k', '5')
+    category = request.args.get('category')
+    if window not in popularity.WINDOWS:
+        return Response(json_codec.dumps({'error': f'Window must be one of {", ".join(popularity.WINDOWS)}'}), status=400, mimetype='application/json')
+    if not (k.isascii() and k.isdigit()) or not 1 <= int(k) <= popularity.MAX_K:
+        return Response(json_codec.dumps({'error': f'k must be between 1 and {popularity.MAX_K}'}), status=400, mimetype='application/json')
+    categories = [c.value for c in Category if c.value not in stores.disabled_categories()]
+    if category is not None:
+        if category not in categories:
+            return Response(json_codec.dumps({'error': f'Unknown category: {category}'}), status=400, mimetype='application/json')
+        categories = [category]
+
+    top = popularity.sync().top(window, int(k), categories)
+    return Response(json_codec.dumps({'window': window, **top}), mimetype='application/json')
 
 @routes.route('/get_hotdog', methods=['GET'])
 def get_hotdog():
@@ -148,7 +235,7 @@ def get_hotdog():
     for topping in HotDogTopping:
         answer["Toppings"].append(topping.value)
 
-    return Response(json.dumps(answer), mimetype='application/json')
+    return Response(json_codec.dumps(answer), mimetype='application/json')
 
 @routes.route('/get_sandwich', methods=['GET'])
 def get_sandwich():
@@ -205,7 +292,7 @@ def get_sandwich():
                 SandwichSize.LARGE.value: f"{add_ons_price[SandwichSize.LARGE]:.2f}"
             }
         })
-    return Response(json.dumps(answer), mimetype='application/json')
+    return Response(json_codec.dumps(answer), mimetype='application/json')
 
 @routes.route('/get_eggsandwich', methods=['GET'])
 def get_egg_sandwich():
@@ -264,7 +351,7 @@ def get_egg_sandwich():
             "Add Ons Price": f"{add_ons_price:.2f}"
         })
 
-    return Response(json.dumps(answer), mimetype='application/json')
+    return Response(json_codec.dumps(answer), mimetype='application/json')
 
 @routes.route('/get_salad', methods=['GET'])
 def get_salad():
@@ -305,7 +392,7 @@ def get_salad():
             "Add Ons Price": f"{add_ons_price:.2f}"
         })
     
-    return Response(json.dumps(answer), mimetype='application/json')
+    return Response(json_codec.dumps(answer), mimetype='application/json')
 
 
     
@@ -339,7 +426,7 @@ def get_drink():
             continue
         answer["Size"].append(size.value)
     
-    return Response(json.dumps(answer), mimetype='application/json')
+    return Response(json_codec.dumps(answer), mimetype='application/json')
 
 
 @routes.route('/get_side', methods=['GET'])
@@ -369,7 +456,7 @@ def get_side():
     answer["Chips"] = []
     for chip in Chips:
         answer["Chips"].append(chip.value)
-    return Response(json.dumps(answer), mimetype='application/json')
+    return Response(json_codec.dumps(answer), mimetype='application/json')
 
 @routes.route('/get_combo', methods=['GET'])
 def get_combo():
@@ -412,10 +499,19 @@ def get_combo():
     for drink_name in BottleDrink:
         answer["Bottled Soda"].append(drink_name.value)
     
-    return Response(json.dumps(answer), mimetype='application/json')
+    return Response(json_codec.dumps(answer), mimetype='application/json')
 
 
 
+def _today_utc_range():
+    """Return the UTC start and end of today in Eastern Time."""
+    eastern = ZoneInfo("America/New_York")
+    now_et = datetime.now(eastern)
+    start_of_day_et = datetime.combine(now_et.date(), time.min, tzinfo=eastern)
+    end_of_day_et = datetime.combine(now_et.date(), time.max, tzinfo=eastern)
+    return start_of_day_et.astimezone(ZoneInfo("UTC")), end_of_day_et.astimezone(ZoneInfo("UTC"))
+
+
 @routes.route('/get_today_orders', methods=['POST']) 
 def get_today_orders():
     """
@@ -449,23 +545,13 @@ def get_today_orders():
     # Validate store_auth_sid
     store_auth_sid = request.form.get('store_auth_sid')
     if not store_auth_sid:
-        logging.warning(f"Today's orders request missing store_auth_sid from IP: {request.remote_addr}")
-        return Response(json.dumps({'error': 'Missing store_auth_sid'}), status=400, mimetype='application/json')
+        logger.warning(f"Today's orders request missing store_auth_sid from IP: {request.remote_addr}")
+        return Response(json_codec.dumps({'error': 'Missing store_auth_sid'}), status=400, mimetype='application/json')
     if store_auth_sid != os.getenv('STORE_AUTH_SID'):
-        logging.warning(f"Invalid store authentication attempt from IP: {request.remote_addr}, SID: {store_auth_sid}")
-        return Response(json.dumps({'error': 'Unauthorized'}), status=401, mimetype='application/json')
+        logger.warning(f"Invalid store authentication attempt from IP: {request.remote_addr}, SID: {store_auth_sid}")
+        return Response(json_codec.dumps({'error': 'Unauthorized'}), status=401, mimetype='application/json')
 
-    # Define Eastern time zone
-    eastern = ZoneInfo("America/New_York")
-
-    # Get now in Eastern time
-    now_et = datetime.now(eastern)
-    start_of_day_et = datetime.combine(now_et.date(), time.min, tzinfo=eastern)
-    end_of_day_et = datetime.combine(now_et.date(), time.max, tzinfo=eastern)
-
-    # Convert to UTC
-    start_utc = start_of_day_et.astimezone(ZoneInfo("UTC"))
-    end_utc = end_of_day_et.astimezone(ZoneInfo("UTC"))
+    start_utc, end_utc = _today_utc_range()
 
     # Query orders in that UTC time range
     orders = OrderTable.query.filter(
@@ -473,8 +559,56 @@ def get_today_orders():
         OrderTable.created_at <= end_utc
     ).all()
 
-    order_list = [order.to_dict() for order in orders]
-    return Response(json.dumps(order_list), mimetype='application/json')
+    # Each row carries its pre-rendered JSON, so the body is assembled without
+    # parsing and re-serializing every order's items
+    body = "[" + ",".join(order.to_json() for order in orders) + "]"
+    return Response(body, mimetype='application/json')
+
+
+@routes.route('/kitchen_batches', methods=['POST'])
+def kitchen_batches():
+    """
+    Get the kitchen prep list: identical items of open orders batched together.
+
+    Open orders are those placed and not yet completed (see
+    ``/api/close_store/complete_order``). Their items are grouped by pickup
+    window and, within a window, by configuration, so the line can make every
+    Regular Turkey on Wheat with the same toppings at once. Answered from a
+    board kept up to date as orders come in and are completed (see
+    ``utils.kitchen``), without regrouping today's orders.
+
+    Form Data:
+        store_auth_sid (str): Store authentication token for access control
+
+    Returns:
+        JSON response with the pickup windows of open orders, earliest first
+
+    Status Codes:
+        200: Successfully returned the prep list (possibly empty)
+        400: Missing store authentication token
+        401: Invalid store authentication token
+
+    Response Structure:
+        {
+            "windows": [{"window_start": "2030-06-01T16:00:00+00:00",
+                         "window_end": "2030-06-01T16:15:00+00:00",
+                         "batches": [{"item": {"type": "Sandwich", "size": "Regular", ...},
+                                      "quantity": 8, "orders": [12, 15, ...]}, ...]}, ...]
+        }
+
+    Security:
+        Requires valid store authentication token matching STORE_AUTH_SID environment variable
+    """
+    store_auth_sid = request.form.get('store_auth_sid')
+    if not store_auth_sid:
+        logger.warning(f"Kitchen batches request missing store_auth_sid from IP: {request.remote_addr}")
+        return Response(json_codec.dumps({'error': 'Missing store_auth_sid'}), status=400, mimetype='application/json')
+    if store_auth_sid != os.getenv('STORE_AUTH_SID'):
+        logger.warning(f"Invalid store authentication attempt from IP: {request.remote_addr}, SID: {store_auth_sid}")
+        return Response(json_codec.dumps({'error': 'Unauthorized'}), status=401, mimetype='application/json')
+
+    windows = kitchen.sync().prep_list()
+    return Response(json_codec.dumps({'windows': windows}), mimetype='application/json')
 
 
 @routes.route('/get_store_close_date', methods=['GET']) 
@@ -502,13 +636,74 @@ def get_store_close_date():
     # Query the database for a closed date today and later
     closed_dates = StoreClosedDateTable.query.filter(StoreClosedDateTable.date >= today_utc.date()).all()
 
-    print(closed_dates)
     if closed_dates:
         # If a closed date is found, return it
-        return Response(json.dumps({'close_dates': [cd.date.strftime('%Y-%m-%d') for cd in closed_dates]}), status=200, mimetype='application/json')
+        return Response(json_codec.dumps({'close_dates': [cd.date.strftime('%Y-%m-%d') for cd in closed_dates]}), status=200, mimetype='application/json')
     else:
         # If no closed date is found, return None
-        return Response(json.dumps({'close_dates': []}), status=200, mimetype='application/json')
+        return Response(json_codec.dumps({'close_dates': []}), status=200, mimetype='application/json')
 
     
-        
\ No newline at end of file
+        
+
+
+def _store_sales_today(start_utc, end_utc):
+    rows = (
+        OrderTable.query
+        .with_entities(OrderTable.payment_method, func.count(OrderTable.id), func.sum(OrderTable.total_amount))
+        .filter(OrderTable.created_at >= start_utc, OrderTable.created_at <= end_utc)
+        .group_by(OrderTable.payment_method)
+        .all()
+    )
+    by_payment_method = {method: {'orders': count, 'revenue': round(revenue or 0, 2)} for method, count, revenue in rows}
+    return {
+        'orders': sum(entry['orders'] for entry in by_payment_method.values()),
+        'revenue': round(sum(entry['revenue'] for entry in by_payment_method.values()), 2),
+        'by_payment_method': by_payment_method,
+    }
+
+
+@routes.route('/get_stores_report', methods=['POST'])
+def get_stores_report():
+    """
+    Get today's order count and revenue of every store.
+
+    Each store's database is queried in parallel, so the report takes about as
+    long as the slowest store rather than the sum of all of them.
+
+    Form Data:
+        store_auth_sid (str): Store authentication token for access control
+
+    Returns:
+        JSON response with the sales of each store and the totals
+
+    Status Codes:
+        200: Successfully returned the report
+        400: Missing store authentication token
+        401: Invalid store authentication token
+
+    Response Structure:
+        {
+            "stores": {
+                "main": {"orders": 12, "revenue": 154.5,
+                         "by_payment_method": {"card": {"orders": 9, "revenue": 120.0}, ...}},
+                "downtown": {...}
+            },
+            "total": {"orders": 20, "revenue": 260.75}
+        }
+    """
+    store_auth_sid = request.form.get('store_auth_sid')
+    if not store_auth_sid:
+        logger.warning(f"Stores report request missing store_auth_sid from IP: {request.remote_addr}")
+        return Response(json_codec.dumps({'error': 'Missing store_auth_sid'}), status=400, mimetype='application/json')
+    if store_auth_sid != os.getenv('STORE_AUTH_SID'):
+        logger.warning(f"Invalid store authentication attempt from IP: {request.remote_addr}")
+        return Response(json_codec.dumps({'error': 'Unauthorized'}), status=401, mimetype='application/json')
+
+    start_utc, end_utc = _today_utc_range()
+    report = stores.fan_out(lambda: _store_sales_today(start_utc, end_utc))
+    total = {
+        'orders': sum(sales['orders'] for sales in report.values()),
+        'revenue': round(sum(sales['revenue'] for sales in report.values()), 2),
+    }
+    return Response(json_codec.dumps({'stores': report, 'total': total}), mimetype='application/json')
@@ -0,0 +1,26 @@
+import os
+from flask import Blueprint, Response, request
+from utils.metrics import REGISTRY
+
+routes = Blueprint('metrics_api', __name__)
+
+
+@routes.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Expose the process's metrics in Prometheus text format.
+
+    When the METRICS_TOKEN environment variable is set, scrapes must send it
+    as a bearer token; otherwise the endpoint is open.
+
+    Returns:
+        Prometheus text exposition of every registered metric
+
+    Status Codes:
+        200: Metrics returned
+        401: METRICS_TOKEN is set and the request did not present it
+    """
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,80 @@
+import logging
+import os
+import threading
+from flask import Blueprint, Response, request
+from utils import json_codec, profiler
+
+logger = logging.getLogger(__name__)
+
+routes = Blueprint('profiler_api', __name__, url_prefix='/api/profiler')
+
+DEFAULT_SECONDS = 10
+MAX_SECONDS = 60
+DEFAULT_RATE_HZ = 100
+
+# One profile at a time per worker keeps the overhead bounded
+_profile_lock = threading.Lock()
+
+
+@routes.route('/profile', methods=['POST'])
+def profile():
+    """
+    Sample the stacks of every thread of this worker process.
+
+    The request blocks while sampling and returns the stacks in collapsed-stack
+    format, ready for flame graph tools such as flamegraph.pl or speedscope.
+    Only the worker that serves the request is profiled.
+
+    Form Data:
+        store_auth_sid (str): Store authentication token for access control
+        seconds (float): Sampling duration, 0 < seconds <= 60 (default 10)
+        rate_hz (float): Samples per second, 1 to 250 (default 100)
+
+    Returns:
+        text/plain collapsed stacks, one "frame;frame;... count" line per stack.
+        X-Profile-Samples, X-Profile-Duration and X-Profile-Sampling-Time
+        headers give the samples taken, the run time and the sampler's own cost.
+
+    Status Codes:
+        200: Profile taken
+        400: Missing store authentication token or invalid parameters
+        401: Invalid store authentication token
+        409: A profile is already running in this worker
+
+    Security:
+        Requires valid store authentication token matching STORE_AUTH_SID environment variable
+
+    Example:
+        curl -s -d store_auth_sid=$STORE_AUTH_SID -d seconds=30 \\
+            http://localhost:5000/api/profiler/profile > lunch.folded
+        flamegraph.pl lunch.folded > lunch.svg
+    """
+    store_auth_sid = request.form.get('store_auth_sid')
+    if not store_auth_sid:
+        logger.warning(f"Profile request missing store_auth_sid from IP: {request.remote_addr}")
+        return Response(json_codec.dumps({'error': 'Missing store_auth_sid'}), status=400, mimetype='application/json')
+    if store_auth_sid != os.getenv('STORE_AUTH_SID'):
+        logger.warning(f"Invalid store authentication attempt from IP: {request.remote_addr}")
+        return Response(json_codec.dumps({'error': 'Unauthorized'}), status=401, mimetype='application/json')
+
+    try:
+        seconds = float(request.form.get('seconds', DEFAULT_SECONDS))
+        rate_hz = float(request.form.get('rate_hz', DEFAULT_RATE_HZ))
+    except ValueError:
+        return Response(json_codec.dumps({'error': 'seconds and rate_hz must be numbers'}), status=400, mimetype='application/json')
+    if not 0 < seconds <= MAX_SECONDS or not 1 <= rate_hz <= profiler.MAX_RATE_HZ:
+        return Response(json_codec.dumps({'error': f'seconds must be in (0, {MAX_SECONDS}] and rate_hz in [1, {profiler.MAX_RATE_HZ}]'}), status=400, mimetype='application/json')
+
+    if not _profile_lock.acquire(blocking=False):
+        return Response(json_codec.dumps({'error': 'A profile is already running'}), status=409, mimetype='application/json')
+    try:
+        logger.info(f"Profiling pid {os.getpid()} for {seconds}s at {rate_hz} Hz")
+        result = profiler.sample(seconds, rate_hz)
+    finally:
+        _profile_lock.release()
+
+    response = Response(result.collapsed(), mimetype='text/plain')
+    response.headers['X-Profile-Samples'] = str(result.samples)
+    response.headers['X-Profile-Duration'] = f"{result.duration:.3f}"
+    response.headers['X-Profile-Sampling-Time'] = f"{result.sampling_time:.3f}"
+    return response
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Benchmark for the checkout pricing and validation hot path.
+
+Times each stage a checkout request goes through, on deterministic carts
+from ``cart_generator`` of 1, 10, 50 and 200 items:
+
+- ``schemas``: building the Pydantic schemas of ``models/Schema.py``
+- ``validate_order_items``: schemas, item models and pricing
+- ``validate_order``: the full ``validate_order`` call, pickup time included
+- ``serialize``: ``serialize_food_item`` over a validated order
+
+Results are reported as carts/sec and microseconds per item. ``--save``
+writes them to a baseline JSON file; ``--baseline`` compares against one
+and exits with status 1 when a stage got slower per item than the allowed
+``--threshold``. Baselines are machine specific, so compare only against
+one recorded on the same machine.
+
+Usage (from the backend directory):
+    python tests/benchmarks/bench_checkout.py --save baseline.json
+    python tests/benchmarks/bench_checkout.py --baseline baseline.json [--threshold 0.15]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from app import create_app  # noqa: E402
+from cli import migrate_schema  # noqa: E402
+from models.Schema import ComboSchema, SideSchema, DrinkSchema, HotdogSchema, SaladSchema, SandwichSchema, EggSandwichSchema  # noqa: E402
+from utils.checkout_api_helper import validate_order, validate_order_items, serialize_food_item  # noqa: E402
+from cart_generator import generate_carts  # noqa: E402
+
+CART_SIZES = (1, 10, 50, 200)
+# Items timed per run for each cart size, so every size runs for a similar time
+ITEMS_PER_RUN = 400
+SCHEMAS = {
+    'Sandwich': SandwichSchema, 'EggSandwich': EggSandwichSchema, 'Salad': SaladSchema, 'Hotdog': HotdogSchema,
+    'Side': SideSchema, 'Drink': DrinkSchema, 'Combo': ComboSchema,
+}
+
+
+def next_open_pickup_time() -> str:
+    """Return noon Eastern on the next Wednesday, as the client sends it."""
+    today = datetime.now(ZoneInfo('US/Eastern')).date()
+    wednesday = today + timedelta(days=(2 - today.weekday()) % 7 or 7)
+    noon = datetime(wednesday.year, wednesday.month, wednesday.day, 12, 0, tzinfo=ZoneInfo('US/Eastern'))
+    return noon.astimezone(ZoneInfo('UTC')).isoformat().replace('+00:00', 'Z')
+
+
+def build_stages(carts):
+    """Return the stage callables for a list of carts."""
+    pickup_at = next_open_pickup_time()
+    orders = [validate_order_items(cart) for cart in carts]
+    prices = [validated.total_price() for validated in orders]
+
+    def schemas():
+        for cart in carts:
+            for item in cart:
+                SCHEMAS[item['type']](**{k: v for k, v in item.items() if k != 'type'})
+
+    def order_items():
+        for cart in carts:
+            validate_order_items(cart)
+
+    def order():
+        for cart, price in zip(carts, prices):
+            validate_order('Benchmark Customer', '5551234567', cart, price, pickup_at, card_payment=False)
+
+    def serialize():
+        for validated in orders:
+            [serialize_food_item(item) for item in validated.items]
+
+    return {'schemas': schemas, 'validate_order_items': order_items, 'validate_order': order, 'serialize': serialize}
+
+
+def run(seed: int, repeat: int):
+    """Time every stage for every cart size."""
+    results = {}
+    for size in CART_SIZES:
+        carts = generate_carts(seed, size, max(1, ITEMS_PER_RUN // size))
+        for stage, func in build_stages(carts).items():
+            timer = timeit.Timer(func)
+            # Each timing run lasts at least 0.2s so short stages are not dominated by noise
+            number, _ = timer.autorange()
+            seconds = min(timer.repeat(number=number, repeat=repeat)) / number
+            results[f"{stage}/{size}"] = {
+                'carts_per_sec': round(len(carts) / seconds, 1),
+                'us_per_item': round(seconds / (len(carts) * size) * 1e6, 2),
+            }
+    return results
+
+
+def compare(results, baseline, threshold: float):
+    """Print the change against a baseline and return the regressed keys."""
+    regressions = []
+    for key, result in results.items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        change = result['us_per_item'] / before['us_per_item'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f"  {key:<28} {before['us_per_item']:10.2f} -> {result['us_per_item']:10.2f} us/item {change:+8.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=1, help="cart generator seed")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per stage, the fastest is kept")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--baseline", metavar="PATH", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown per item, e.g. 0.15 = 15%%")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="steves_bench_") as workdir:
+        # A throwaway database, so the benchmark never migrates or reads the real one
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}"
+        app = create_app()
+        with app.app_context():
+            # validate_order looks up store closures
+            migrate_schema()
+            results = run(args.seed, args.repeat)
+
+    print(f"{'stage/cart size':<28} {'carts/sec':>12} {'us/item':>10}")
+    for key, result in results.items():
+        print(f"{key:<28} {result['carts_per_sec']:12.1f} {result['us_per_item']:10.2f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'seed': args.seed,
+                'python': platform.python_version(),
+                'machine': platform.platform(),
+                'results': results,
+            }, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('seed') != args.seed:
+            print(f"Baseline was recorded with seed {baseline.get('seed')}, not {args.seed}")
+            return 2
+        print(f"Compared with {args.baseline} (threshold {args.threshold:.0%}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the JSON codec backends.
+
+Compares orjson against the standard library fallback of ``utils.json_codec``
+on the payloads the API actually handles: the full menu, a day of stored
+order items, and the ``get_today_orders`` response built from them.
+
+Usage (from the backend directory):
+    python tests/benchmarks/bench_json_codec.py [--number 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+
+from utils import json_codec  # noqa: E402
+from utils.checkout_api_helper import validate_order_items, serialize_food_item  # noqa: E402
+from routes.get_info_api import get_menu  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SAMPLE_CART = [
+    {'type': 'Sandwich', 'quantity': 1, 'size': 'Regular', 'meat': 'Half Hot Pastrami Half Corned Beef',
+     'bread': 'Rye', 'cheese': 'Swiss', 'toppings': ['Tomato', 'Lettuce', 'Spicy Mustard'], 'add_ons': ['Cheese', 'Bacon']},
+    {'type': 'Hotdog', 'quantity': 2, 'dog_type': 'Beef (100%)', 'toppings': ['Mustard', 'Chili', 'Onions']},
+    {'type': 'EggSandwich', 'quantity': 1, 'bread': 'Croissant +$0.75', 'egg': 'Fried Egg', 'meat': 'Bacon',
+     'cheese': 'American', 'toppings': ['Salt', 'Pepper'], 'add_ons': ['Hashbrown on it (1 Piece)']},
+    {'type': 'Salad', 'quantity': 1, 'choice': 'Chef Salad - Ham & Turkey', 'toppings': ['Lettuce', 'Tomato', 'Eggs'],
+     'dressing': 'Ranch', 'add_ons': ['Eggs']},
+    {'type': 'Side', 'quantity': 1, 'name': 'Chips', 'chips_type': 'Lays BBQ'},
+    {'type': 'Drink', 'quantity': 1, 'name': 'Coke', 'size': 'Large'},
+    {'type': 'Combo', 'quantity': 1, 'side': {'name': 'French Fries'}, 'drink': {'name': 'Sprite', 'size': 'Regular'},
+     'special_instructions': 'More ice'},
+]
+
+STDLIB_ENCODER = json.JSONEncoder(default=json_codec._default, separators=(",", ":"), ensure_ascii=False)
+
+
+def build_payloads(orders_per_day: int):
+    """Build the menu, stored-items and today's-orders payloads."""
+    menu = json.loads(get_menu().get_data())
+    order = validate_order_items(SAMPLE_CART)
+    items = [serialize_food_item(item) for item in order.items]
+    stored_items = STDLIB_ENCODER.encode(items)
+    today = [{
+        'id': order_id,
+        'customer_name': 'Benchmark Customer',
+        'phone_number': '5551234567',
+        'order_items': json.loads(stored_items),
+        'total_amount': order.total_price(),
+        'payment_method': 'card',
+        'payment_status': 'succeeded',
+        'payment_intent_id': 'pi_benchmark',
+        'created_at': '2025-08-25T15:00:00+00:00',
+        'pickup_at': '2025-08-25T15:30:00+00:00',
+    } for order_id in range(orders_per_day)]
+    return {
+        'menu': menu,
+        'order items (models)': items,
+        "today's orders": today,
+    }, stored_items
+
+
+def bench(label: str, func, number: int) -> float:
+    """Time ``func`` and print the per-call cost in microseconds."""
+    per_call = min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+    print(f"  {label:<34} {per_call:10.2f} us")
+    return per_call
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="calls per timing run")
+    parser.add_argument("--orders", type=int, default=100, help="orders in the today's orders payload")
+    args = parser.parse_args()
+
+    payloads, stored_items = build_payloads(args.orders)
+    print(f"Active backend: {json_codec.BACKEND}")
+    for name, payload in payloads.items():
+        print(f"encode {name}:")
+        stdlib = bench("stdlib json", lambda: STDLIB_ENCODER.encode(payload), args.number)
+        if orjson is not None:
+            fast = bench("orjson", lambda: orjson.dumps(payload, default=json_codec._default).decode(), args.number)
+            print(f"  {'speedup':<34} {stdlib / fast:10.2f} x")
+    print("decode stored order items:")
+    stdlib = bench("stdlib json", lambda: json.loads(stored_items), args.number)
+    if orjson is not None:
+        fast = bench("orjson", lambda: orjson.loads(stored_items), args.number)
+        print(f"  {'speedup':<34} {stdlib / fast:10.2f} x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
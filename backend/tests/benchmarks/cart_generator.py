@@ -0,0 +1,161 @@
+"""Deterministic synthetic carts for benchmarks.
+
+Carts are lists of item dictionaries in the format of the checkout
+``order_items`` form field. Every ``Category`` appears in every cart of at
+least seven items, and options are drawn at random from the menu enums, so
+the carts exercise the same validation and pricing paths as real orders.
+The same seed always produces the same carts.
+
+Items are drawn by rejection sampling: a random configuration that the
+models refuse (e.g. a cheese add-on without cheese) is discarded and drawn
+again, so the generator never needs to mirror the validation rules.
+"""
+
+import random
+from typing import Any, Callable, Dict, List
+
+from models.Category import Category
+from models.Sandwich import SandwichSize, SandwichBread, SandwichMeat, SandwichCheese, SandwichToppings, SandwichAddOns
+from models.EggSandwich import Egg, EggSandwichBread, EggSandwichMeat, EggSandwichCheese, EggSandwichToppings, EggSandwichAddOns
+from models.Salad import SaladChoice, SaladTopping, SaladDressing, SaladAddOns
+from models.Hotdog import HotDogMeat, HotDogTopping
+from models.Side import SideSize, Chips, SideName
+from models.Drink import DrinkSize, FountainDrink, BottleDrink
+from utils.checkout_api_helper import validate_and_create_food_item
+
+SPECIAL_INSTRUCTIONS = ["Extra napkins", "Cut in half", "Light ice", "No salt please"]
+
+
+def _pick(rng: random.Random, enum_cls) -> str:
+    return rng.choice(list(enum_cls)).value
+
+
+def _maybe(rng: random.Random, enum_cls):
+    return _pick(rng, enum_cls) if rng.random() < 0.7 else None
+
+
+def _subset(rng: random.Random, enum_cls, max_size: int = 5) -> List[str]:
+    members = list(enum_cls)
+    return [member.value for member in rng.sample(members, rng.randint(0, min(max_size, len(members))))]
+
+
+def _common(rng: random.Random) -> Dict[str, Any]:
+    return {
+        'quantity': rng.randint(1, 3),
+        'special_instructions': rng.choice(SPECIAL_INSTRUCTIONS) if rng.random() < 0.2 else None,
+    }
+
+
+def _sandwich(rng: random.Random) -> Dict[str, Any]:
+    return {
+        'size': _pick(rng, SandwichSize), 'bread': _pick(rng, SandwichBread), 'meat': _pick(rng, SandwichMeat),
+        'toast': rng.random() < 0.3, 'grilled': rng.random() < 0.2, 'cheese': _maybe(rng, SandwichCheese),
+        'toppings': _subset(rng, SandwichToppings), 'add_ons': _subset(rng, SandwichAddOns, 2),
+    }
+
+
+def _egg_sandwich(rng: random.Random) -> Dict[str, Any]:
+    return {
+        'bread': _pick(rng, EggSandwichBread), 'egg': _pick(rng, Egg), 'toasted': rng.random() < 0.5,
+        'grilled': rng.random() < 0.2, 'meat': _maybe(rng, EggSandwichMeat), 'cheese': _maybe(rng, EggSandwichCheese),
+        'toppings': _subset(rng, EggSandwichToppings, 3), 'add_ons': _subset(rng, EggSandwichAddOns, 2),
+    }
+
+
+def _salad(rng: random.Random) -> Dict[str, Any]:
+    return {
+        'choice': _pick(rng, SaladChoice), 'toppings': _subset(rng, SaladTopping, 6),
+        'dressing': _maybe(rng, SaladDressing), 'add_ons': _subset(rng, SaladAddOns, 2),
+    }
+
+
+def _hotdog(rng: random.Random) -> Dict[str, Any]:
+    return {'dog_type': _pick(rng, HotDogMeat), 'toppings': _subset(rng, HotDogTopping, 4)}
+
+
+def _side(rng: random.Random) -> Dict[str, Any]:
+    return {'name': _pick(rng, SideName), 'size': _pick(rng, SideSize), 'chips_type': _maybe(rng, Chips)}
+
+
+def _drink(rng: random.Random) -> Dict[str, Any]:
+    size = _pick(rng, DrinkSize)
+    name_enum = BottleDrink if size == DrinkSize.BOTTLE.value else FountainDrink
+    return {'name': _pick(rng, name_enum), 'size': size}
+
+
+def _combo(rng: random.Random) -> Dict[str, Any]:
+    side = {'name': _pick(rng, SideName)}
+    if side['name'] == SideName.CHIPS.value:
+        side['chips_type'] = _pick(rng, Chips)
+    return {'side': side, 'drink': _drink(rng)}
+
+
+GENERATORS: Dict[Category, Callable[[random.Random], Dict[str, Any]]] = {
+    Category.SANDWICH: _sandwich,
+    Category.EGGSANDWICH: _egg_sandwich,
+    Category.SALAD: _salad,
+    Category.HOTDOG: _hotdog,
+    Category.SIDE: _side,
+    Category.DRINK: _drink,
+    Category.COMBO: _combo,
+}
+
+
+def generate_item(rng: random.Random, category: Category, max_attempts: int = 200) -> Dict[str, Any]:
+    """
+    Draw a random valid item of a category.
+
+    Args:
+        rng: Seeded random generator
+        category: Category of the item
+        max_attempts: Draws before giving up
+
+    Returns:
+        Item dictionary accepted by ``validate_order_items``
+
+    Raises:
+        RuntimeError: If no valid configuration was drawn
+    """
+    for _ in range(max_attempts):
+        params = {**_common(rng), **GENERATORS[category](rng)}
+        try:
+            validate_and_create_food_item(category.value, params)
+        except ValueError:
+            continue
+        return {'type': category.value, **params}
+    raise RuntimeError(f"No valid {category.value} drawn in {max_attempts} attempts")
+
+
+def generate_cart(rng: random.Random, size: int) -> List[Dict[str, Any]]:
+    """
+    Generate a cart of ``size`` items cycling through every category.
+
+    Args:
+        rng: Seeded random generator
+        size: Number of items in the cart
+
+    Returns:
+        List of item dictionaries
+    """
+    categories = list(Category)
+    rng.shuffle(categories)
+    return [generate_item(rng, categories[index % len(categories)]) for index in range(size)]
+
+
+def generate_carts(seed: int, size: int, count: int) -> List[List[Dict[str, Any]]]:
+    """
+    Generate ``count`` carts of ``size`` items from a seed.
+
+    Args:
+        seed: Seed; the same seed always yields the same carts
+        size: Number of items per cart
+        count: Number of carts
+
+    Returns:
+        List of carts
+
+    Example:
+        >>> carts = generate_carts(seed=1, size=10, count=20)
+    """
+    rng = random.Random(f"{seed}:{size}")
+    return [generate_cart(rng, size) for _ in range(count)]
@@ -0,0 +1,19 @@
+import pytest
+from models.Category import Category
+from utils.checkout_api_helper import validate_order_items
+from cart_generator import generate_carts
+
+
+class TestCartGenerator:
+    """Test cases for the benchmark cart generator."""
+
+    def test_deterministic(self):
+        """Test that the same seed always produces the same carts."""
+        assert generate_carts(seed=7, size=10, count=3) == generate_carts(seed=7, size=10, count=3)
+        assert generate_carts(seed=7, size=10, count=3) != generate_carts(seed=8, size=10, count=3)
+
+    def test_carts_cover_every_category_and_validate(self):
+        """Test that generated carts contain every category and pass validation."""
+        for cart in generate_carts(seed=1, size=14, count=5):
+            assert {item['type'] for item in cart} == {category.value for category in Category}
+            assert len(validate_order_items(cart).items) == 14
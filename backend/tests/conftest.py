@@ -1,6 +1,7 @@
 import pytest
 import sys
 import os
+import time
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 
@@ -9,9 +10,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
 from db import db
+from utils import intake_journal
 
 @pytest.fixture
-def app():
+def app(tmp_path):
     """Create and configure a new app instance for each test."""
     # Create the app with testing config
     app = create_app()
@@ -19,15 +21,35 @@ def app():
         "TESTING": True,
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
-        "WTF_CSRF_ENABLED": False
+        "WTF_CSRF_ENABLED": False,
+        # Never open, replay or remove the journals of a real server
+        "INTAKE_JOURNAL_DIR": str(tmp_path / "journal"),
     })
     
     # Create the database and the database table
     with app.app_context():
         db.create_all()
         yield app
+        close_journal(app)
         db.drop_all()
 
+def close_journal(app):
+    """Stop the app's intake journal if a test opened it."""
+    journal = app.extensions.pop("intake_journal", None)
+    if journal is not None:
+        journal.close()
+
+@pytest.fixture
+def wait_for_journal(app):
+    """Return a function that waits until the intake journal applied every order placed so far."""
+    def wait(timeout=5.0):
+        journal = intake_journal.get_journal(app)
+        deadline = time.monotonic() + timeout
+        while journal.backlog() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert journal.backlog() == 0
+    return wait
+
 @pytest.fixture
 def client(app):
     """A test client for the app."""
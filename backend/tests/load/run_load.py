@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""End-to-end load test for the checkout and dashboard endpoints.
+
+Starts local Stripe and Twilio Verify stand-ins (``stubs.py``), serves the
+app in a separate process against a temporary SQLite database
+(``serve_app.py``), then drives mixed traffic from concurrent virtual users:
+
+- ``menu``: category, full menu and one item customization page
+- ``cash``: ``send_sms_verification`` followed by ``verify_sms``
+- ``card``: ``confirm_payment`` (Stripe create, modify and confirm)
+- ``dashboard``: ``get_today_orders`` polling
+
+Each virtual user loops over scenarios picked by ``--mix`` weights until
+``--duration`` runs out. All users share one IP, so the checkout rate limits
+are off unless ``--rate-limits`` is given. The report gives throughput and p50/p95/p99
+latency per endpoint, responses by status, and the calls each stub saw.
+
+Note: ``generate_sms_code`` and ``verify_sms_code`` currently return before
+calling Twilio, so the Twilio stub sees no traffic until that is removed.
+
+Usage (from the backend directory):
+    python tests/load/run_load.py --users 20 --duration 30 \\
+        --mix menu=50,cash=20,card=20,dashboard=10 --stripe-latency-ms 200 --stripe-error-rate 0.02
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+from zoneinfo import ZoneInfo
+
+LOAD_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(os.path.dirname(LOAD_DIR))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "tests", "benchmarks"))
+
+from stubs import StubConfig, StripeStub, TwilioVerifyStub  # noqa: E402
+from cart_generator import generate_carts  # noqa: E402
+from utils.checkout_api_helper import validate_order_items  # noqa: E402
+
+MENU_PAGES = ["get_hotdog", "get_sandwich", "get_eggsandwich", "get_salad", "get_drink", "get_side", "get_combo"]
+DEFAULT_MIX = "menu=50,cash=20,card=20,dashboard=10"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, rank - 1)]
+
+
+def next_open_pickup_time() -> str:
+    """Return noon Eastern on the next weekday after today, as the client sends it."""
+    day = datetime.now(ZoneInfo("US/Eastern")).date() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    noon = datetime(day.year, day.month, day.day, 12, 0, tzinfo=ZoneInfo("US/Eastern"))
+    return noon.astimezone(ZoneInfo("UTC")).isoformat().replace("+00:00", "Z")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Recorder:
+    """Thread-safe latency and status collection per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint: str, seconds: float, status: int):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+
+class VirtualUser(threading.Thread):
+    """One simulated customer or store tablet looping over scenarios."""
+
+    def __init__(self, index, base_url, recorder, deadline, mix, carts, store_auth_sid, pickup_at):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.recorder = recorder
+        self.deadline = deadline
+        self.rng = random.Random(index)
+        self.scenarios, self.weights = zip(*mix.items())
+        self.carts = carts
+        self.store_auth_sid = store_auth_sid
+        self.pickup_at = pickup_at
+        self.phone_number = f"555{index:07d}"
+
+    def request(self, endpoint: str, method: str = "GET", form: Dict[str, str] = None) -> int:
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        req = urllib.request.Request(f"{self.base_url}{endpoint}", data=data, method=method)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = 0
+        self.recorder.record(endpoint, time.perf_counter() - start, status)
+        return status
+
+    def order_form(self, card: bool) -> Dict[str, str]:
+        cart, price, price_with_fee = self.rng.choice(self.carts)
+        return {
+            "customer_name": f"Load User {self.phone_number}",
+            "phone_number": self.phone_number,
+            "order_items": json.dumps(cart),
+            "order_price": str(price_with_fee if card else price),
+            "pickup_at": self.pickup_at,
+        }
+
+    def menu(self):
+        self.request("/api/get_info/get_category")
+        self.request("/api/get_info/get_menu")
+        self.request(f"/api/get_info/{self.rng.choice(MENU_PAGES)}")
+
+    def cash(self):
+        form = self.order_form(card=False)
+        if self.request("/api/checkout/send_sms_verification", "POST", form) == 200:
+            self.request("/api/checkout/verify_sms", "POST", {**form, "sms_code": "123456"})
+
+    def card(self):
+        self.request("/api/checkout/confirm_payment", "POST", {**self.order_form(card=True), "payment_method_id": "pm_card_visa"})
+
+    def dashboard(self):
+        self.request("/api/get_info/get_today_orders", "POST", {"store_auth_sid": self.store_auth_sid})
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            getattr(self, self.rng.choices(self.scenarios, self.weights)[0])()
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("menu", "cash", "card", "dashboard"):
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name] = float(weight)
+    return mix
+
+
+def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("App process exited during startup")
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/get_info/get_category", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"App not ready after {timeout}s")
+
+
+def report(recorder: Recorder, elapsed: float, stubs) -> dict:
+    """Print the per-endpoint summary and return it as a dictionary."""
+    summary = {}
+    print(f"\n{'endpoint':<44} {'req':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    for endpoint in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[endpoint])
+        row = {
+            "requests": len(values),
+            "throughput": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "statuses": dict(recorder.statuses[endpoint]),
+        }
+        summary[endpoint] = row
+        statuses = " ".join(f"{code}:{count}" for code, count in sorted(row["statuses"].items()))
+        print(f"{endpoint:<44} {row['requests']:>7} {row['throughput']:>8.1f} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}  {statuses}")
+    total = sum(row["requests"] for row in summary.values())
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+    for name, stub in stubs.items():
+        print(f"{name} stub calls: {dict(stub.requests) or 'none'}")
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of traffic")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--cart-size", type=int, default=3, help="items per generated cart")
+    parser.add_argument("--stripe-latency-ms", type=float, default=150)
+    parser.add_argument("--stripe-jitter-ms", type=float, default=50)
+    parser.add_argument("--stripe-error-rate", type=float, default=0.0)
+    parser.add_argument("--twilio-latency-ms", type=float, default=100)
+    parser.add_argument("--twilio-jitter-ms", type=float, default=30)
+    parser.add_argument("--twilio-error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limits", action="store_true", help="keep the checkout rate limits on")
+    parser.add_argument("--json", metavar="PATH", help="also write the summary as JSON")
+    args = parser.parse_args()
+
+    carts = []
+    for cart in generate_carts(seed=1, size=args.cart_size, count=50):
+        order = validate_order_items(cart)
+        carts.append((cart, order.total_price(), order.total_price_with_fee()))
+
+    stubs = {
+        "Stripe": StripeStub(StubConfig(args.stripe_latency_ms, args.stripe_jitter_ms, args.stripe_error_rate, seed=1)),
+        "Twilio": TwilioVerifyStub(StubConfig(args.twilio_latency_ms, args.twilio_jitter_ms, args.twilio_error_rate, seed=2)),
+    }
+    store_auth_sid = secrets.token_hex(16)
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    with tempfile.TemporaryDirectory(prefix="steves_load_") as workdir, stubs["Stripe"], stubs["Twilio"]:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'load.sqlite')}",
+            "STORE_AUTH_SID": store_auth_sid,
+            "STRIPE_SECRET_KEY": "sk_test_loadtest",
+            "STRIPE_API_BASE": stubs["Stripe"].url,
+            "TWILIO_VERIFY_SERVICE_SID": "VAloadtest",
+            "TWILIO_VERIFY_BASE_URL": stubs["Twilio"].url,
+            "RATE_LIMIT_ENABLED": "1" if args.rate_limits else "0",
+        }
+        # Run in the temp dir so the app's log files land there too
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(LOAD_DIR, "serve_app.py"), "--port", str(port)],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_ready(base_url, process)
+            print(f"App ready at {base_url}; {args.users} users for {args.duration:.0f}s, mix {args.mix}")
+            recorder = Recorder()
+            start = time.monotonic()
+            deadline = start + args.duration
+            pickup_at = next_open_pickup_time()
+            users = [VirtualUser(i, base_url, recorder, deadline, args.mix, carts, store_auth_sid, pickup_at)
+                     for i in range(args.users)]
+            for user in users:
+                user.start()
+            for user in users:
+                user.join()
+            summary = report(recorder, time.monotonic() - start, stubs)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k != "json"}, "endpoints": summary}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Serve the app for a load test run.
+
+Started by ``run_load.py`` in its own process, so the load generator does
+not compete with the app for the interpreter lock. Configuration (database
+URL, stub endpoints, credentials) comes from the environment.
+
+Usage:
+    python tests/load/serve_app.py --port 5055
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BACKEND_DIR)
+
+from werkzeug.serving import make_server  # noqa: E402
+from app import create_app  # noqa: E402
+from cli import migrate_schema  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    args = parser.parse_args()
+
+    # Request logging would dominate the run
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app = create_app()
+    with app.app_context():
+        migrate_schema()
+    server = make_server(args.host, args.port, app, threaded=True)
+    print(f"Serving on http://{args.host}:{args.port}", flush=True)
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
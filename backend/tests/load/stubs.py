@@ -0,0 +1,174 @@
+"""Local HTTP stand-ins for Stripe and Twilio Verify.
+
+The stubs answer just the calls ``utils.checkout_api_helper`` makes, with
+a configurable latency and error rate, so checkout can be load tested
+without touching the real payment and SMS providers. Point the app at
+them with the ``STRIPE_API_BASE`` and ``TWILIO_VERIFY_BASE_URL``
+environment variables.
+"""
+
+import abc
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+# Object ids in request paths, collapsed when counting requests per endpoint
+_OBJECT_ID = re.compile(r"/(?:pi_|VA|VE)\w+")
+
+
+@dataclass
+class StubConfig:
+    """
+    Behaviour of a stub server.
+
+    Attributes:
+        latency_ms (float): Mean added latency per request
+        jitter_ms (float): Latency is drawn uniformly from mean +/- jitter
+        error_rate (float): Fraction of requests answered with an error
+        seed (Optional[int]): Seed for latency and error draws
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class StubServer(abc.ABC):
+    """
+    Threaded HTTP server running a stub in the background.
+
+    Subclasses implement ``handle(method, path, form)`` returning the status
+    code and JSON body, and ``error()`` returning the failure response.
+
+    Example:
+        >>> with StripeStub(StubConfig(latency_ms=150, error_rate=0.02)) as stripe_stub:
+        ...     os.environ["STRIPE_API_BASE"] = stripe_stub.url
+    """
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        config = config if config is not None else StubConfig()
+        self.config = config
+        self.requests: Dict[str, int] = {}
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    @abc.abstractmethod
+    def handle(self, method: str, path: str, form: Dict[str, str]) -> Tuple[int, dict]:
+        """Answer a request with its status code and JSON body."""
+
+    @abc.abstractmethod
+    def error(self) -> Tuple[int, dict]:
+        """Return the status code and JSON body of an injected failure."""
+
+    def _respond(self, method: str, path: str, form: Dict[str, str]) -> Tuple[int, dict]:
+        with self._lock:
+            delay = max(0.0, self.config.latency_ms + self._random.uniform(-1, 1) * self.config.jitter_ms) / 1000
+            failed = self._random.random() < self.config.error_rate
+            key = f"{method} {_OBJECT_ID.sub('/{id}', path)}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+        time.sleep(delay)
+        return self.error() if failed else self.handle(method, path, form)
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _dispatch(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode() if length else ""
+                form = {key: values[-1] for key, values in parse_qs(body).items()}
+                status, payload = stub._respond(self.command, self.path.split("?")[0], form)
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            do_GET = do_POST = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class StripeStub(StubServer):
+    """Stand-in for the Stripe PaymentIntent API used by card checkout."""
+
+    _INTENT = re.compile(r"^/v1/payment_intents(?:/(?P<id>[^/]+))?(?:/(?P<action>confirm|cancel))?$")
+    _STATUS_AFTER = {"confirm": "succeeded", "cancel": "canceled"}
+
+    def handle(self, method, path, form):
+        match = self._INTENT.match(path)
+        if method != "POST" or match is None:
+            return 404, {"error": {"type": "invalid_request_error", "message": f"Unrecognized request URL ({path})"}}
+        intent_id = match.group("id") or f"pi_stub{self.next_id()}"
+        status = self._STATUS_AFTER.get(match.group("action"), "requires_confirmation")
+        return 200, {
+            "id": intent_id,
+            "object": "payment_intent",
+            "amount": int(form.get("amount", 0)),
+            "currency": form.get("currency", "usd"),
+            "status": status,
+            "metadata": {},
+        }
+
+    def error(self):
+        return 402, {"error": {"type": "card_error", "code": "card_declined", "message": "Your card was declined."}}
+
+
+class TwilioVerifyStub(StubServer):
+    """Stand-in for the Twilio Verify API used by SMS verification."""
+
+    _VERIFY = re.compile(r"^/v2/Services/(?P<service>[^/]+)/(?P<action>Verifications|VerificationCheck)$")
+
+    def handle(self, method, path, form):
+        match = self._VERIFY.match(path)
+        if method != "POST" or match is None:
+            return 404, {"code": 20404, "message": "The requested resource was not found", "status": 404}
+        status = "pending" if match.group("action") == "Verifications" else "approved"
+        return 201 if status == "pending" else 200, {
+            "sid": f"VE{self.next_id():032d}",
+            "service_sid": match.group("service"),
+            "to": form.get("To"),
+            "channel": form.get("Channel", "sms"),
+            "status": status,
+            "valid": status == "approved",
+        }
+
+    def error(self):
+        return 429, {"code": 20429, "message": "Too Many Requests", "status": 429}
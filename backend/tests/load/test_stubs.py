@@ -0,0 +1,38 @@
+import pytest
+from stubs import StubConfig, StripeStub
+from run_load import percentile
+from utils.checkout_api_helper import get_stripe, pay_with_card
+
+
+@pytest.fixture
+def stripe_stub():
+    """Point the Stripe client at a local stub for the duration of a test."""
+    stripe = get_stripe()
+    original_base, original_key = stripe.api_base, stripe.api_key
+    with StripeStub(StubConfig(seed=1)) as stub:
+        stripe.api_base, stripe.api_key = stub.url, 'sk_test_stub'
+        yield stub
+    stripe.api_base, stripe.api_key = original_base, original_key
+
+
+class TestLoadStubs:
+    """Test cases for the load test stand-ins."""
+
+    def test_stripe_stub_payment_intent(self, stripe_stub):
+        """Test that the card checkout helper works against the Stripe stub."""
+        intent = pay_with_card('pm_card_visa', 12.34)
+        assert intent['status'] == 'requires_confirmation'
+        assert intent['amount'] == 1234
+        assert stripe_stub.requests == {'POST /v1/payment_intents': 1}
+
+    def test_stripe_stub_errors(self, stripe_stub):
+        """Test that configured errors surface as card errors."""
+        stripe_stub.config.error_rate = 1.0
+        assert pay_with_card('pm_card_visa', 1.0)['error'] == 'Card payment failed'
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile used in the report."""
+        values = list(range(1, 101))
+        assert percentile(values, 0.50) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile([], 0.5) == 0.0
@@ -0,0 +1,86 @@
+import pytest
+from models.FoodItem import FoodItem, display_item
+from models.Hotdog import Hotdog, HotDogMeat, HotDogTopping, HOT_DOG_TOPPINGS_MASK
+from models.Sandwich import Sandwich, SandwichSize, SandwichBread, SandwichMeat, SandwichCheese, SandwichToppings, SandwichAddOns
+from models.Combo import Combo
+from models.Side import SideName
+from models.Drink import DrinkSize, FountainDrink
+from models.Schema import ComboSideSchema, ComboDrinkSchema
+
+
+def make_sandwich(toppings, quantity=1):
+    return Sandwich(
+        quantity=quantity,
+        size=SandwichSize.REGULAR,
+        bread=SandwichBread.WHEAT,
+        meat=SandwichMeat.TURKEY,
+        toast=False,
+        grilled=False,
+        cheese=SandwichCheese.SWISS,
+        toppings=toppings,
+        special_instructions=None,
+        add_ons=[SandwichAddOns.CHEESE],
+    )
+
+
+class TestFoodItem:
+    """Test cases for the immutable FoodItem base."""
+
+    def test_immutable_and_slotted(self):
+        """Test that items have no __dict__ and reject attribute writes."""
+        hotdog = Hotdog(1, HotDogMeat.BEEF, [HotDogTopping.MUSTARD], None)
+        assert not hasattr(hotdog, '__dict__')
+        with pytest.raises(AttributeError):
+            hotdog._quantity = 5
+        with pytest.raises(AttributeError):
+            hotdog.extra = True
+        hotdog.toppings.append(HotDogTopping.CHILI)
+        assert hotdog.toppings == [HotDogTopping.MUSTARD]
+
+    def test_equality_ignores_option_order(self):
+        """Test that equal configurations are equal and hash the same."""
+        a = make_sandwich([SandwichToppings.TOMATO, SandwichToppings.LETTUCE])
+        b = make_sandwich([SandwichToppings.LETTUCE, SandwichToppings.TOMATO, SandwichToppings.LETTUCE])
+        assert a == b
+        assert hash(a) == hash(b)
+        assert a != make_sandwich([SandwichToppings.TOMATO], quantity=1)
+        assert a != make_sandwich([SandwichToppings.TOMATO, SandwichToppings.LETTUCE], quantity=2)
+
+    def test_interned(self):
+        """Test that identical configurations share one instance."""
+        a = make_sandwich([SandwichToppings.TOMATO]).interned()
+        b = make_sandwich([SandwichToppings.TOMATO]).interned()
+        assert a is b
+
+    def test_combo_hashable(self):
+        """Test that combos built from combo schemas are hashable and comparable."""
+        def make_combo():
+            return Combo(
+                quantity=1,
+                side=ComboSideSchema(name=SideName.FRENCH_FRIES),
+                drink=ComboDrinkSchema(size=DrinkSize.REGULAR, name=FountainDrink.COKE),
+                special_instructions=None,
+            )
+        assert make_combo() == make_combo()
+        assert make_combo().interned() is make_combo().interned()
+
+    def test_serializer(self):
+        """Test that the generated serializer keeps the stored item layout."""
+        hotdog = Hotdog(2, HotDogMeat.BEEF, [HotDogTopping.RELISH, HotDogTopping.MUSTARD], "Extra mustard")
+        assert hotdog.serialize() == {
+            'type': 'Hotdog',
+            'price': hotdog.price,
+            '_dog_type': HotDogMeat.BEEF,
+            '_toppings': HOT_DOG_TOPPINGS_MASK.encode([HotDogTopping.MUSTARD, HotDogTopping.RELISH]),
+            '_special_instructions': "Extra mustard",
+            '_quantity': 2,
+            '_price': hotdog.price,
+        }
+        assert FoodItem.registry['Hotdog'] is Hotdog
+
+    def test_display_item(self):
+        """Test that stored masks are decoded for display and legacy lists pass through."""
+        hotdog = Hotdog(1, HotDogMeat.BEEF, [HotDogTopping.RELISH, HotDogTopping.MUSTARD], None)
+        assert display_item(hotdog.serialize())['_toppings'] == ['Mustard', 'Relish']
+        legacy = {'type': 'Hotdog', '_toppings': ['Relish', 'Mustard']}
+        assert display_item(legacy) == legacy
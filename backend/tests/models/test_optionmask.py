@@ -0,0 +1,42 @@
+import pytest
+from models.OptionMask import OptionMask
+from models.Hotdog import HotDogTopping
+from models.Sandwich import SandwichToppings
+
+
+class TestOptionMask:
+    """Test cases for the OptionMask codec."""
+
+    def test_bits_follow_declaration_order(self):
+        """Test that each member gets the bit of its declaration index."""
+        mask = OptionMask(HotDogTopping)
+        for index, member in enumerate(HotDogTopping):
+            assert mask.bits[member] == 1 << index
+
+    def test_encode_decode_roundtrip(self):
+        """Test that decoding returns the selection in declaration order without duplicates."""
+        mask = OptionMask(SandwichToppings)
+        value = mask.encode([SandwichToppings.ONIONS, SandwichToppings.MAYO, SandwichToppings.MAYO])
+        assert mask.decode(value) == (SandwichToppings.MAYO, SandwichToppings.ONIONS)
+        assert mask.values(value) == ['Mayo', 'Onions']
+
+    def test_empty_selection(self):
+        """Test that no selection encodes to zero."""
+        mask = OptionMask(HotDogTopping)
+        assert mask.encode(None) == 0
+        assert mask.encode([]) == 0
+        assert mask.decode(0) == ()
+
+    def test_contains(self):
+        """Test membership checks against a mask."""
+        mask = OptionMask(HotDogTopping)
+        value = mask.encode([HotDogTopping.CHILI])
+        assert mask.contains(value, HotDogTopping.CHILI)
+        assert not mask.contains(value, HotDogTopping.MUSTARD)
+
+    def test_encode_values(self):
+        """Test encoding from stored display values."""
+        mask = OptionMask(HotDogTopping)
+        assert mask.encode_values(['Relish', 'Mustard']) == mask.encode([HotDogTopping.MUSTARD, HotDogTopping.RELISH])
+        with pytest.raises(KeyError):
+            mask.encode_values(['Pineapple'])
@@ -0,0 +1,93 @@
+import pytest
+import json
+from datetime import datetime, timezone
+from db import db
+from models.OrderTable import OrderTable, ORDER_RENDER_VERSION
+from utils import order_items_codec
+
+
+class TestOrderTableRendering:
+    """Test cases for the pre-rendered order JSON."""
+
+    mock_items = [{'type': 'Drink', 'price': 2.0, '_quantity': 1, '_size': 'Regular', '_name': 'Coke'}]
+
+    def create_order(self, db_session):
+        order = OrderTable(
+            customer_name='Test Customer',
+            phone_number='5551234567',
+            order_items=self.mock_items,
+            total_amount=2.0,
+            payment_method='cash',
+            payment_status='pending',
+            pickup_at=datetime(2025, 8, 25, 15, 0, tzinfo=timezone.utc),
+        )
+        db_session.add(order)
+        db_session.commit()
+        return order
+
+    def test_rendered_at_insert(self, app, db_session):
+        """Test that the order is rendered when it is created."""
+        order = self.create_order(db_session)
+        assert order.rendered_version == ORDER_RENDER_VERSION
+        assert json.loads(order.to_json()) == order.to_dict()
+        assert json.loads(order.to_json())['order_items'] == self.mock_items
+
+    def test_reloaded_row_matches_to_dict(self, app, db_session):
+        """Test that a row loaded from the database renders like to_dict."""
+        order_id = self.create_order(db_session).id
+        db_session.expire_all()
+        stored = db_session.get(OrderTable, order_id)
+        assert json.loads(stored.to_json()) == stored.to_dict()
+        assert stored.to_dict()['pickup_at'] == '2025-08-25T15:00:00+00:00'
+
+    def test_legacy_and_stale_rows_rendered_on_read(self, app, db_session):
+        """Test that rows without a current rendering are rendered on the fly."""
+        order = self.create_order(db_session)
+        order.rendered_json = None
+        assert json.loads(order.to_json()) == order.to_dict()
+        order.rendered_json = '{"stale": true}'
+        order.rendered_version = ORDER_RENDER_VERSION - 1
+        assert json.loads(order.to_json()) == order.to_dict()
+
+    def test_update_refreshes_rendering(self, app, db_session):
+        """Test that updating a row refreshes its rendering."""
+        order = self.create_order(db_session)
+        order.payment_status = 'succeeded'
+        db_session.commit()
+        assert json.loads(order.rendered_json)['payment_status'] == 'succeeded'
+
+    def test_compact_encoding_and_migration(self, app, db_session, runner):
+        """Test that compact rows read like JSON rows and that migrate converts both ways."""
+        app.config['ORDER_ITEMS_ENCODING'] = 'compact'
+        order = self.create_order(db_session)
+        assert order.order_items.startswith(order_items_codec.COMPACT_PREFIX)
+        assert order.to_dict()['order_items'] == self.mock_items
+
+        result = runner.invoke(args=['order-items', 'migrate', '--to', 'json'])
+        assert 'Converted 1 orders to json' in result.output
+        db_session.expire_all()
+        assert json.loads(db_session.get(OrderTable, order.id).order_items) == self.mock_items
+
+        result = runner.invoke(args=['order-items', 'migrate', '--to', 'compact'])
+        assert 'Converted 1 orders to compact' in result.output
+        db_session.expire_all()
+        stored = db_session.get(OrderTable, order.id)
+        assert stored.order_items.startswith(order_items_codec.COMPACT_PREFIX)
+        assert json.loads(stored.to_json()) == stored.to_dict()
+
+    def test_schema_migrate(self, app, db_session, runner):
+        """Test that db migrate restores missing tables, columns and indexes, and is idempotent."""
+        db_session.execute(db.text('DROP INDEX ix_orders_phone_number_created_at'))
+        db_session.execute(db.text('ALTER TABLE orders DROP COLUMN rendered_version'))
+        db_session.execute(db.text('DROP TABLE store_closed_dates'))
+        db_session.commit()
+
+        result = runner.invoke(args=['db', 'migrate'])
+        assert 'created table store_closed_dates' in result.output
+        assert 'added column orders.rendered_version' in result.output
+        assert 'created index ix_orders_phone_number_created_at' in result.output
+        order = self.create_order(db_session)
+        assert order.rendered_version == ORDER_RENDER_VERSION
+
+        result = runner.invoke(args=['db', 'migrate'])
+        assert 'Schema up to date (0 changes)' in result.output
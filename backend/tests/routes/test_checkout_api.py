@@ -60,7 +60,7 @@ class TestCheckoutAPI:
         assert response.status_code == 200
 
     @patch("routes.checkout_api.verify_sms_code", return_value=True)
-    def test_verify_sms_code(self, mock_verify_sms_code, client, app, db_session):
+    def test_verify_sms_code(self, mock_verify_sms_code, client, app, db_session, wait_for_journal):
         mock_validate_pickup_time = datetime(2025, 8, 25, 9, 0, tzinfo=ZoneInfo("US/Eastern"))
         # Turn into iso format
         mock_validate_pickup_time = mock_validate_pickup_time.astimezone(ZoneInfo("UTC")).isoformat()
@@ -75,6 +75,7 @@ class TestCheckoutAPI:
                 'sms_code': "123456",
             })
             assert response.status_code == 200
+            wait_for_journal()
             # Check if the order is created in the database
             order = OrderTable.query.filter_by(phone_number=self.mock_phone_number).first()
             assert order is not None
@@ -86,7 +87,7 @@ class TestCheckoutAPI:
 
     @patch("routes.checkout_api.pay_with_card", return_value={"status": "requires_confirmation", "id": "pi_1234567890"})
     @patch("utils.checkout_api_helper.validate_pickup_time", return_value=datetime(2025, 8, 25, 15, 0, tzinfo=ZoneInfo("UTC")))
-    def test_confirm_payment(self, mock_pay_with_card, mock_validate_pickup_time, client, app, db_session):
+    def test_confirm_payment(self, mock_pay_with_card, mock_validate_pickup_time, client, app, db_session, wait_for_journal):
         """Test confirm payment."""
         with app.app_context():
             response = client.post('/api/checkout/confirm_payment', data={
@@ -98,6 +99,7 @@ class TestCheckoutAPI:
                 'payment_method_id': "pm_1234567890"
             })
             assert response.status_code == 200
+            wait_for_journal()
             # Check if the order is created in the database
             order = OrderTable.query.filter_by(phone_number=self.mock_phone_number).first()
             assert order is not None
@@ -120,3 +122,222 @@ class TestCheckoutAPI:
             'payment_method_id': "pm_1234567890"
         })
         assert response.status_code == 400
+
+    @patch("routes.checkout_api.verify_sms_code", return_value=True)
+    @patch("utils.checkout_api_helper.validate_pickup_time", return_value=datetime(2025, 8, 25, 15, 0, tzinfo=ZoneInfo("UTC")))
+    def test_reorder(self, mock_verify_sms_code, mock_validate_pickup_time, client, app, db_session, wait_for_journal):
+        """Test that a placed order comes back as a re-priced cart."""
+        from routes.checkout_api import reorder_cache
+        reorder_cache.invalidate()
+        response = client.post('/api/checkout/verify_sms', data={
+            'customer_name': self.mock_customer_name,
+            'phone_number': self.mock_phone_number,
+            'order_items': json.dumps(self.mock_order_items),
+            'pickup_at': self.mock_pickup_at,
+            'order_price': 4.25 + 2 + 6.75 + 2 + 0.75,
+            'sms_code': "123456",
+        })
+        assert response.status_code == 200
+        wait_for_journal()
+
+        response = client.post('/api/checkout/reorder', data={
+            'customer_name': self.mock_customer_name.upper(),
+            'phone_number': self.mock_phone_number,
+        })
+        assert response.status_code == 200
+        carts = response.get_json()['carts']
+        assert len(carts) == 1
+        assert carts[0]['order_price'] == 4.25 + 2 + 6.75 + 2 + 0.75
+        assert carts[0]['unavailable_items'] == []
+        assert sorted(carts[0]['order_items'][0]['toppings']) == ['Lettuce', 'Tomato']
+
+        # The returned cart can be checked out again as-is
+        response = client.post('/api/checkout/send_sms_verification', data={
+            'customer_name': self.mock_customer_name,
+            'phone_number': self.mock_phone_number,
+            'order_items': json.dumps(carts[0]['order_items']),
+            'pickup_at': self.mock_pickup_at,
+            'order_price': carts[0]['order_price'],
+        })
+        assert response.status_code == 200
+
+        # Another name on the same phone number sees nothing
+        response = client.post('/api/checkout/reorder', data={
+            'customer_name': 'Someone Else',
+            'phone_number': self.mock_phone_number,
+        })
+        assert response.get_json()['carts'] == []
+
+        response = client.post('/api/checkout/reorder', data={'phone_number': '123', 'customer_name': 'x'})
+        assert response.status_code == 400
+        response = client.post('/api/checkout/reorder', data={
+            'customer_name': self.mock_customer_name, 'phone_number': self.mock_phone_number, 'limit': '\u00b2'})
+        assert response.status_code == 400
+
+    @patch("routes.checkout_api.verify_sms_code", return_value=True)
+    @patch("utils.checkout_api_helper.validate_pickup_time", return_value=datetime(2025, 8, 25, 15, 0, tzinfo=ZoneInfo("UTC")))
+    def test_verify_sms_survives_database_stall(self, mock_verify_sms_code, mock_validate_pickup_time, client, app, db_session, wait_for_journal):
+        """Test that a cash order is acknowledged while the database is locked and inserted once it recovers."""
+        from sqlalchemy.exc import OperationalError
+        from utils import intake_journal
+        real_apply_order = intake_journal.apply_order
+        attempts = []
+
+        def locked_then_recovered(app, record):
+            attempts.append(record['intake_id'])
+            if len(attempts) < 3:
+                raise OperationalError("INSERT INTO orders", {}, Exception("database is locked"))
+            return real_apply_order(app, record)
+
+        with patch("utils.intake_journal.apply_order", side_effect=locked_then_recovered):
+            response = client.post('/api/checkout/verify_sms', data={
+                'customer_name': self.mock_customer_name,
+                'phone_number': self.mock_phone_number,
+                'order_items': json.dumps(self.mock_order_items),
+                'pickup_at': self.mock_pickup_at,
+                'order_price': 4.25 + 2 + 6.75 + 2 + 0.75,
+                'sms_code': "123456",
+            })
+            assert response.status_code == 200
+            wait_for_journal()
+
+        orders = OrderTable.query.all()
+        assert len(orders) == 1
+        assert orders[0].intake_id == attempts[0]
+        assert orders[0].payment_method == 'cash'
+
+    def test_send_sms_rate_limited_per_phone(self, client, app, db_session):
+        """Test that SMS requests for one phone number are limited with a 429 and Retry-After."""
+        form = {'customer_name': self.mock_customer_name, 'phone_number': self.mock_phone_number,
+                'order_items': '[]', 'order_price': '0', 'pickup_at': self.mock_pickup_at}
+        statuses = [client.post('/api/checkout/send_sms_verification', data=form).status_code for _ in range(4)]
+        assert statuses[:3] != [429] * 3
+        assert statuses[3] == 429
+        response = client.post('/api/checkout/send_sms_verification', data=form)
+        assert 0 < int(response.headers['Retry-After']) <= 200
+
+        # Another phone number from the same IP is unaffected
+        response = client.post('/api/checkout/send_sms_verification', data={**form, 'phone_number': '5559876543'})
+        assert response.status_code != 429
+
+    def test_provider_calls_shed_when_busy(self, client, app, db_session):
+        """Test that provider endpoints answer 503 when every slot is taken."""
+        concurrency = app.extensions['rate_limiter'].concurrency
+        for _ in range(concurrency.limit):
+            concurrency.try_acquire()
+        try:
+            response = client.post('/api/checkout/confirm_payment', data={'phone_number': self.mock_phone_number})
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+            # Endpoints without provider calls still go through
+            assert client.post('/api/checkout/reorder', data={'phone_number': '123'}).status_code == 400
+        finally:
+            for _ in range(concurrency.limit):
+                concurrency.release()
+        assert client.post('/api/checkout/confirm_payment', data={'phone_number': self.mock_phone_number}).status_code != 503
+
+    def _bulk_order_body(self, items, **order):
+        header = {'customer_name': self.mock_customer_name, 'phone_number': self.mock_phone_number,
+                  'pickup_at': self.mock_pickup_at, 'payment_method': 'cash', 'sms_code': '123456', **order}
+        return '\n'.join(json.dumps(line) for line in [header, *items]) + '\n'
+
+    @patch("routes.checkout_api.verify_sms_code", return_value=True)
+    @patch("utils.checkout_api_helper.validate_pickup_time", return_value=datetime(2025, 8, 25, 15, 0, tzinfo=ZoneInfo("UTC")))
+    def test_bulk_order(self, mock_verify_sms_code, mock_validate_pickup_time, client, app, db_session, wait_for_journal):
+        """Test a catering order streamed as NDJSON."""
+        items = self.mock_order_items * 40
+        body = self._bulk_order_body(items, order_price=(4.25 + 2 + 6.75 + 2 + 0.75) * 40)
+        response = client.post('/api/checkout/bulk_order', data=body, content_type='application/x-ndjson')
+        assert response.status_code == 200
+        wait_for_journal()
+        order = OrderTable.query.filter_by(phone_number=self.mock_phone_number).first()
+        assert order is not None
+        assert len(json.loads(order.order_items)) == len(items)
+
+    @patch("routes.checkout_api.verify_sms_code", return_value=True)
+    @patch("utils.checkout_api_helper.validate_pickup_time", return_value=datetime(2025, 8, 25, 15, 0, tzinfo=ZoneInfo("UTC")))
+    def test_bulk_order_rejects_invalid_item(self, mock_verify_sms_code, mock_validate_pickup_time, client, app, db_session):
+        """Test that the first invalid item is reported by line, and oversized orders are refused."""
+        items = [self.mock_order_items[1], {'type': 'Drink', 'quantity': 1, 'name': 'Not A Drink', 'size': 'Regular'}]
+        response = client.post('/api/checkout/bulk_order', data=self._bulk_order_body(items, order_price=4),
+                               content_type='application/x-ndjson')
+        assert response.status_code == 400
+        assert 'Line 3' in response.get_json()['error']
+
+        with patch.dict(os.environ, {'BULK_ORDER_MAX_ITEMS': '2'}):
+            response = client.post('/api/checkout/bulk_order', content_type='application/x-ndjson',
+                                   data=self._bulk_order_body([self.mock_order_items[1]] * 3, order_price=6))
+        assert response.status_code == 413
+
+        response = client.post('/api/checkout/bulk_order', content_type='application/x-ndjson',
+                               data=self._bulk_order_body([self.mock_order_items[1]], order_price=2.08, payment_method='card'))
+        assert response.status_code == 400
+        assert 'payment_method_id' in response.get_json()['error']
+
+        response = client.post('/api/checkout/bulk_order', data='customer_name=x')
+        assert response.status_code == 415
+        assert OrderTable.query.count() == 0
+
+    @patch("routes.checkout_api.generate_sms_code", return_value=True)
+    @patch("utils.checkout_api_helper.validate_pickup_time", return_value=datetime(2025, 8, 25, 15, 0, tzinfo=ZoneInfo("UTC")))
+    def test_quote(self, mock_generate_sms_code, mock_validate_pickup_time, client, app, db_session):
+        """Test that a quoted cart, changed by deltas, is accepted at checkout with the quoted price."""
+        response = client.post('/api/checkout/quote', data={'order_items': json.dumps(self.mock_order_items)})
+        assert response.status_code == 200
+        quote = response.get_json()
+        assert quote['order_price'] == 4.25 + 2 + 6.75 + 2 + 0.75
+        assert [line['line_id'] for line in quote['lines']] == ['1', '2', '3']
+
+        drinks = {**self.mock_order_items[1], 'quantity': 2}
+        response = client.post('/api/checkout/quote', data={'quote_id': quote['quote_id'], 'deltas': json.dumps([
+            {'op': 'update', 'line_id': '2', 'item': drinks}, {'op': 'remove', 'line_id': '3'}])})
+        assert response.status_code == 200
+        updated = response.get_json()
+        assert [line['line_id'] for line in updated['lines']] == ['2'] and updated['removed'] == ['3']
+
+        response = client.post('/api/checkout/send_sms_verification', data={
+            'customer_name': self.mock_customer_name,
+            'phone_number': self.mock_phone_number,
+            'order_items': json.dumps([self.mock_order_items[0], drinks]),
+            'pickup_at': self.mock_pickup_at,
+            'order_price': updated['order_price'],
+        })
+        assert response.status_code == 200
+
+        response = client.post('/api/checkout/quote', data={'quote_id': quote['quote_id'], 'deltas': json.dumps([
+            {'op': 'update', 'line_id': '3', 'item': drinks}])})
+        assert response.status_code == 400
+        assert client.post('/api/checkout/quote', data={'quote_id': 'expired', 'deltas': '[]'}).status_code == 404
+
+    @patch("routes.checkout_api.verify_sms_code", return_value=True)
+    @patch("utils.checkout_api_helper.validate_pickup_time", return_value=datetime(2025, 8, 25, 15, 0, tzinfo=ZoneInfo("UTC")))
+    def test_review_token_skips_repricing(self, mock_verify_sms_code, mock_validate_pickup_time, client, app, db_session, wait_for_journal):
+        """Test that checkout with a matching review token does not validate the cart again, and a stale one does."""
+        response = client.post('/api/checkout/review', data={'order_items': json.dumps(self.mock_order_items), 'payment_method': 'cash'})
+        assert response.status_code == 200
+        reviewed = response.get_json()
+        assert reviewed['order_price'] == 4.25 + 2 + 6.75 + 2 + 0.75
+        form = {
+            'customer_name': self.mock_customer_name,
+            'phone_number': self.mock_phone_number,
+            'order_items': json.dumps(self.mock_order_items),
+            'pickup_at': self.mock_pickup_at,
+            'order_price': reviewed['order_price'],
+            'sms_code': "123456",
+            'review_token': reviewed['review_token'],
+        }
+        with patch("utils.checkout_api_helper.validate_order_items") as mock_validate_order_items:
+            response = client.post('/api/checkout/verify_sms', data=form)
+            assert response.status_code == 200
+            assert not mock_validate_order_items.called
+
+            # A token for another cart falls back to a full re-price
+            response = client.post('/api/checkout/verify_sms', data={
+                **form, 'order_items': json.dumps(self.mock_order_items[:2]), 'order_price': 4.25 + 2 + 6.75 + 2})
+            assert mock_validate_order_items.called
+
+        wait_for_journal()
+        order = OrderTable.query.filter_by(phone_number=self.mock_phone_number).first()
+        stored = json.loads(order.order_items)
+        assert [item['type'] for item in stored] == ['Sandwich', 'Drink', 'Combo']
+        assert order.total_amount == reviewed['order_price']
@@ -74,3 +74,32 @@ class TestCloseStoreAPI:
         assert response.status_code == 400
         data = json.loads(response.data)
         assert data["error"] == "Invalid date format"
+
+
+class TestCompleteOrderAPI:
+    """Tests for the /api/close_store/complete_order endpoint."""
+
+    def test_complete_order(self, client, app, db_session):
+        """Test completing an order, twice."""
+        from db import db
+        from models.OrderTable import OrderTable
+        order = OrderTable("A", "5551234567", [], 0.0, "cash", "pending")
+        db.session.add(order)
+        db.session.commit()
+        for _ in range(2):
+            response = client.post("/api/close_store/complete_order",
+                                   data={"store_auth_sid": STORE_AUTH_SID, "order_id": str(order.id)})
+            assert response.status_code == 200
+            assert json.loads(response.data)["order_id"] == order.id
+        assert db.session.get(OrderTable, order.id).completed_at is not None
+
+    def test_complete_unknown_order(self, client):
+        """Test completing an order that does not exist, or with a bad id."""
+        response = client.post("/api/close_store/complete_order", data={"store_auth_sid": STORE_AUTH_SID, "order_id": "999"})
+        assert response.status_code == 404
+        response = client.post("/api/close_store/complete_order", data={"store_auth_sid": STORE_AUTH_SID, "order_id": "abc"})
+        assert response.status_code == 400
+        response = client.post("/api/close_store/complete_order", data={"store_auth_sid": STORE_AUTH_SID, "order_id": "\u00b2"})
+        assert response.status_code == 400
+        response = client.post("/api/close_store/complete_order", data={"store_auth_sid": "WRONG_SID", "order_id": "1"})
+        assert response.status_code == 401
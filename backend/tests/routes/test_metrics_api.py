@@ -0,0 +1,24 @@
+import pytest
+from unittest.mock import patch
+
+
+class TestMetricsAPI:
+    """Tests for the /metrics endpoint."""
+
+    def test_metrics_exposes_request_metrics(self, client):
+        """Test that served requests show up in the exposition."""
+        client.get('/api/get_info/get_category')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        text = response.get_data(as_text=True)
+        assert 'steves_http_requests_total{method="GET",route="/api/get_info/get_category",status="200"}' in text
+        assert 'steves_http_request_duration_seconds_count{method="GET",route="/api/get_info/get_category"}' in text
+        # Only the /metrics request itself is in flight
+        assert 'steves_http_requests_in_flight 1' in text
+
+    def test_metrics_token(self, client):
+        """Test that METRICS_TOKEN protects the endpoint."""
+        with patch.dict('os.environ', {'METRICS_TOKEN': 'secret'}):
+            assert client.get('/metrics').status_code == 401
+            assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
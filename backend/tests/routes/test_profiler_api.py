@@ -0,0 +1,31 @@
+import pytest
+from unittest.mock import patch
+
+
+class TestProfilerAPI:
+    """Tests for the profiler endpoint."""
+
+    def test_requires_store_auth(self, client):
+        """Test that the endpoint uses the store authentication token."""
+        with patch.dict('os.environ', {'STORE_AUTH_SID': 'store-secret'}):
+            assert client.post('/api/profiler/profile', data={}).status_code == 400
+            assert client.post('/api/profiler/profile', data={'store_auth_sid': 'wrong'}).status_code == 401
+
+    def test_rejects_invalid_parameters(self, client):
+        """Test that the duration and rate are bounded."""
+        with patch.dict('os.environ', {'STORE_AUTH_SID': 'store-secret'}):
+            for form in ({'seconds': '120'}, {'seconds': '0'}, {'rate_hz': '10000'}, {'seconds': 'abc'}):
+                response = client.post('/api/profiler/profile', data={'store_auth_sid': 'store-secret', **form})
+                assert response.status_code == 400
+
+    def test_profile(self, client):
+        """Test that a profile is returned as collapsed stacks."""
+        with patch.dict('os.environ', {'STORE_AUTH_SID': 'store-secret'}):
+            response = client.post('/api/profiler/profile', data={'store_auth_sid': 'store-secret', 'seconds': '0.1', 'rate_hz': '50'})
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert int(response.headers['X-Profile-Samples']) > 0
+        for line in response.get_data(as_text=True).splitlines():
+            stack, count = line.rsplit(' ', 1)
+            assert stack.split(';')[0]
+            assert int(count) > 0
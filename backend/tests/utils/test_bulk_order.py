@@ -0,0 +1,57 @@
+import io
+import json
+
+import pytest
+
+from utils.bulk_order import BulkLimits, BulkOrderError, read_bulk_order
+
+ORDER = {"customer_name": "Ann", "phone_number": "5551234567"}
+ITEMS = [{"type": "Drink", "quantity": n, "name": "Coke", "size": "Regular"} for n in range(1, 4)]
+
+
+def _read(body, mimetype, limits=BulkLimits()):
+    order, items = read_bulk_order(io.BytesIO(body.encode()), mimetype, limits)
+    return order, list(items)
+
+
+def test_read_ndjson():
+    body = "\n".join(json.dumps(value) for value in [ORDER, *ITEMS]) + "\n\n"
+    order, items = _read(body, "application/x-ndjson")
+    assert order == ORDER
+    assert items == [(f"Line {n}", item) for n, item in enumerate(ITEMS, start=2)]
+
+
+def test_read_json_across_chunks():
+    # Spread the values over many reads, splitting numbers and multi-byte characters
+    order = {**ORDER, "customer_name": "Zoë " * 2500, "order_price": 1234567.25}
+    body = json.dumps({"order": order, "items": ITEMS}, ensure_ascii=False, indent=2)
+    assert _read(body, "application/json") == (order, [(f"Item {n}", item) for n, item in enumerate(ITEMS, start=1)])
+    assert _read(json.dumps({"order": ORDER, "items": []}), "application/json") == (ORDER, [])
+
+
+@pytest.mark.parametrize("body, mimetype, message", [
+    ('{"customer_name": "Ann"}\n{"type": \n', "application/x-ndjson", "Line 2 is not valid JSON"),
+    ('{"customer_name": "Ann"}\n[1]\n', "application/x-ndjson", "Line 2 must be a JSON object"),
+    ('[]', "application/x-ndjson", "The order must be a JSON object"),
+    ('', "application/x-ndjson", "empty"),
+    ('{"items": [], "order": {}}', "application/json", 'Expected "order"'),
+    ('{"order": {}, "items": [{"type": "Drink"}, ]}', "application/json", "not valid JSON"),
+    ('{"order": {}, "items": []} {}', "application/json", "Unexpected data"),
+])
+def test_malformed_body(body, mimetype, message):
+    with pytest.raises(BulkOrderError, match=message) as excinfo:
+        _read(body, mimetype)
+    assert excinfo.value.status == 400
+
+
+def test_limits():
+    body = "\n".join(json.dumps(value) for value in [ORDER, *ITEMS])
+    with pytest.raises(BulkOrderError, match="limited to 2 items") as excinfo:
+        _read(body, "application/x-ndjson", BulkLimits(max_items=2))
+    assert excinfo.value.status == 413
+    with pytest.raises(BulkOrderError, match="too large") as excinfo:
+        _read(body, "application/x-ndjson", BulkLimits(max_bytes=len(body) - 1))
+    assert excinfo.value.status == 413
+    with pytest.raises(BulkOrderError) as excinfo:
+        _read(body, "text/plain")
+    assert excinfo.value.status == 415
@@ -0,0 +1,104 @@
+import pytest
+
+from models.Order import Order
+from utils import cart_quote
+from utils.cart_quote import CartQuote, create_quote, update_quote
+from utils.checkout_api_helper import validate_order_items
+
+COKE = {"type": "Drink", "quantity": 1, "name": "Coke", "size": "Regular"}
+FRIES = {"type": "Side", "quantity": 1, "name": "French Fries"}
+
+
+def test_deltas_only_reprice_changed_lines(app, monkeypatch):
+    quote = CartQuote("main")
+    created = quote.apply([{"op": "add", "item": COKE}, {"op": "add", "item": FRIES}])
+    assert [line["line_id"] for line in created["lines"]] == ["1", "2"]
+
+    validated = []
+    real_validate = cart_quote.validate_order_item
+    monkeypatch.setattr(cart_quote, "validate_order_item", lambda item: validated.append(item) or real_validate(item))
+    result = quote.apply([
+        {"op": "update", "line_id": "1", "item": {**COKE, "quantity": 3}},
+        {"op": "remove", "line_id": "2"},
+        {"op": "add", "item": FRIES},
+    ])
+    assert validated == [{**COKE, "quantity": 3}, FRIES]
+    assert [line["line_id"] for line in result["lines"]] == ["1", "3"]
+    assert result["removed"] == ["2"]
+
+    # Totals match a checkout of the same cart exactly
+    order = validate_order_items([{**COKE, "quantity": 3}, FRIES])
+    assert result["order_price"] == order.total_price()
+    assert result["order_price_with_fee"] == order.total_price_with_fee()
+    assert result["line_count"] == 2
+
+
+def test_invalid_delta_leaves_quote_unchanged(app):
+    quote = CartQuote("main")
+    quote.apply([{"op": "add", "item": COKE}])
+    before = quote.totals()
+    for deltas, message in [
+        ([{"op": "remove", "line_id": "1"}, {"op": "add", "item": {**COKE, "name": "Nope"}}], "Delta 2: Invalid food item"),
+        ([{"op": "update", "line_id": "9", "item": COKE}], "Delta 1: Unknown line 9"),
+        ([{"op": "remove", "line_id": "1"}, {"op": "remove", "line_id": "1"}], "Delta 2: Unknown line 1"),
+        ([{"op": "replace"}], "Delta 1: op must be one of"),
+    ]:
+        with pytest.raises(ValueError, match=message):
+            quote.apply(deltas)
+    assert quote.totals() == before
+    assert list(quote.lines) == ["1"]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def quote_clock(request, app, tmp_path, monkeypatch):
+    """Both quote stores, with a TTL of 60 and a clock the test moves."""
+    now = [0.0]
+    if request.param == "memory":
+        store = cart_quote.MemoryStore(ttl=60, clock=lambda: now[0])
+    else:
+        store = cart_quote.SQLiteStore(str(tmp_path / "quotes.sqlite"), ttl=60, clock=lambda: now[0])
+    monkeypatch.setitem(app.extensions, "quote_store", store)
+    return now
+
+
+def test_quotes_are_per_store_and_expire(quote_clock):
+    now = quote_clock
+    quote_id = create_quote("main", [COKE])["quote_id"]
+    with pytest.raises(KeyError):
+        update_quote("downtown", quote_id, [])
+    now[0] = 50
+    assert update_quote("main", quote_id, [{"op": "add", "item": COKE}])["line_count"] == 2
+    # Each update keeps the quote alive for another TTL
+    now[0] = 100
+    assert update_quote("main", quote_id, [])["line_count"] == 2
+    now[0] = 200
+    with pytest.raises(KeyError):
+        update_quote("main", quote_id, [])
+
+
+def test_order_total_is_independent_of_item_order(app):
+    items = validate_order_items([COKE, FRIES, {**COKE, "quantity": 7}]).items
+    forward, backward = Order(), Order()
+    for item in items:
+        forward.add_item(item)
+    for item in reversed(items):
+        backward.add_item(item)
+    assert forward.total_price() == backward.total_price()
+
+
+def test_sqlite_quotes_are_shared_across_workers(app, tmp_path, monkeypatch):
+    path = str(tmp_path / "quotes.sqlite")
+    monkeypatch.setitem(app.extensions, "quote_store", cart_quote.SQLiteStore(path))
+    created = create_quote("main", [COKE, FRIES])
+    # Another worker process opens the same file
+    monkeypatch.setitem(app.extensions, "quote_store", cart_quote.SQLiteStore(path))
+    result = update_quote("main", created["quote_id"], [{"op": "remove", "line_id": "2"}, {"op": "add", "item": COKE}])
+    assert [line["line_id"] for line in result["lines"]] == ["3"]
+    assert result["order_price"] == validate_order_items([COKE, COKE]).total_price()
+    # An invalid delta is rolled back
+    with pytest.raises(ValueError):
+        update_quote("main", created["quote_id"], [{"op": "remove", "line_id": "1"}, {"op": "remove", "line_id": "9"}])
+    assert update_quote("main", created["quote_id"], [])["line_count"] == 2
+
+    with pytest.raises(ValueError):
+        cart_quote.store_from_url("redis://localhost")
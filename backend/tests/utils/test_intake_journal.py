@@ -0,0 +1,115 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from models.OrderTable import OrderTable
+from utils.intake_journal import IntakeJournal, _segments, apply_order, encode_record, read_records
+from utils.metrics import INTAKE_APPLY_FAILURES
+
+
+def _record(n):
+    return {"intake_id": f"intake{n:04d}", "n": n}
+
+
+def test_read_records_stops_at_corrupt_record(tmp_path):
+    path = tmp_path / "segment.seg"
+    first, second = encode_record(_record(1)), encode_record(_record(2))
+    # A torn third record, as left by a crash mid-write
+    path.write_bytes(first + second + encode_record(_record(3))[:-4])
+    records = list(read_records(str(path)))
+    assert [record for _, record in records] == [_record(1), _record(2)]
+    assert records[-1][0] == len(first) + len(second)
+    assert [record for _, record in read_records(str(path), start=len(first))] == [_record(2)]
+
+    corrupt = bytearray(first + second)
+    corrupt[len(first) + 10] ^= 0xFF
+    path.write_bytes(bytes(corrupt))
+    assert [record for _, record in read_records(str(path))] == [_record(1)]
+
+
+def test_append_applies_in_order_and_rotates(tmp_path):
+    applied = []
+    journal = IntakeJournal(str(tmp_path), lambda record: applied.append(record["n"]) or record["n"], segment_bytes=100)
+    journal.start()
+    receipts = [journal.append(_record(n)) for n in range(10)]
+    assert [receipt.wait(5) for receipt in receipts] == list(range(10))
+    assert applied == list(range(10))
+    # Fully applied segments are deleted, only the one being written remains
+    assert _segments(journal.path) == [journal._segment] and journal._segment > 1
+    assert journal.backlog() == 0
+
+    journal.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_recovery_replays_abandoned_journal(tmp_path):
+    # A worker journals orders and stops before applying them, mid-write of the last one
+    stopped = IntakeJournal(str(tmp_path), lambda record: pytest.fail("not started"), segment_bytes=100)
+    for n in range(4):
+        stopped.append(_record(n))
+    stopped.close()
+    with open(os.path.join(stopped.path, f"{stopped._segment:020d}.seg"), "ab") as f:
+        f.write(encode_record(_record(99))[:10])
+    # Its first record was applied before it stopped
+    first_offset = next(read_records(os.path.join(stopped.path, f"{1:020d}.seg")))[0]
+    IntakeJournal._checkpoint(stopped.path, 1, first_offset)
+
+    applied = []
+    journal = IntakeJournal(str(tmp_path), lambda record: applied.append(record["n"]) or record["n"])
+    journal.start()
+    # Recovery runs before the new journal's own records
+    assert journal.append(_record(4)).wait(5) == 4
+    assert applied == [1, 2, 3, 4]
+    assert os.listdir(tmp_path) == [os.path.basename(journal.path)]
+    journal.close()
+
+
+def test_database_errors_are_retried(tmp_path):
+    attempts = []
+
+    def apply(record):
+        attempts.append(record["n"])
+        if len(attempts) < 3:
+            raise OperationalError("INSERT INTO orders", {}, Exception("database is locked"))
+        return 42
+
+    failures = INTAKE_APPLY_FAILURES.value()
+    journal = IntakeJournal(str(tmp_path), apply)
+    journal.start()
+    assert journal.append(_record(1)).wait(5) == 42
+    assert attempts == [1, 1, 1]
+    assert INTAKE_APPLY_FAILURES.value() == failures + 2
+    journal.close()
+
+
+def test_apply_order_is_idempotent(app, db_session):
+    now = datetime.now(timezone.utc)
+    record = {
+        "intake_id": "0123456789abcdef0123456789abcdef", "store_id": "main",
+        "customer_name": "Ann", "phone_number": "5551234567", "order_items": [],
+        "total_amount": 12.5, "payment_method": "cash", "payment_status": "pending",
+        "payment_intent_id": None, "sms_verification_code": "123456",
+        "created_at": now.isoformat(), "pickup_at": now.isoformat(),
+    }
+    order_id = apply_order(app, record)
+    assert apply_order(app, record) == order_id
+    orders = OrderTable.query.all()
+    assert [order.id for order in orders] == [order_id]
+    assert orders[0].intake_id == record["intake_id"]
+
+
+def test_apply_order_raises_other_integrity_errors(app, db_session):
+    now = datetime.now(timezone.utc)
+    record = {
+        "intake_id": "fedcba9876543210fedcba9876543210", "store_id": "main",
+        "customer_name": None, "phone_number": "5551234567", "order_items": [],
+        "total_amount": 12.5, "payment_method": "cash", "payment_status": "pending",
+        "payment_intent_id": None, "sms_verification_code": "123456",
+        "created_at": now.isoformat(), "pickup_at": now.isoformat(),
+    }
+    # Not a duplicate intake_id: raised, so the applier moves the record to rejected.jsonl
+    with pytest.raises(IntegrityError):
+        apply_order(app, record)
+    assert OrderTable.query.count() == 0
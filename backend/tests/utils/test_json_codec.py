@@ -0,0 +1,41 @@
+import pytest
+import json
+from datetime import datetime, date, timezone
+from utils import json_codec
+from models.Drink import DrinkSize, FountainDrink
+from models.Schema import ComboDrinkSchema
+
+
+class TestJsonCodec:
+    """Test cases for the JSON codec layer."""
+
+    def test_native_types(self):
+        """Test that enums, datetimes and Pydantic models are encoded natively."""
+        payload = {
+            'size': DrinkSize.LARGE,
+            'drink': ComboDrinkSchema(size=DrinkSize.REGULAR, name=FountainDrink.COKE),
+            'created_at': datetime(2025, 8, 25, 15, 0, tzinfo=timezone.utc),
+            'date': date(2025, 8, 25),
+        }
+        assert json_codec.loads(json_codec.dumps(payload)) == {
+            'size': 'Large',
+            'drink': {'quantity': 1, 'name': 'Coke', 'size': 'Regular', 'special_instructions': None},
+            'created_at': '2025-08-25T15:00:00+00:00',
+            'date': '2025-08-25',
+        }
+
+    def test_matches_stdlib_output(self):
+        """Test that the active backend writes the same text as the stdlib fallback."""
+        payload = {'name': "Sour Cream N' Onion", 'price': 4.25, 'items': [1, None, True], 'size': DrinkSize.BOTTLE}
+        stdlib = json.dumps(payload, default=json_codec._default, separators=(",", ":"), ensure_ascii=False)
+        assert json_codec.dumps(payload) == stdlib
+
+    def test_unsupported_type(self):
+        """Test that unknown types are rejected."""
+        with pytest.raises(TypeError):
+            json_codec.dumps({'value': object()})
+
+    def test_invalid_json(self):
+        """Test that invalid JSON raises the backend's decode error."""
+        with pytest.raises(json_codec.JSONDecodeError):
+            json_codec.loads('{"unterminated": ')
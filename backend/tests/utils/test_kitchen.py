@@ -0,0 +1,95 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from db import db
+from models.OrderTable import OrderTable
+from utils import intake_journal, json_codec
+from utils.checkout_api_helper import validate_order_items
+from utils.kitchen import KitchenBoard, item_configuration
+
+STORE_AUTH_SID = os.environ['STORE_AUTH_SID']
+TURKEY = {"type": "Sandwich", "quantity": 1, "size": "Regular", "meat": "Turkey", "bread": "Wheat",
+          "cheese": "American", "toppings": ["Lettuce", "Tomato"]}
+COKE = {"type": "Drink", "quantity": 2, "name": "Coke", "size": "Regular"}
+
+
+def _items(*cart):
+    # Stored items, as the journal applier and the database hand them over
+    return json_codec.loads(json_codec.dumps(validate_order_items(list(cart)).serialized_items()))
+
+
+def test_item_configuration(app):
+    key, configuration = item_configuration(_items(TURKEY)[0])
+    assert configuration["meat"] == "Turkey"
+    assert set(configuration["toppings"]) == {"Lettuce", "Tomato"}
+    assert "quantity" not in configuration and "price" not in configuration
+    # Freshly serialized items, and other quantities, make the same batch
+    assert item_configuration(validate_order_items([{**TURKEY, "quantity": 3}]).serialized_items()[0])[0] == key
+    assert item_configuration(_items({**TURKEY, "toppings": ["Lettuce"]})[0])[0] != key
+
+
+def test_board_batches_and_completes(app):
+    now = datetime(2030, 6, 1, 16, 5, tzinfo=timezone.utc)
+    board = KitchenBoard(clock=lambda: now.timestamp())
+    board.add_order(1, now, _items(TURKEY, COKE))
+    board.add_order(2, now + timedelta(minutes=5), _items({**TURKEY, "quantity": 2}))
+    board.add_order(2, now, _items(TURKEY))
+    board.add_order(3, now + timedelta(minutes=30), _items(TURKEY))
+
+    windows = board.prep_list()
+    assert [window["window_start"] for window in windows] == ["2030-06-01T16:00:00+00:00", "2030-06-01T16:30:00+00:00"]
+    first = windows[0]["batches"]
+    assert [(batch["item"]["type"], batch["quantity"], batch["orders"]) for batch in first] == [
+        ("Sandwich", 3, [1, 2]), ("Drink", 2, [1])]
+
+    board.complete_order(1)
+    first = board.prep_list()[0]["batches"]
+    assert [(batch["quantity"], batch["orders"]) for batch in first] == [(2, [2])]
+    board.complete_order(2)
+    assert len(board.prep_list()) == 1
+
+
+def test_sync_adds_open_and_removes_completed(app):
+    now = datetime.now(timezone.utc)
+    board = KitchenBoard()
+    board.add_order(1, now, _items(TURKEY))
+    board.sync([(1, now, json.dumps(_items(TURKEY))), (2, now, json.dumps(_items(TURKEY)))], [])
+    assert board.watermark == 2
+    assert board.prep_list()[0]["batches"][0]["quantity"] == 2
+    board.sync([], [(1, now.replace(tzinfo=None))])
+    assert board.prep_list()[0]["batches"][0]["orders"] == [2]
+    # Completed here before a read of the order as open
+    board.complete_order(3)
+    board.sync([(3, now, json.dumps(_items(COKE)))], [])
+    assert len(board.prep_list()[0]["batches"]) == 1
+
+
+def test_kitchen_batches_endpoint(app, client, db_session):
+    app.config["KITCHEN_SYNC_INTERVAL"] = 3600
+    now = datetime.now(timezone.utc)
+    # Placed through another worker: only read from the database
+    db.session.add(OrderTable("A", "5551234567", _items(TURKEY), 9.0, "cash", "pending", pickup_at=now))
+    db.session.add(OrderTable("B", "5551234567", _items(TURKEY), 9.0, "card", "failed", pickup_at=now))
+    db.session.commit()
+    response = client.post("/api/get_info/kitchen_batches", data={"store_auth_sid": STORE_AUTH_SID})
+    assert response.status_code == 200
+    batches = response.get_json()["windows"][0]["batches"]
+    assert [(batch["quantity"], batch["orders"]) for batch in batches] == [(1, [1])]
+
+    # Applied by this worker's journal: added without waiting for the next read
+    intake_journal.apply_order(app, {
+        "intake_id": "0123456789abcdef0123456789abcdef", "store_id": "main",
+        "customer_name": "C", "phone_number": "5551234567", "order_items": _items(TURKEY),
+        "total_amount": 9.0, "payment_method": "cash", "payment_status": "pending",
+        "payment_intent_id": None, "sms_verification_code": "123456",
+        "created_at": now.isoformat(), "pickup_at": now.isoformat(),
+    })
+    batches = client.post("/api/get_info/kitchen_batches", data={"store_auth_sid": STORE_AUTH_SID}).get_json()["windows"][0]["batches"]
+    assert [(batch["quantity"], batch["orders"]) for batch in batches] == [(2, [1, 3])]
+
+    assert client.post("/api/close_store/complete_order", data={"store_auth_sid": STORE_AUTH_SID, "order_id": "1"}).status_code == 200
+    batches = client.post("/api/get_info/kitchen_batches", data={"store_auth_sid": STORE_AUTH_SID}).get_json()["windows"][0]["batches"]
+    assert [(batch["quantity"], batch["orders"]) for batch in batches] == [(1, [3])]
+
+    assert client.post("/api/get_info/kitchen_batches", data={"store_auth_sid": "WRONG_SID"}).status_code == 401
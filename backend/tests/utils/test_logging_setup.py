@@ -0,0 +1,78 @@
+import json
+import logging
+
+import pytest
+from utils import logging_setup
+from utils.logging_setup import JsonFormatter, mask_phone, sampled_debug
+
+
+class TestLoggingSetup:
+    """Test cases for the logging pipeline."""
+
+    def test_json_formatter(self):
+        """Test that records become one JSON object with extra fields and tracebacks."""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.getLogger("test").makeRecord(
+                "test", logging.ERROR, __file__, 1, "Order %s failed", (42,), logging.sys.exc_info(),
+                extra={"order_id": 42})
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry["level"] == "ERROR"
+        assert entry["logger"] == "test"
+        assert entry["message"] == "Order 42 failed"
+        assert entry["order_id"] == 42
+        assert "ValueError: boom" in entry["exc"]
+
+    def test_records_written_through_listener(self, tmp_path, monkeypatch):
+        """Test that records are written to the rotating file by the listener thread."""
+        monkeypatch.setenv("LOG_DIR", str(tmp_path))
+        logging_setup.configure_logging()
+        logging.getLogger("routes.checkout_api").info("Order created", extra={"order_id": 7})
+        logging_setup._stop_listener()
+
+        lines = (tmp_path / logging_setup.LOG_FILE_NAME).read_text().splitlines()
+        entries = [json.loads(line) for line in lines]
+        assert [entry["order_id"] for entry in entries if entry["message"] == "Order created"] == [7]
+
+    def test_reconfigure_does_not_duplicate_handlers(self):
+        """Test that configuring twice leaves a single queue handler on the root logger."""
+        logging_setup.configure_logging()
+        logging_setup.configure_logging()
+        queue_handlers = [h for h in logging.getLogger().handlers if isinstance(h, logging_setup.RequestQueueHandler)]
+        assert len(queue_handlers) == 1
+
+    def test_request_id(self, client):
+        """Test that request ids are generated, echoed and sanitized."""
+        generated = client.get('/api/get_info/get_category').headers['X-Request-ID']
+        assert len(generated) == 32
+
+        response = client.get('/api/get_info/get_category', headers={'X-Request-ID': 'lb-1234.abc'})
+        assert response.headers['X-Request-ID'] == 'lb-1234.abc'
+
+        response = client.get('/api/get_info/get_category', headers={'X-Request-ID': 'bad id;<x>'})
+        assert response.headers['X-Request-ID'] != 'bad id;<x>'
+
+    def test_request_id_added_to_records(self, app):
+        """Test that records logged in a request carry its id."""
+        handler = logging_setup.RequestQueueHandler(logging_setup.queue.Queue())
+        with app.test_request_context(headers={'X-Request-ID': 'req-1'}):
+            logging_setup._assign_request_id()
+            record = handler.prepare(logging.makeLogRecord({"msg": "hello %s", "args": ("world",)}))
+        assert record.request_id == "req-1"
+        assert record.msg == "hello world"
+
+    @pytest.mark.parametrize("rate, expected", [(0.0, 0), (1.0, 5)])
+    def test_sampled_debug(self, monkeypatch, caplog, rate, expected):
+        """Test that payload dumps are written for the configured fraction of calls."""
+        monkeypatch.setattr(logging_setup, "_payload_sample_rate", rate)
+        logger = logging.getLogger("test.sampled")
+        with caplog.at_level(logging.DEBUG, logger="test.sampled"):
+            for _ in range(5):
+                sampled_debug(logger, "payload", item_data={"quantity": 1})
+        assert len([r for r in caplog.records if r.name == "test.sampled"]) == expected
+
+    def test_mask_phone(self):
+        """Test that only the last four digits of phone numbers are logged."""
+        assert mask_phone("5551234567") == "******4567"
+        assert mask_phone("12") == "12"
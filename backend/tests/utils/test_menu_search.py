@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from models.Hotdog import HotDogTopping
+from models.Sandwich import SandwichMeat, SandwichSize
+from utils.menu_search import MAX_LIMIT, MENU_INDEX, normalize, search
+
+
+def _names(query, **kwargs):
+    return [result["name"] for result in search(query, **kwargs)]
+
+
+def test_every_option_is_indexed():
+    names = {(entry.category, entry.name) for entry in MENU_INDEX.entries}
+    assert all(("Sandwich", meat.value) in names for meat in SandwichMeat)
+    assert all(("Hotdog", topping.value) in names for topping in HotDogTopping)
+    # Sizes are not search results
+    assert not any(entry.name == SandwichSize.LARGE.value for entry in MENU_INDEX.entries)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("pastrami", "Hot Pastrami"),
+    ("PASTR", "Hot Pastrami"),
+    ("hot past", "Hot Pastrami"),
+    ("pastrmi", "Hot Pastrami"),
+    ("jalapeño", "Jalapeno"),
+    ("dr pep", "Dr Pepper"),
+])
+def test_search_ranks_best_match_first(query, expected):
+    assert _names(query)[0] == expected
+
+
+def test_search_results():
+    jalap = search("jalap", limit=MAX_LIMIT)
+    assert {result["category"] for result in jalap} == {"Hotdog", "Sandwich", "Salad", "Side"}
+    assert next(result for result in jalap if result["name"] == "Jalapeno Kettle Chips")["price"] == "1.75"
+    assert search("hot pastrami")[0]["price"] == {"Regular": "7.00", "Large": "8.50"}
+    # Exact words rank above longer words starting with them
+    assert _names("cheese")[0] == "Cheese"
+    assert _names("pastrami sprite") == _names("") == _names("zzzz") == []
+    assert len(_names("e", limit=3)) == 3
+    assert "Hotdog" not in {result["category"] for result in search("jalap", exclude_categories=frozenset({"Hotdog"}))}
+    assert normalize("Jalapeño") == "jalapeno"
+
+
+def test_search_is_fast():
+    start = time.perf_counter()
+    for _ in range(100):
+        search("hot pastr")
+        search("pastrmi")
+    assert (time.perf_counter() - start) / 200 < 0.001
+
+
+def test_search_endpoint(client):
+    response = client.get("/api/get_info/search?q=pastr&limit=1")
+    assert response.status_code == 200
+    assert response.get_json() == {"query": "pastr", "results": [
+        {"name": "Hot Pastrami", "category": "Sandwich", "option": "Meat", "price": {"Regular": "7.00", "Large": "8.50"}}]}
+    assert client.get("/api/get_info/search?q=pastr&limit=26").status_code == 400
+    assert client.get("/api/get_info/search?q=pastr&limit=%C2%B2").status_code == 400
+    assert client.get("/api/get_info/search?q=" + "a" * 65).status_code == 400
+    assert client.get("/api/get_info/search").get_json()["results"] == []
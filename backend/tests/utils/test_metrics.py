@@ -0,0 +1,46 @@
+import pytest
+from utils.metrics import Counter, Gauge, Histogram, Registry, stage, STAGE_DURATION
+
+
+class TestMetrics:
+    """Test cases for the in-process metrics."""
+
+    def test_counter_and_gauge_render(self):
+        """Test the Prometheus text of counters and gauges."""
+        registry = Registry()
+        counter = registry.register(Counter("orders_total", "Orders.", ["payment_method"]))
+        gauge = registry.register(Gauge("in_flight", "In flight."))
+        counter.inc(payment_method="card")
+        counter.inc(2, payment_method="card")
+        gauge.inc()
+        text = registry.render()
+        assert "# TYPE orders_total counter" in text
+        assert 'orders_total{payment_method="card"} 3' in text
+        assert "in_flight 1" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets, sum and count are rendered cumulatively."""
+        histogram = Histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0))
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.5, route="/a")
+        histogram.observe(5, route="/a")
+        lines = histogram.render()
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'latency_seconds_count{route="/a"} 3' in lines
+
+    def test_labels_are_checked_and_escaped(self):
+        """Test that wrong label sets are rejected and values escaped."""
+        counter = Counter("c_total", "C.", ["name"])
+        with pytest.raises(ValueError):
+            counter.inc(other="x")
+        counter.inc(name='a"b')
+        assert 'c_total{name="a\\"b"} 1' in counter.render()
+
+    def test_stage_outside_request(self):
+        """Test that stages can be timed outside a request."""
+        before = STAGE_DURATION.count(route="none", stage="unit")
+        with stage("unit"):
+            pass
+        assert STAGE_DURATION.count(route="none", stage="unit") == before + 1
@@ -0,0 +1,51 @@
+import pytest
+import json
+from utils import order_items_codec
+from utils.checkout_api_helper import validate_order_items, serialize_food_item
+
+SAMPLE_CART = [
+    {'type': 'Sandwich', 'quantity': 1, 'size': 'Regular', 'meat': 'Half Hot Pastrami Half Corned Beef',
+     'bread': 'Rye', 'cheese': 'Swiss', 'toppings': ['Tomato', 'Lettuce'], 'add_ons': ['Cheese']},
+    {'type': 'Hotdog', 'quantity': 2, 'dog_type': 'Beef (100%)', 'toppings': ['Mustard', 'Chili'],
+     'special_instructions': 'Extra chili, well done'},
+    {'type': 'Side', 'quantity': 1, 'name': 'Chips', 'chips_type': 'Lays BBQ'},
+    {'type': 'Drink', 'quantity': 1, 'name': 'Coke', 'size': 'Large'},
+    {'type': 'Combo', 'quantity': 1, 'side': {'name': 'French Fries'}, 'drink': {'name': 'Sprite', 'size': 'Regular'}},
+]
+
+
+def serialized_cart():
+    order = validate_order_items(SAMPLE_CART)
+    return [serialize_food_item(item) for item in order.items]
+
+
+class TestOrderItemsCodec:
+    """Test cases for the order items storage encodings."""
+
+    def test_compact_roundtrip_matches_json(self):
+        """Test that compact items decode to exactly what the JSON encoding stores."""
+        items = serialized_cart()
+        compact = order_items_codec.dumps(items, 'compact')
+        assert compact.startswith(order_items_codec.COMPACT_PREFIX)
+        assert order_items_codec.loads(compact) == json.loads(order_items_codec.dumps(items, 'json'))
+
+    def test_compact_is_smaller(self):
+        """Test that the compact encoding is several times smaller than JSON."""
+        items = serialized_cart()
+        assert len(order_items_codec.dumps(items, 'compact')) * 3 < len(order_items_codec.dumps(items, 'json'))
+
+    def test_legacy_items_roundtrip(self):
+        """Test that items not matching the current layouts are stored generically."""
+        legacy = [
+            {'type': 'Hotdog', 'price': 3.5, '_dog_type': 'Beef (100%)', '_toppings': ['Mustard'], '_quantity': 1},
+            {'type': 'Unknown', 'price': 1.005, 'note': 'x', 'count': -2},
+        ]
+        assert order_items_codec.loads(order_items_codec.dumps(legacy, 'compact')) == legacy
+
+    def test_encoding_detection(self):
+        """Test that both encodings are recognized when loading."""
+        assert order_items_codec.encoding_of('[]') == 'json'
+        assert order_items_codec.encoding_of(order_items_codec.dumps([], 'compact')) == 'compact'
+        assert order_items_codec.loads('[]') == []
+        with pytest.raises(ValueError):
+            order_items_codec.dumps([], 'xml')
@@ -0,0 +1,131 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from db import db
+from models.OrderTable import OrderTable
+from utils import intake_journal, json_codec
+from utils.checkout_api_helper import validate_order_items
+from utils.popularity import CATEGORY_GROUP, PopularityTracker, SpaceSaving, item_counts
+
+PASTRAMI = {"type": "Sandwich", "quantity": 2, "size": "Regular", "meat": "Hot Pastrami", "bread": "Rye",
+            "cheese": "Swiss", "toppings": ["Mustard"], "add_ons": ["Cheese"]}
+COMBO = {"type": "Combo", "quantity": 1, "side": {"name": "French Fries"}, "drink": {"name": "Coke", "size": "Regular"}}
+
+
+def _items(*cart):
+    # Stored items, as the journal applier and the database hand them over
+    return json_codec.loads(json_codec.dumps(validate_order_items(list(cart)).serialized_items()))
+
+
+def test_space_saving_keeps_heavy_hitters():
+    sketch = SpaceSaving(capacity=3)
+    for n in range(100):
+        sketch.add("Ham")
+        sketch.add(f"rare {n}")
+    assert len(sketch.counts) == 3
+    assert sketch.top(1) == [("Ham", 100)]
+
+
+def test_item_counts(app):
+    counts = list(item_counts(_items(PASTRAMI, COMBO)))
+    # Freshly serialized items, with enums and schemas, count the same
+    assert list(item_counts(validate_order_items([PASTRAMI, COMBO]).serialized_items())) == counts
+    assert (CATEGORY_GROUP, "Sandwich", 2) in counts
+    assert (("Sandwich", "Meat"), "Hot Pastrami", 2) in counts
+    assert (("Sandwich", "Toppings"), "Mustard", 2) in counts
+    assert (("Sandwich", "Add Ons"), "Cheese", 2) in counts
+    assert (("Combo", "Side"), "French Fries", 1) in counts
+    assert (("Combo", "Drink"), "Coke", 1) in counts
+
+
+def test_windows(app):
+    # 15:00 Eastern
+    now = [datetime(2030, 6, 1, 19, 0, tzinfo=timezone.utc).timestamp()]
+    tracker = PopularityTracker(clock=lambda: now[0])
+    placed = datetime.fromtimestamp(now[0], timezone.utc)
+    tracker.record(1, placed, _items(PASTRAMI))
+    tracker.record(2, placed - timedelta(hours=2), _items(COMBO))
+    assert tracker.top("hour", 5)["categories"] == [{"name": "Sandwich", "count": 2}]
+    assert tracker.top("today", 5)["categories"] == [{"name": "Sandwich", "count": 2}, {"name": "Combo", "count": 1}]
+    assert tracker.top("today", 5, ["Sandwich"])["options"]["Sandwich"]["Meat"] == [{"name": "Hot Pastrami", "count": 2}]
+    assert set(tracker.top("today", 5, ["Sandwich"])["options"]) == {"Sandwich"}
+
+    now[0] += 3600
+    assert tracker.top("hour", 5)["categories"] == []
+    assert len(tracker.top("today", 5)["categories"]) == 2
+    # Midnight Eastern starts a new day
+    now[0] += 8 * 3600
+    assert tracker.top("today", 5)["categories"] == []
+
+
+def test_sync_skips_orders_already_counted(app):
+    tracker = PopularityTracker()
+    placed = datetime.now(timezone.utc)
+    tracker.record(1, placed, _items(PASTRAMI))
+    tracker.sync([(1, placed, json.dumps(_items(PASTRAMI))), (2, placed, json.dumps(_items(COMBO)))])
+    assert tracker.watermark == 2
+    assert tracker.top("today", 5)["categories"] == [{"name": "Sandwich", "count": 2}, {"name": "Combo", "count": 1}]
+    tracker.record(2, placed, _items(COMBO))
+    assert tracker.top("today", 5)["categories"][1] == {"name": "Combo", "count": 1}
+
+
+def test_popular_endpoint(app, client, db_session):
+    app.config["POPULAR_SYNC_INTERVAL"] = 3600
+    # Placed through another worker: only read from the database
+    db.session.add(OrderTable("A", "5551234567", _items(PASTRAMI), 18.0, "cash", "pending"))
+    db.session.commit()
+    response = client.get("/api/get_info/popular?category=Sandwich&k=1")
+    assert response.status_code == 200
+    assert response.get_json() == {"window": "today", "categories": [{"name": "Sandwich", "count": 2}],
+                                   "options": {"Sandwich": {"Meat": [{"name": "Hot Pastrami", "count": 2}],
+                                                            "Bread": [{"name": "Rye", "count": 2}],
+                                                            "Cheese": [{"name": "Swiss", "count": 2}],
+                                                            "Toppings": [{"name": "Mustard", "count": 2}],
+                                                            "Add Ons": [{"name": "Cheese", "count": 2}]}}}
+
+    # Applied by this worker's journal: counted without waiting for the next read
+    now = datetime.now(timezone.utc).isoformat()
+    intake_journal.apply_order(app, {
+        "intake_id": "0123456789abcdef0123456789abcdef", "store_id": "main",
+        "customer_name": "B", "phone_number": "5551234567", "order_items": _items(COMBO),
+        "total_amount": 4.25, "payment_method": "cash", "payment_status": "pending",
+        "payment_intent_id": None, "sms_verification_code": "123456", "created_at": now, "pickup_at": now,
+    })
+    categories = client.get("/api/get_info/popular?window=hour").get_json()["categories"]
+    assert categories == [{"name": "Sandwich", "count": 2}, {"name": "Combo", "count": 1}]
+
+    assert client.get("/api/get_info/popular?window=week").status_code == 400
+    assert client.get("/api/get_info/popular?k=0").status_code == 400
+    assert client.get("/api/get_info/popular?k=%C2%B2").status_code == 400
+    assert client.get("/api/get_info/popular?category=Pizza").status_code == 400
+
+
+def test_space_saving_evicts_the_smallest_counter():
+    sketch = SpaceSaving(capacity=3)
+    for name, weight in [("Ham", 5), ("Turkey", 3), ("BLT", 1), ("Ham", 2), ("Tuna", 1), ("Club", 1)]:
+        sketch.add(name, weight)
+    # "Tuna" replaced "BLT" (1), then "Club" replaced "Tuna" (2)
+    assert sketch.counts == {"Ham": 7, "Turkey": 3, "Club": 3}
+    for n in range(1000):
+        sketch.add("Ham")
+    # Outdated heap entries are dropped, not kept per add
+    assert len(sketch._heap) <= 4 * sketch.capacity + 1
+    sketch.add("Reuben")
+    # Ties evict the smallest name first
+    assert set(sketch.counts) == {"Ham", "Reuben", "Turkey"}
+
+
+def test_hour_sum_follows_new_orders(app):
+    now = [datetime(2030, 6, 1, 19, 0, tzinfo=timezone.utc).timestamp()]
+    tracker = PopularityTracker(clock=lambda: now[0])
+    placed = datetime.fromtimestamp(now[0], timezone.utc)
+    tracker.record(1, placed, _items(PASTRAMI))
+    assert tracker.top("hour", 5)["categories"] == [{"name": "Sandwich", "count": 2}]
+    # Counted into the summed hour too, without rebuilding it
+    tracker.record(2, placed, _items(PASTRAMI))
+    assert tracker.top("hour", 5)["categories"] == [{"name": "Sandwich", "count": 4}]
+    # The first bucket expires, the sum is rebuilt from the rest
+    now[0] += 55 * 60
+    tracker.record(3, datetime.fromtimestamp(now[0], timezone.utc), _items(COMBO))
+    now[0] += 10 * 60
+    assert tracker.top("hour", 5)["categories"] == [{"name": "Combo", "count": 1}]
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+from utils import profiler
+
+
+def busy_wait_for_profiler(stop):
+    while not stop.is_set():
+        pass
+
+
+class TestProfiler:
+    """Test cases for the sampling profiler."""
+
+    def test_sample_collects_thread_stacks(self):
+        """Test that other threads' stacks are sampled and the caller is not."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_wait_for_profiler, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            profile = profiler.sample(seconds=0.2, rate_hz=100)
+        finally:
+            stop.set()
+            worker.join()
+
+        assert 5 <= profile.samples <= 25
+        busy = [(stack, count) for stack, count in profile.stacks.items() if stack[0] == "busy-worker"]
+        assert busy
+        assert all("test_profiler.py:busy_wait_for_profiler" in stack for stack, _ in busy)
+        assert not any("test_profiler.py:test_sample_collects_thread_stacks" in stack for stack in profile.stacks)
+
+    def test_collapsed_format(self):
+        """Test the collapsed-stack rendering, most sampled stack first."""
+        profile = profiler.Profile()
+        profile.stacks[("MainThread", "a.py:main", "b.py:leaf")] += 3
+        profile.stacks[("MainThread", "a.py:main")] += 1
+        assert profile.collapsed() == "MainThread;a.py:main;b.py:leaf 3\nMainThread;a.py:main 1\n"
+
+    def test_max_depth(self):
+        """Test that only the innermost frames are kept for deep stacks."""
+        profile = profiler.sample(seconds=0.05, rate_hz=50, max_depth=2)
+        assert all(len(stack) <= 3 for stack in profile.stacks)
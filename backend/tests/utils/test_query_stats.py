@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+from unittest.mock import patch
+from models.StoreCloseDateTable import StoreClosedDateTable
+from utils import query_stats
+from utils.metrics import DB_QUERY_BUDGET_EXCEEDED, DB_REPEATED_QUERIES
+
+
+class TestQueryStats:
+    """Test cases for per-request SQL statement accounting."""
+
+    def test_record_tracks_slowest(self):
+        """Test that totals, the slowest statement and repeats are tracked."""
+        stats = query_stats.QueryStats()
+        stats.record("SELECT 1", 0.002)
+        stats.record("SELECT 2", 0.005)
+        stats.record("SELECT 1", 0.001)
+        assert stats.count == 3
+        assert stats.duration == pytest.approx(0.008)
+        assert stats.slowest_statement == "SELECT 2"
+        assert stats.most_repeated() == ("SELECT 1", 2)
+        assert stats.server_timing() == 'db;dur=8.00;desc="3 queries"'
+
+    def test_server_timing_header(self, client):
+        """Test that the statements of a request are reported in Server-Timing."""
+        response = client.get('/api/get_info/get_store_close_date')
+        assert response.headers['Server-Timing'].startswith('db;dur=')
+        assert 'desc="1 query"' in response.headers['Server-Timing']
+
+        response = client.get('/api/get_info/get_category')
+        assert 'desc="0 queries"' in response.headers['Server-Timing']
+
+    def test_budget_and_repeats_are_reported(self, app, caplog):
+        """Test that requests over the query budget or repeating a query log a warning."""
+        @app.route('/test/n_plus_one')
+        def n_plus_one():
+            for _ in range(3):
+                StoreClosedDateTable.query.all()
+            return 'ok'
+
+        route = '/test/n_plus_one'
+        exceeded = DB_QUERY_BUDGET_EXCEEDED.value(route=route)
+        repeated = DB_REPEATED_QUERIES.value(route=route)
+        with patch.dict('os.environ', {'QUERY_BUDGET': '2', 'QUERY_REPEAT_LIMIT': '3'}), \
+                caplog.at_level(logging.WARNING, logger='utils.query_stats'):
+            app.test_client().get(route)
+
+        assert DB_QUERY_BUDGET_EXCEEDED.value(route=route) == exceeded + 1
+        assert DB_REPEATED_QUERIES.value(route=route) == repeated + 1
+        messages = [record.getMessage() for record in caplog.records]
+        assert any('ran 3 queries (budget 2)' in message for message in messages)
+        assert any('same query 3 times' in message for message in messages)
@@ -0,0 +1,57 @@
+import pytest
+from utils.rate_limit import ConcurrencyLimit, MemoryBackend, Rate, SQLiteBackend, backend_from_url
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimit:
+    """Test cases for the token buckets and the concurrency limit."""
+
+    def test_bucket_refills_over_time(self):
+        """Test that a bucket allows a burst, then one request per refill interval."""
+        clock = FakeClock()
+        backend = MemoryBackend(clock=clock)
+        rate = Rate(3, 60)
+        assert [backend.consume('k', rate) for _ in range(3)] == [0, 0, 0]
+        assert backend.consume('k', rate) == pytest.approx(20)
+        clock.now = 19
+        assert backend.consume('k', rate) == pytest.approx(1)
+        clock.now = 20
+        assert backend.consume('k', rate) == 0
+        # Other keys have their own bucket
+        assert backend.consume('other', rate) == 0
+
+    def test_memory_backend_is_bounded(self):
+        """Test that the least recently used buckets are dropped."""
+        backend = MemoryBackend(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            backend.consume(key, Rate(1, 60))
+        assert list(backend._buckets) == ['b', 'c']
+
+    def test_sqlite_backend_shares_buckets(self, tmp_path):
+        """Test that two backends on one file share bucket state, as workers do."""
+        path = str(tmp_path / 'limits.sqlite')
+        first, second = SQLiteBackend(path), backend_from_url(f'sqlite:///{path}')
+        rate = Rate(2, 60)
+        assert first.consume('k', rate) == 0
+        assert second.consume('k', rate) == 0
+        assert first.consume('k', rate) > 0
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend setting is rejected."""
+        with pytest.raises(ValueError):
+            backend_from_url('redis://localhost')
+
+    def test_concurrency_limit(self):
+        """Test that slots are refused once all are taken and reusable after release."""
+        limit = ConcurrencyLimit(1)
+        assert limit.try_acquire()
+        assert not limit.try_acquire()
+        limit.release()
+        assert limit.try_acquire()
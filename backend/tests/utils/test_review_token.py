@@ -0,0 +1,54 @@
+import pytest
+
+from utils import json_codec, review_token
+from utils.checkout_api_helper import validate_order_items
+from utils.metrics import REVIEW_TOKENS
+
+CART = [
+    {"type": "Drink", "quantity": 2, "name": "Coke", "size": "Large"},
+    {"type": "Hotdog", "quantity": 1, "dog_type": "Turkey", "toppings": ["Mustard"]},
+]
+
+
+@pytest.fixture
+def context(app):
+    with app.test_request_context():
+        yield app
+
+
+def _issue(cart=CART, card_payment=False, now=1000):
+    return review_token.issue_token(cart, validate_order_items(cart), card_payment, now=now)
+
+
+def test_token_round_trip(context):
+    issued = _issue(card_payment=True)
+    assert issued["expires_at"] == 1000 + context.config["REVIEW_TOKEN_TTL"]
+    reviewed = review_token.verify_token(issued["review_token"], CART, card_payment=True, now=1001)
+    order = validate_order_items(CART)
+    assert reviewed.total_price() == order.total_price()
+    assert reviewed.total_price_with_fee() == order.total_price_with_fee()
+    # The items are stored exactly as if they had been validated again
+    assert json_codec.dumps(reviewed.serialized_items()) == json_codec.dumps(order.serialized_items())
+
+
+def test_stale_or_forged_tokens_are_ignored(context, monkeypatch):
+    token = _issue()["review_token"]
+    version, body, signature = token.split(".")
+    stale = REVIEW_TOKENS.value(result="stale")
+    invalid = REVIEW_TOKENS.value(result="invalid")
+
+    assert review_token.verify_token(token, [CART[1], CART[0]], card_payment=False, now=1001) is None
+    assert review_token.verify_token(token, CART, card_payment=True, now=1001) is None
+    assert review_token.verify_token(token, CART, card_payment=False, now=1000 + 10 ** 6) is None
+    monkeypatch.setattr(review_token, "_PRICES_DIGEST", "menu changed")
+    assert review_token.verify_token(token, CART, card_payment=False, now=1001) is None
+    assert REVIEW_TOKENS.value(result="stale") == stale + 4
+
+    monkeypatch.undo()
+    tampered = f"{version}.{review_token._encode(b'{}')}.{signature}"
+    for bad in [tampered, token[:-2], "not a token", f"r0.{body}.{signature}"]:
+        assert review_token.verify_token(bad, CART, card_payment=False, now=1001) is None
+    assert REVIEW_TOKENS.value(result="invalid") == invalid + 4
+
+    context.config["REVIEW_TOKEN_SECRET"] = "another secret"
+    assert review_token.verify_token(token, CART, card_payment=False, now=1001) is None
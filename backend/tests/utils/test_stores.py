@@ -0,0 +1,163 @@
+import json
+import os
+from datetime import date
+
+import pytest
+from flask import g
+from sqlalchemy import event, select
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from cli import migrate_schema
+from db import db
+from models.OrderTable import OrderTable
+from models.StoreCloseDateTable import StoreClosedDateTable
+from utils import stores
+from utils.checkout_api_helper import validate_and_create_food_item
+
+STORE_AUTH_SID = os.environ['STORE_AUTH_SID']
+
+
+@pytest.fixture
+def multi_store_app(tmp_path, monkeypatch):
+    """An app with a ``downtown`` store that does not sell hotdogs, each store on its own SQLite file."""
+    catalog = tmp_path / "catalog.json"
+    catalog.write_text(json.dumps({"downtown": {"disabled_categories": ["Hotdog"]}}))
+    monkeypatch.setenv("STORES", "downtown")
+    monkeypatch.setenv("STORE_DATABASE_URL_TEMPLATE", f"sqlite:///{tmp_path}/store_{{store_id}}.sqlite")
+    monkeypatch.setenv("STORE_CATALOG_FILE", str(catalog))
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "0")
+    monkeypatch.setenv("INTAKE_JOURNAL_DIR", str(tmp_path / "journal"))
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        migrate_schema()
+        yield app
+        journal = app.extensions.pop("intake_journal", None)
+        if journal is not None:
+            journal.close()
+        for store in stores.all_stores().values():
+            with stores.store_context(store.store_id, app):
+                db.drop_all(bind_key=store.bind_key)
+        # Forget this app's binds, or the next app's create_all() looks for them
+        for bind_key in [key for key in db.metadatas if key is not None]:
+            del db.metadatas[bind_key]
+
+
+def _add_order(name, total, payment_method="cash"):
+    order = OrderTable(name, "5551234567", [], total, payment_method, "succeeded")
+    db.session.add(order)
+    db.session.commit()
+    return order
+
+
+def test_load_stores(monkeypatch):
+    monkeypatch.setenv("STORES", "downtown, airport,downtown")
+    monkeypatch.setenv("STORE_AIRPORT_DATABASE_URL", "postgresql://db/airport")
+    monkeypatch.delenv("STORE_DATABASE_URL_TEMPLATE", raising=False)
+    monkeypatch.delenv("STORE_CATALOG_FILE", raising=False)
+    loaded = stores.load_stores("sqlite:///db.sqlite")
+    assert list(loaded) == ["main", "downtown", "airport"]
+    assert loaded["main"] == stores.Store("main", "sqlite:///db.sqlite", None, frozenset(),
+                                          "sqlite:///file:db.sqlite?mode=ro&uri=true", "store_main_read")
+    assert loaded["downtown"].database_url == "sqlite:///store_downtown.sqlite"
+    assert loaded["downtown"].bind_key == "store_downtown"
+    assert loaded["airport"].database_url == "postgresql://db/airport"
+    # No read-only engine for server databases without a read URL
+    assert loaded["airport"].read_bind_key is None
+
+    monkeypatch.setenv("STORE_AIRPORT_READ_DATABASE_URL", "postgresql://replica/airport")
+    assert stores.load_stores("sqlite:///db.sqlite")["airport"].read_database_url == "postgresql://replica/airport"
+
+    monkeypatch.setenv("STORES", "Down Town")
+    with pytest.raises(ValueError):
+        stores.load_stores("sqlite:///db.sqlite")
+
+
+def test_orders_and_closed_dates_are_per_store(multi_store_app):
+    with stores.store_context("main"):
+        _add_order("Main Customer", 10.0)
+        db.session.add(StoreClosedDateTable(date(2030, 1, 2)))
+        db.session.commit()
+    with stores.store_context("downtown"):
+        order = _add_order("Downtown Customer", 7.5)
+        assert order.store_id == "downtown"
+        assert [o.customer_name for o in OrderTable.query.all()] == ["Downtown Customer"]
+        assert not StoreClosedDateTable.is_closed_on(date(2030, 1, 2))
+    with stores.store_context("main"):
+        assert [o.customer_name for o in OrderTable.query.all()] == ["Main Customer"]
+        assert StoreClosedDateTable.is_closed_on(date(2030, 1, 2))
+
+
+def test_disabled_categories(multi_store_app):
+    client = multi_store_app.test_client()
+    assert "Hotdog" in client.get("/api/get_info/get_category").get_json()
+    assert "Hotdog" not in client.get("/api/get_info/get_category", headers={"X-Store-ID": "downtown"}).get_json()
+    assert "Hotdog" not in client.get("/api/get_info/get_menu?store_id=downtown").get_json()
+
+    hotdog = {"quantity": 1, "dog_type": "Turkey", "toppings": []}
+    with stores.store_context("main"):
+        assert validate_and_create_food_item("Hotdog", hotdog) is not None
+    with stores.store_context("downtown"):
+        with pytest.raises(ValueError, match="not available at this store"):
+            validate_and_create_food_item("Hotdog", hotdog)
+
+
+def test_unknown_store(multi_store_app):
+    response = multi_store_app.test_client().get("/api/get_info/get_category", headers={"X-Store-ID": "nowhere"})
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Unknown store: nowhere"}
+
+
+def test_stores_report(multi_store_app):
+    with stores.store_context("main"):
+        _add_order("A", 10.0, "cash")
+        _add_order("B", 5.25, "card")
+    with stores.store_context("downtown"):
+        _add_order("C", 7.5, "card")
+
+    client = multi_store_app.test_client()
+    assert client.post("/api/get_info/get_stores_report").status_code == 400
+    response = client.post("/api/get_info/get_stores_report", data={"store_auth_sid": STORE_AUTH_SID})
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["stores"]["main"]["orders"] == 2
+    assert report["stores"]["main"]["by_payment_method"]["card"] == {"orders": 1, "revenue": 5.25}
+    assert report["stores"]["downtown"] == {"orders": 1, "revenue": 7.5,
+                                            "by_payment_method": {"card": {"orders": 1, "revenue": 7.5}}}
+    assert report["total"] == {"orders": 3, "revenue": 22.75}
+
+    assert stores.fan_out(lambda: OrderTable.query.count()) == {"main": 2, "downtown": 1}
+
+
+def test_reads_use_read_only_engine_until_first_write(multi_store_app):
+    writer, reader = db.engines["store_downtown"], db.engines["store_downtown_read"]
+    with multi_store_app.test_request_context():
+        stores._select(stores.all_stores()["downtown"])
+        g.db_use_reader = True
+        assert db.session.get_bind(clause=select(OrderTable)) is reader
+        _add_order("Downtown Customer", 7.5)
+        # Read-your-writes: the rest of the request stays on the writer
+        assert db.session.get_bind(clause=select(OrderTable)) is writer
+        assert OrderTable.query.count() == 1
+
+    with pytest.raises(OperationalError, match="readonly"):
+        with reader.begin() as conn:
+            conn.execute(OrderTable.__table__.delete())
+
+
+def test_dashboard_reads_skip_writer(multi_store_app):
+    with stores.store_context("downtown"):
+        _add_order("Downtown Customer", 7.5)
+    statements = []
+    listeners = {key: (lambda *args, key=key: statements.append(key)) for key in ("store_downtown", "store_downtown_read")}
+    for key, listener in listeners.items():
+        event.listen(db.engines[key], "before_cursor_execute", listener)
+    try:
+        response = multi_store_app.test_client().post("/api/get_info/get_today_orders", data={
+            "store_auth_sid": STORE_AUTH_SID, "store_id": "downtown"})
+    finally:
+        for key, listener in listeners.items():
+            event.remove(db.engines[key], "before_cursor_execute", listener)
+    assert [order["customer_name"] for order in response.get_json()] == ["Downtown Customer"]
+    assert statements == ["store_downtown_read"]
@@ -0,0 +1,107 @@
+import re
+import time
+from datetime import datetime, timezone
+
+from models.FoodItem import display_item
+from utils import intake_journal, json_codec
+from utils.checkout_api_helper import validate_order_items
+from utils.tickets import FEED_AND_CUT, TicketRenderer, TicketSpooler, encode, wrap
+
+SANDWICH = {"type": "Sandwich", "quantity": 2, "size": "Regular", "meat": "Turkey", "bread": "Wheat",
+            "cheese": "American", "toppings": ["Lettuce", "Tomato", "Onions", "Pickles", "Oil", "Vinegar"],
+            "special_instructions": "Extra crispy 🔥 please, cut in half"}
+COMBO = {"type": "Combo", "quantity": 1, "side": {"name": "French Fries"}, "drink": {"name": "Coke", "size": "Regular"}}
+
+
+def _order(order_id=7):
+    # As OrderTable.to_dict() returns it
+    items = json_codec.loads(json_codec.dumps(validate_order_items([SANDWICH, COMBO]).serialized_items()))
+    return {"id": order_id, "customer_name": "Zoë", "payment_method": "cash", "payment_status": "pending",
+            "pickup_at": datetime(2030, 6, 1, 16, 30, tzinfo=timezone.utc).isoformat(),
+            "order_items": [display_item(item) for item in items]}
+
+
+def _text_lines(data: bytes):
+    # Printable lines, with the ESC/POS commands taken out
+    text = re.sub(rb"\x1b[@]|\x1b[tEa!].|\x1dVB.", b"", data)
+    return text.decode("cp437").split("\n")
+
+
+def test_encode_folds_what_the_printer_cannot_print():
+    assert encode("Jalapeño") == "Jalapeño".encode("cp437")
+    assert encode("Crème 🔥 Ōsaka") == b"Cr\x8ame ? Osaka"
+
+
+def test_wrap():
+    out = bytearray()
+    wrap(out, b"one two three four five", 13, b"  Top: ", 4)
+    assert out == b"  Top: one\n    two three\n    four five\n"
+    out = bytearray()
+    wrap(out, b"abcdefghijklmnop", 8)
+    assert out == b"abcdefgh\nijklmnop\n"
+
+
+def test_render_ticket(app):
+    data = TicketRenderer(width=32).render([_order()])
+    assert data.startswith(b"\x1b@") and data.endswith(FEED_AND_CUT)
+    lines = _text_lines(data)
+    assert all(len(line) <= 32 for line in lines)
+    assert "#7 Zoë" in lines
+    assert "Pickup 12:30 PM" in lines
+    assert "CASH - UNPAID" in lines
+    assert "2 x Regular Turkey Sandwich" in lines
+    assert "  Bread: Wheat" in lines
+    assert any(line.startswith("  Note: Extra crispy ? please") for line in lines)
+    assert "1 x Combo" in lines
+    assert "  Side: (Regular) French Fries" in lines
+    assert "3 items" in lines
+
+
+def test_render_batch(app):
+    renderer = TicketRenderer()
+    buffer = bytearray()
+    renderer.render_into(buffer, [_order(1), _order(2)])
+    assert buffer.count(FEED_AND_CUT) == 2
+    assert bytes(buffer) == renderer.render([_order(1)]) + renderer.render([_order(2)])
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_spooler_retries_until_the_printer_is_back(app, tmp_path):
+    path = tmp_path / "printer" / "lp0"
+    spooler = TicketSpooler(str(path), TicketRenderer())
+    spooler.start()
+    try:
+        spooler.submit(_order(1))
+        spooler.submit(_order(2))
+        time.sleep(0.05)
+        assert spooler.backlog() == 2
+        # Printer plugged in
+        path.parent.mkdir()
+        assert _wait_for(lambda: spooler.backlog() == 0)
+        assert path.read_bytes().count(FEED_AND_CUT) == 2
+    finally:
+        spooler.close()
+
+
+def test_applied_orders_are_printed(app, tmp_path):
+    app.config["TICKET_PRINTER"] = str(tmp_path / "tickets-{store_id}.bin")
+    now = datetime.now(timezone.utc).isoformat()
+    items = json_codec.loads(json_codec.dumps(validate_order_items([SANDWICH]).serialized_items()))
+    intake_journal.apply_order(app, {
+        "intake_id": "0123456789abcdef0123456789abcdef", "store_id": "main",
+        "customer_name": "B", "phone_number": "5551234567", "order_items": items,
+        "total_amount": 18.0, "payment_method": "card", "payment_status": "succeeded",
+        "payment_intent_id": "pi_1", "sms_verification_code": None, "created_at": now, "pickup_at": now,
+    })
+    spooler = app.extensions["ticket_spoolers"][str(tmp_path / "tickets-main.bin")]
+    try:
+        assert _wait_for(lambda: spooler.backlog() == 0)
+        assert "CARD - PAID" in _text_lines((tmp_path / "tickets-main.bin").read_bytes())
+    finally:
+        spooler.close()
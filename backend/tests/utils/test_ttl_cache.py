@@ -0,0 +1,45 @@
+import pytest
+from utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Test cases for the TTL cache."""
+
+    def test_entries_expire(self):
+        """Test that entries are dropped once their TTL has passed."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set('a', 1)
+        clock.now = 9.9
+        assert cache.get('a') == 1
+        clock.now = 10
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = TTLCache(ttl=60, max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1 and cache.get('c') == 3
+
+    def test_get_or_set(self):
+        """Test that a value is computed once and then served from the cache."""
+        cache = TTLCache(ttl=60)
+        calls = []
+        assert cache.get_or_set('k', lambda: calls.append(1) or 'v') == 'v'
+        assert cache.get_or_set('k', lambda: calls.append(1) or 'w') == 'v'
+        assert calls == [1]
+        cache.invalidate('k')
+        assert cache.get('k') is None
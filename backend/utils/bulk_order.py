@@ -0,0 +1,239 @@
+"""Streaming reader for bulk (catering) orders.
+
+A bulk order is posted as the request body instead of a form field, in one
+of two shapes:
+
+- NDJSON (``application/x-ndjson``): the first line is the order object,
+  every following line one cart item::
+
+      {"customer_name": "Acme", "phone_number": "5551234567", ...}
+      {"type": "Sandwich", "quantity": 2, ...}
+      {"type": "Drink", "quantity": 2, ...}
+
+- JSON (``application/json``): ``{"order": {...}, "items": [{...}, ...]}``,
+  with ``order`` before ``items``.
+
+Items are decoded one at a time while the body is read, so memory use does
+not grow with the size of the body, and reading stops at the first invalid
+item. ``BULK_ORDER_MAX_BYTES`` and ``BULK_ORDER_MAX_ITEMS`` bound a request.
+"""
+
+import codecs
+import json
+import os
+from typing import IO, Iterator, NamedTuple, Tuple
+
+from utils import json_codec
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_MAX_ITEMS = 500
+# Longest accepted line or JSON value; a cart item is well under 1 KiB
+MAX_VALUE_BYTES = 16 * 1024
+_CHUNK_SIZE = 8192
+NDJSON_MIMETYPES = {"application/x-ndjson", "application/jsonl"}
+
+
+class BulkOrderError(Exception):
+    """
+    Malformed or oversized bulk order body; ``status`` is the HTTP status to answer with.
+
+    Not a ``ValueError``, so it passes through the item validation that wraps
+    reading the body.
+    """
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class BulkLimits(NamedTuple):
+    """
+    Size limits of one bulk order request.
+
+    Attributes:
+        max_bytes (int): Body size limit
+        max_items (int): Item count limit
+    """
+    max_bytes: int = DEFAULT_MAX_BYTES
+    max_items: int = DEFAULT_MAX_ITEMS
+
+    @classmethod
+    def from_env(cls) -> "BulkLimits":
+        return cls(
+            int(os.getenv("BULK_ORDER_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            int(os.getenv("BULK_ORDER_MAX_ITEMS", DEFAULT_MAX_ITEMS)),
+        )
+
+
+class _CountingStream:
+    """Reads a request body, failing with 413 once more than ``max_bytes`` were read."""
+
+    def __init__(self, stream: IO[bytes], max_bytes: int):
+        self._stream = stream
+        self._remaining = max_bytes
+
+    def _count(self, data: bytes) -> bytes:
+        self._remaining -= len(data)
+        if self._remaining < 0:
+            raise BulkOrderError("Bulk order body too large", status=413)
+        return data
+
+    def read(self, size: int) -> bytes:
+        return self._count(self._stream.read(size))
+
+    def readline(self, size: int) -> bytes:
+        return self._count(self._stream.readline(size))
+
+
+def _object(value, what: str) -> dict:
+    if not isinstance(value, dict):
+        raise BulkOrderError(f"{what} must be a JSON object")
+    return value
+
+
+def _ndjson_values(stream: _CountingStream) -> Iterator[Tuple[str, object]]:
+    line_number = 0
+    while True:
+        line = stream.readline(MAX_VALUE_BYTES + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > MAX_VALUE_BYTES:
+            raise BulkOrderError(f"Line {line_number} is too long", status=413)
+        if not line.strip():
+            continue
+        try:
+            yield f"Line {line_number}", json_codec.loads(line)
+        except ValueError:
+            raise BulkOrderError(f"Line {line_number} is not valid JSON")
+
+
+class _JsonScanner:
+    """Decodes the values of a JSON document one by one from a byte stream."""
+
+    def __init__(self, stream: _CountingStream):
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._json = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(_CHUNK_SIZE)
+        self._eof = not chunk
+        # Drop what was consumed so the buffer only holds the value being decoded
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(chunk, final=self._eof)
+        self._pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return
+
+    def expect(self, token: str):
+        self._skip_whitespace()
+        if self._buffer[self._pos:self._pos + 1] != token:
+            raise BulkOrderError(f"Expected '{token}' in bulk order body")
+        self._pos += 1
+
+    def peek(self) -> str:
+        self._skip_whitespace()
+        return self._buffer[self._pos:self._pos + 1]
+
+    def value(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if len(self._buffer) - self._pos > MAX_VALUE_BYTES or not self._fill():
+                    raise BulkOrderError("Bulk order body is not valid JSON")
+                continue
+            # A number or literal at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and not self._eof and not isinstance(value, (dict, list, str)):
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def key(self, name: str):
+        if self.value() != name:
+            raise BulkOrderError(f"Expected \"{name}\" in bulk order body")
+        self.expect(":")
+
+
+def _json_values(stream: _CountingStream) -> Iterator[Tuple[str, object]]:
+    scanner = _JsonScanner(stream)
+    scanner.expect("{")
+    scanner.key("order")
+    yield "Order", scanner.value()
+    scanner.expect(",")
+    scanner.key("items")
+    scanner.expect("[")
+    number = 0
+    if scanner.peek() == "]":
+        scanner.expect("]")
+    else:
+        while True:
+            number += 1
+            yield f"Item {number}", scanner.value()
+            if scanner.peek() == "]":
+                scanner.expect("]")
+                break
+            scanner.expect(",")
+    scanner.expect("}")
+    if scanner.peek():
+        raise BulkOrderError("Unexpected data after bulk order body")
+
+
+def read_bulk_order(stream: IO[bytes], mimetype: str, limits: BulkLimits = BulkLimits()) -> Tuple[dict, Iterator[Tuple[str, dict]]]:
+    """
+    Start reading a bulk order body.
+
+    Args:
+        stream: Request body stream
+        mimetype: Request mimetype, NDJSON or ``application/json``
+        limits: Body size and item count limits
+
+    Returns:
+        Tuple[dict, Iterator[Tuple[str, dict]]]: The order object, and an
+        iterator of ``(position, item)`` that reads the items as it goes;
+        the position names the NDJSON line or JSON item, e.g. ``"Line 3"``
+
+    Raises:
+        BulkOrderError: If the body is malformed or over a limit, also while
+            iterating the items
+
+    Example:
+        >>> order, items = read_bulk_order(request.stream, request.mimetype)
+        >>> for position, item in items:
+        ...     order.add_item(validate_order_item(item))
+    """
+    counted = _CountingStream(stream, limits.max_bytes)
+    if mimetype in NDJSON_MIMETYPES:
+        values = _ndjson_values(counted)
+    elif mimetype == "application/json":
+        values = _json_values(counted)
+    else:
+        raise BulkOrderError("Bulk orders must be sent as application/x-ndjson or application/json", status=415)
+
+    first = next(values, None)
+    if first is None:
+        raise BulkOrderError("Bulk order body is empty")
+    order = _object(first[1], "The order")
+
+    def items() -> Iterator[Tuple[str, dict]]:
+        count = 0
+        for position, item in values:
+            count += 1
+            if count > limits.max_items:
+                raise BulkOrderError(f"Bulk orders are limited to {limits.max_items} items", status=413)
+            yield position, _object(item, position)
+
+    return order, items()
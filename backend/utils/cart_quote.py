@@ -0,0 +1,316 @@
+"""Server-side cart quotes for Steve's Place.
+
+A quote is a cart priced by the server. The frontend creates one from its
+cart, then sends the changes as deltas instead of the whole cart::
+
+    [{"op": "add", "item": {"type": "Drink", "quantity": 1, ...}},
+     {"op": "update", "line_id": "2", "item": {...}},
+     {"op": "remove", "line_id": "1"}]
+
+Only the lines a delta touches are validated and priced again. The running
+total is kept in cents like ``Order``'s, so the quoted price is exactly the
+one checkout expects.
+
+Quotes live in a store chosen with ``QUOTE_STORE``: ``memory`` (default, per
+worker process, so deltas must reach the worker that created the quote) or
+``sqlite:///<path>``, a file shared by every worker on the host. A quote
+that expired is simply created again.
+"""
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from flask import Flask, current_app
+
+from models.Order import price_cents, price_with_fee
+from utils import json_codec
+from utils.checkout_api_helper import validate_order_item
+from utils.ttl_cache import TTLCache
+
+QUOTE_TTL = 30 * 60
+MAX_QUOTE_LINES = 500
+DELTA_OPS = ("add", "update", "remove")
+
+
+class CartQuote:
+    """
+    A priced cart whose lines can be added, replaced and removed one by one.
+
+    Attributes:
+        quote_id (str): Unguessable handle of the quote
+        store_id (str): Store the cart was priced for
+        lines (Dict[str, Tuple[dict, int]]): Raw cart item and its price in cents by line id
+
+    Example:
+        >>> quote = CartQuote("main")
+        >>> quote.apply([{"op": "add", "item": {"type": "Drink", "quantity": 1, "name": "Coke", "size": "Regular"}}])
+        >>> quote.total_price()
+        2.0
+    """
+
+    def __init__(self, store_id: str):
+        self.quote_id = secrets.token_hex(16)
+        self.store_id = store_id
+        self.lines: Dict[str, Tuple[Dict[str, Any], int]] = {}
+        self._subtotal_cents = 0
+        self._next_line = 1
+        self._lock = threading.Lock()
+
+    def apply(self, deltas: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply deltas to the quote, all or none.
+
+        Every delta is validated before any is applied, so an invalid delta
+        leaves the quote as it was.
+
+        Args:
+            deltas (List[Dict[str, Any]]): ``add``, ``update`` and ``remove`` deltas
+
+        Returns:
+            Dict[str, Any]: The quote's totals, the new prices of the added or
+            updated lines and the ids of the removed lines
+
+        Raises:
+            ValueError: If a delta is malformed, names an unknown line or has an invalid item
+        """
+        if len(deltas) > MAX_QUOTE_LINES:
+            raise ValueError(f"Carts are limited to {MAX_QUOTE_LINES} lines")
+        with self._lock:
+            known = set(self.lines)
+            next_line = self._next_line
+            changes = []
+            for position, delta in enumerate(deltas, start=1):
+                try:
+                    if not isinstance(delta, dict) or delta.get("op") not in DELTA_OPS:
+                        raise ValueError(f"op must be one of {', '.join(DELTA_OPS)}")
+                    if delta["op"] == "add":
+                        line_id = str(next_line)
+                        next_line += 1
+                    else:
+                        line_id = str(delta.get("line_id"))
+                        if line_id not in known:
+                            raise ValueError(f"Unknown line {line_id}")
+                    if delta["op"] == "remove":
+                        known.discard(line_id)
+                        changes.append((line_id, None, None))
+                        continue
+                    cart_item = delta.get("item")
+                    if not isinstance(cart_item, dict):
+                        raise ValueError("item must be an object")
+                    known.add(line_id)
+                    changes.append((line_id, cart_item, validate_order_item(cart_item)))
+                except ValueError as e:
+                    raise ValueError(f"Delta {position}: {e}")
+            if len(known) > MAX_QUOTE_LINES:
+                raise ValueError(f"Carts are limited to {MAX_QUOTE_LINES} lines")
+
+            priced, removed = {}, []
+            for line_id, cart_item, food_item in changes:
+                previous = self.lines.pop(line_id, None)
+                if previous is not None:
+                    self._subtotal_cents -= previous[1]
+                if food_item is None:
+                    priced.pop(line_id, None)
+                    removed.append(line_id)
+                    continue
+                self.lines[line_id] = (cart_item, price_cents(food_item))
+                self._subtotal_cents += self.lines[line_id][1]
+                priced[line_id] = food_item.price
+            self._next_line = next_line
+            return {
+                **self.totals(),
+                "lines": [{"line_id": line_id, "price": price} for line_id, price in priced.items()],
+                "removed": removed,
+            }
+
+    def to_state(self) -> Dict[str, Any]:
+        """Return the quote as JSON-serializable data, see ``from_state``."""
+        with self._lock:
+            return {
+                "quote_id": self.quote_id,
+                "store_id": self.store_id,
+                "lines": [[line_id, cart_item, cents] for line_id, (cart_item, cents) in self.lines.items()],
+                "next_line": self._next_line,
+            }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "CartQuote":
+        """Rebuild a quote saved with ``to_state`` without pricing its lines again."""
+        quote = cls(state["store_id"])
+        quote.quote_id = state["quote_id"]
+        quote.lines = {line_id: (cart_item, cents) for line_id, cart_item, cents in state["lines"]}
+        quote._subtotal_cents = sum(cents for _, cents in quote.lines.values())
+        quote._next_line = state["next_line"]
+        return quote
+
+    def total_price(self) -> float:
+        """Return the quote's total without the card fee."""
+        return self._subtotal_cents / 100
+
+    def totals(self) -> Dict[str, Any]:
+        """
+        Return the quote handle and its prices, without and with the card fee.
+
+        Returns:
+            Dict[str, Any]: ``quote_id``, ``line_count``, ``order_price`` and ``order_price_with_fee``
+        """
+        return {
+            "quote_id": self.quote_id,
+            "line_count": len(self.lines),
+            "order_price": self.total_price(),
+            "order_price_with_fee": price_with_fee(self.total_price()),
+        }
+
+
+class MemoryStore:
+    """Quotes in this worker process only; the default."""
+
+    def __init__(self, ttl: float = QUOTE_TTL, clock: Callable[[], float] = time.monotonic):
+        self._cache = TTLCache(ttl=ttl, max_size=8192, clock=clock)
+
+    def save(self, quote: CartQuote):
+        """Store a new quote."""
+        self._cache.set((quote.store_id, quote.quote_id), quote)
+
+    def update(self, store_id: str, quote_id: str, deltas: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """See ``update_quote``."""
+        quote = self._cache.get((store_id, quote_id))
+        if quote is None:
+            raise KeyError(quote_id)
+        result = quote.apply(deltas)
+        self._cache.set((store_id, quote_id), quote)
+        return result
+
+
+class SQLiteStore:
+    """
+    Quotes in a SQLite file shared by the worker processes of a host.
+
+    Each update loads, applies and saves the quote in one write transaction,
+    so concurrent deltas to a quote through different workers are applied
+    one after the other.
+    """
+
+    def __init__(self, path: str, ttl: float = QUOTE_TTL, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cart_quotes "
+                         "(store_id TEXT NOT NULL, quote_id TEXT NOT NULL, state TEXT NOT NULL, expires REAL NOT NULL, "
+                         "PRIMARY KEY (store_id, quote_id))")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, quote: CartQuote):
+        """Store a new quote, dropping expired ones."""
+        conn = self._connect()
+        now = self._clock()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cart_quotes WHERE expires <= ?", (now,))
+            conn.execute("INSERT OR REPLACE INTO cart_quotes (store_id, quote_id, state, expires) VALUES (?, ?, ?, ?)",
+                         (quote.store_id, quote.quote_id, json_codec.dumps(quote.to_state()), now + self.ttl))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def update(self, store_id: str, quote_id: str, deltas: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Same as ``MemoryStore.update``, atomically across processes."""
+        conn = self._connect()
+        now = self._clock()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT state FROM cart_quotes WHERE store_id = ? AND quote_id = ? AND expires > ?",
+                               (store_id, quote_id, now)).fetchone()
+            if row is None:
+                raise KeyError(quote_id)
+            quote = CartQuote.from_state(json_codec.loads(row[0]))
+            result = quote.apply(deltas)
+            conn.execute("UPDATE cart_quotes SET state = ?, expires = ? WHERE store_id = ? AND quote_id = ?",
+                         (json_codec.dumps(quote.to_state()), now + self.ttl, store_id, quote_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+
+def store_from_url(url: str):
+    """
+    Build a quote store from its ``QUOTE_STORE`` setting.
+
+    Raises:
+        ValueError: If the setting is not ``memory`` or ``sqlite:///<path>``
+    """
+    if url == "memory":
+        return MemoryStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unknown quote store: {url}")
+
+
+def quote_store():
+    """Return the current app's quote store."""
+    return current_app.extensions["quote_store"]
+
+
+def create_quote(store_id: str, order_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Price a whole cart and keep it as a new quote.
+
+    Args:
+        store_id (str): Store the cart is for
+        order_items (List[Dict[str, Any]]): Raw cart items, as sent to checkout
+
+    Returns:
+        Dict[str, Any]: The quote's totals and the line id and price of every item
+
+    Raises:
+        ValueError: If an item is invalid
+    """
+    quote = CartQuote(store_id)
+    result = quote.apply([{"op": "add", "item": item} for item in order_items])
+    quote_store().save(quote)
+    return result
+
+
+def update_quote(store_id: str, quote_id: str, deltas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply deltas to a quote, refreshing its expiry.
+
+    Args:
+        store_id (str): Store the quote was made for
+        quote_id (str): Handle returned when the quote was created
+        deltas (List[Dict[str, Any]]): ``add``, ``update`` and ``remove`` deltas
+
+    Returns:
+        Dict[str, Any]: See ``CartQuote.apply``
+
+    Raises:
+        KeyError: If the quote expired or is unknown to the quote store
+        ValueError: If a delta is invalid
+    """
+    return quote_store().update(store_id, quote_id, deltas)
+
+
+def init_app(app: Flask):
+    """
+    Create the app's quote store from ``QUOTE_STORE`` (default ``memory``).
+
+    Args:
+        app: Flask application
+    """
+    app.extensions["quote_store"] = store_from_url(os.getenv("QUOTE_STORE", "memory"))
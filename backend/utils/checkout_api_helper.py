@@ -1,13 +1,11 @@
-from twilio.rest import Client
+import functools
+import logging
 import os
-from typing import Dict, Any, List, Union, Tuple
+from typing import Dict, Any, Iterable, List, Optional, Union, Tuple
 from typeguard import typechecked
-import stripe
 from dotenv import load_dotenv
 from models.StoreCloseDateTable import StoreClosedDateTable
-import enum
 from datetime import date, datetime
-from pydantic import BaseModel
 from zoneinfo import ZoneInfo
 
 load_dotenv()
@@ -23,14 +21,63 @@ from models.Salad import Salad
 from models.Order import Order
 from models.Schema import ComboSchema, SideSchema, DrinkSchema, HotdogSchema, SaladSchema, SandwichSchema, EggSandwichSchema, ComboSideSchema, ComboDrinkSchema
 from models.Category import Category
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
-# Initialize Twilio (only if credentials are available)
-twilio_account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-twilio_auth_token = os.getenv('TWILIO_AUTH_TOKEN')
+from models.FoodItem import display_item
+from models.OrderTable import OrderTable
+from utils.metrics import stage, timed_stage
+from utils.logging_setup import sampled_debug
+from utils import review_token, stores
+
+logger = logging.getLogger(__name__)
+
 twilio_verify_service_sid = os.getenv('TWILIO_VERIFY_SERVICE_SID')
 
-twilio_client = Client(twilio_account_sid, twilio_auth_token)
 
+# The provider SDKs take a large share of startup time, so they are imported
+# on first use rather than when the app boots
+@functools.lru_cache(maxsize=None)
+def get_stripe():
+    """
+    Import and configure the Stripe SDK on first use.
+
+    Returns:
+        The ``stripe`` module with the API key (and optional ``STRIPE_API_BASE``) set
+    """
+    import stripe
+    stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+    # Optional API endpoint override, used to run against a local stand-in (see tests/load)
+    if os.getenv('STRIPE_API_BASE'):
+        stripe.api_base = os.getenv('STRIPE_API_BASE')
+    return stripe
+
+
+@functools.lru_cache(maxsize=None)
+def get_twilio_client():
+    """
+    Build the Twilio client on first use.
+
+    Returns:
+        twilio.rest.Client: Client for TWILIO_ACCOUNT_SID, pointed at
+        ``TWILIO_VERIFY_BASE_URL`` when that override is set
+    """
+    from twilio.rest import Client
+    client = Client(os.getenv('TWILIO_ACCOUNT_SID'), os.getenv('TWILIO_AUTH_TOKEN'))
+    if os.getenv('TWILIO_VERIFY_BASE_URL'):
+        client.verify.base_url = os.getenv('TWILIO_VERIFY_BASE_URL')
+    return client
+
+
+def preload_provider_sdks() -> None:
+    """
+    Import the provider SDKs now instead of on first use.
+
+    Called by pre-forking servers in the master process so the SDKs are
+    imported once and shared by every worker.
+    """
+    get_stripe()
+    import twilio.rest  # noqa: F401
+
+
+@timed_stage('twilio')
 @typechecked
 def verify_sms_code(phone_number: str, verification_code: str) -> bool:
     """
@@ -52,12 +99,13 @@ def verify_sms_code(phone_number: str, verification_code: str) -> bool:
         True
     """
     return True
-    verification_check = twilio_client.verify.v2.services(twilio_verify_service_sid).verification_checks.create(
+    verification_check = get_twilio_client().verify.v2.services(twilio_verify_service_sid).verification_checks.create(
         to="+1"+phone_number,
         code=verification_code
     )
     return verification_check.status == 'approved'
 
+@timed_stage('twilio')
 @typechecked
 def generate_sms_code(phone_number: str) -> bool:
     """
@@ -79,12 +127,13 @@ def generate_sms_code(phone_number: str) -> bool:
     """
     return True
     # Send SMS using Twilio Verify service
-    message = twilio_client.verify.v2.services(twilio_verify_service_sid).verifications.create(
+    message = get_twilio_client().verify.v2.services(twilio_verify_service_sid).verifications.create(
         to="+1"+phone_number,
         channel='sms'
     )
     return message.status == 'pending'
 
+@timed_stage('stripe')
 @typechecked
 def pay_with_card(payment_method_id: str, order_price: float) -> Dict[str, Any]:
     """
@@ -106,6 +155,7 @@ def pay_with_card(payment_method_id: str, order_price: float) -> Dict[str, Any]:
         >>> print(intent.client_secret)
         'pi_1234567890_secret_abcdef'
     """
+    stripe = get_stripe()
     try:
 
         # Create a payment intent
@@ -131,6 +181,7 @@ def pay_with_card(payment_method_id: str, order_price: float) -> Dict[str, Any]:
         # Handle other errors
         return {'error': 'Payment failed', 'message': str(e)}
 
+@timed_stage('stripe')
 @typechecked
 def confirm_payment_intent(payment_intent_id: str, metadata: Dict[str, str]) -> None:
     """
@@ -151,6 +202,7 @@ def confirm_payment_intent(payment_intent_id: str, metadata: Dict[str, str]) ->
     Example:
         >>> confirm_payment_intent("pi_1234567890", {"order_id": "12345"})
     """
+    stripe = get_stripe()
     try:
         stripe.PaymentIntent.modify(
             payment_intent_id,
@@ -161,12 +213,13 @@ def confirm_payment_intent(payment_intent_id: str, metadata: Dict[str, str]) ->
         )
     except stripe.error.StripeError as e:
         # Handle Stripe errors
-        print(f"Stripe error: {str(e)}")
+        logger.error(f"Stripe error confirming {payment_intent_id}: {str(e)}")
     except Exception as e:
         # Handle other errors
-        print(f"Error: {str(e)}")
+        logger.exception(f"Error confirming {payment_intent_id}: {str(e)}")
 
 
+@timed_stage('stripe')
 @typechecked
 def cancel_payment_intent(payment_intent_id: str) -> None:
     """
@@ -182,7 +235,7 @@ def cancel_payment_intent(payment_intent_id: str) -> None:
     Example:
         >>> cancel_payment_intent("pi_1234567890abcdef")
     """
-    stripe.PaymentIntent.cancel(payment_intent_id)
+    get_stripe().PaymentIntent.cancel(payment_intent_id)
 
 
 def validate_and_create_food_item(item_type: str, item_data: Dict[str, Any]) -> Union[Sandwich, Drink, Combo, Hotdog, Side, EggSandwich, Salad]:
@@ -191,7 +244,7 @@ def validate_and_create_food_item(item_type: str, item_data: Dict[str, Any]) ->
     
     Takes raw item data and creates the appropriate food item object based on
     the item type. Validates the data against the corresponding schema before
-    creating the object.
+    creating the object. Identical configurations share one interned instance.
     
     Args:
         item_type (str): Type of food item (from Category enum values)
@@ -202,34 +255,34 @@ def validate_and_create_food_item(item_type: str, item_data: Dict[str, Any]) ->
             Validated food item object
             
     Raises:
-        ValueError: If item type is unknown or validation fails
+        ValueError: If item type is unknown, not sold at the current store, or validation fails
         
     Example:
         >>> item = validate_and_create_food_item("sandwich", {"quantity": 1, "bread": "white"})
     """
-    print("In validate_and_create_food_item")
-    print(item_type)
-    print(item_data)
+    sampled_debug(logger, "Validating food item", item_type=item_type, item_data=item_data)
+    if item_type in stores.disabled_categories():
+        raise ValueError(f"{item_type} is not available at this store")
     try:
         match item_type:
             case Category.HOTDOG.value:
                 hotdog = HotdogSchema(**item_data)
-                return Hotdog(**hotdog.model_dump())
+                return Hotdog(**hotdog.model_dump()).interned()
             case Category.SANDWICH.value:
                 sandwich = SandwichSchema(**item_data)
-                return Sandwich(**sandwich.model_dump())
+                return Sandwich(**sandwich.model_dump()).interned()
             case Category.EGGSANDWICH.value:
                 egg_sandwich = EggSandwichSchema(**item_data)
-                return EggSandwich(**egg_sandwich.model_dump())
+                return EggSandwich(**egg_sandwich.model_dump()).interned()
             case Category.SALAD.value:
                 salad = SaladSchema(**item_data)
-                return Salad(**salad.model_dump())
+                return Salad(**salad.model_dump()).interned()
             case Category.DRINK.value:
                 drink = DrinkSchema(**item_data)
-                return Drink(**drink.model_dump())
+                return Drink(**drink.model_dump()).interned()
             case Category.SIDE.value:
                 side = SideSchema(**item_data)
-                return Side(**side.model_dump())
+                return Side(**side.model_dump()).interned()
             case Category.COMBO.value:
                 combo = ComboSchema(**item_data)
                 return Combo(
@@ -237,12 +290,12 @@ def validate_and_create_food_item(item_type: str, item_data: Dict[str, Any]) ->
                     side=combo.side,
                     drink=combo.drink,
                     special_instructions=combo.special_instructions,
-                )
+                ).interned()
             case _:
                 raise ValueError(f"Unknown food item type: {item_type}")
 
     except Exception as e:
-        print(f"Error in validate_and_create_food_item: {str(e)}")
+        logger.debug(f"Invalid {item_type} item: {str(e)}")
         raise ValueError(f"Error creating {item_type}: {str(e)}")
 
 def validate_order_items(items_data: List[Dict[str, Any]]) -> Order:
@@ -266,27 +319,119 @@ def validate_order_items(items_data: List[Dict[str, Any]]) -> Order:
     """
     order = Order()
     for item_data in items_data:
-        try:
-            # Extract type and create a copy without the type field for constructor
-            item_type = item_data['type']
-            item_params = {k: v for k, v in item_data.items() if k != 'type'}
-            
-            # Create the food item (validation happens in constructor)
-            food_item = validate_and_create_food_item(item_type, item_params)
-            order.add_item(food_item)
-        except Exception as e:
-            raise ValueError(f"Invalid food item: {str(e)}")
+        order.add_item(validate_order_item(item_data))
     
     return order
 
+def validate_order_item(item_data: Dict[str, Any]) -> Union[Sandwich, Drink, Combo, Hotdog, Side, EggSandwich, Salad]:
+    """
+    Validate one raw cart item and create its food item.
+    
+    Args:
+        item_data (Dict[str, Any]): Raw food item data, including its ``type``
+    
+    Returns:
+        Union[Sandwich, Drink, Combo, Hotdog, Side, EggSandwich, Salad]: The validated food item
+        
+    Raises:
+        ValueError: If the item is invalid
+        
+    Example:
+        >>> item = validate_order_item({"type": "Drink", "quantity": 1, "name": "Coke", "size": "Regular"})
+    """
+    try:
+        # Extract type and create a copy without the type field for constructor
+        item_type = item_data['type']
+        item_params = {k: v for k, v in item_data.items() if k != 'type'}
+        
+        # Create the food item (validation happens in constructor)
+        return validate_and_create_food_item(item_type, item_params)
+    except Exception as e:
+        raise ValueError(f"Invalid food item: {str(e)}")
+
+def validate_customer(customer_name: str, phone_number: str) -> None:
+    """
+    Validate the customer fields of an order.
+    
+    Raises:
+        ValueError: If the name is longer than 100 characters or the phone number is not 10 digits
+    """
+    if len(customer_name) > 100:
+        raise ValueError('Customer name can not exceed 100 characters')
+    if not phone_number.isdigit() or len(phone_number) != 10:
+        raise ValueError('Phone number must be 10 digits')
+
+def check_order_price(order: Union[Order, review_token.ReviewedOrder], order_price: float, card_payment: bool = False) -> None:
+    """
+    Check the price the client expects against the order's total.
+    
+    Args:
+        order (Union[Order, ReviewedOrder]): Validated order
+        order_price (float): Price the client displayed
+        card_payment (bool, optional): Whether the card fee applies. Defaults to False
+        
+    Raises:
+        AssertionError: If the prices do not match
+    """
+    with stage('pricing'):
+        if card_payment:
+            assert order_price == order.total_price_with_fee(), 'Order price does not match'
+        else:
+            assert order_price == order.total_price(), 'Order price does not match'
+
+def validate_streamed_order(customer_name: str, phone_number: str, items: Iterable[Tuple[str, Dict[str, Any]]], order_price: float, pickup_at: str, card_payment: bool = False) -> Tuple[Order, datetime]:
+    """
+    Validate an order whose items are read one at a time, such as a bulk order.
+    
+    Same checks as ``validate_order``, but each item is validated and added to
+    the running total as it is read, and the first invalid item ends
+    validation without reading the rest.
+    
+    Args:
+        customer_name (str): Customer's name (max 100 characters)
+        phone_number (str): Customer's 10-digit phone number
+        items (Iterable[Tuple[str, Dict[str, Any]]]): ``(position, item)`` pairs,
+            the position naming the item in error messages (e.g. ``"Line 3"``)
+        order_price (float): Expected total price
+        pickup_at (str): Pickup time in ISO format
+        card_payment (bool, optional): Whether payment is by card. Defaults to False
+    
+    Returns:
+        Tuple[Order, datetime]: Validated Order object with all items and pickup time
+        
+    Raises:
+        ValueError: If the customer, pickup time or an item is invalid
+        AssertionError: If calculated price doesn't match provided price
+    """
+    validate_customer(customer_name, phone_number)
+
+    with stage('pickup_time'):
+        pickup_time = validate_pickup_time(pickup_at)
+
+    order = Order()
+    with stage('validate'):
+        for position, item_data in items:
+            try:
+                item = validate_order_item(item_data)
+            except ValueError as e:
+                raise ValueError(f"{position}: {str(e)}") from e
+            order.add_item(item)
+    check_order_price(order, order_price, card_payment)
+
+    return order, pickup_time
+
 @typechecked
-def validate_order(customer_name: str, phone_number: str, order_items_data: List[Dict[str, Any]], order_price: float, pickup_at: str, card_payment: bool = False) -> Tuple[Order, datetime]:
+def validate_order(customer_name: str, phone_number: str, order_items_data: List[Dict[str, Any]], order_price: float, pickup_at: str, card_payment: bool = False, token: Optional[str] = None) -> Tuple[Union[Order, review_token.ReviewedOrder], datetime]:
     """
     Validate complete order data and return Order object.
     
     Validates customer information, order items, and pricing. Ensures all
     data is properly formatted and the calculated price matches the provided
     price (including fees for card payments).
+
+    A valid review token for the same cart (see ``utils.review_token``)
+    replaces validating and pricing the items; without one, or when it is
+    stale, the cart is re-priced in full.
     
     Args:
         customer_name (str): Customer's name (max 100 characters)
@@ -295,9 +440,10 @@ def validate_order(customer_name: str, phone_number: str, order_items_data: List
         order_price (float): Expected total price
         pickup_at (str): Pickup time in ISO format (YYYY-MM-DD HH:MM:SS)
         card_payment (bool, optional): Whether payment is by card. Defaults to False
+        token (Optional[str], optional): Review token from the review endpoint. Defaults to None
     
     Returns:
-        Tuple[Order, datetime]: Validated Order object with all items and pickup time
+        Tuple[Union[Order, ReviewedOrder], datetime]: Validated order with all items and pickup time
         
     Raises:
         ValueError: If customer name too long, phone number invalid, or price mismatch
@@ -306,18 +452,16 @@ def validate_order(customer_name: str, phone_number: str, order_items_data: List
     Example:
         >>> order = validate_order("John Doe", "1234567890", items_data, 25.99, True)
     """
-    if len(customer_name) > 100:
-        raise ValueError('Customer name can not exceed 100 characters')
-    if not phone_number.isdigit() or len(phone_number) != 10:
-        raise ValueError('Phone number must be 10 digits')
+    validate_customer(customer_name, phone_number)
 
-    pickup_time = validate_pickup_time(pickup_at)
+    with stage('pickup_time'):
+        pickup_time = validate_pickup_time(pickup_at)
 
-    order = validate_order_items(order_items_data)
-    if card_payment:
-        assert order_price == order.total_price_with_fee(), 'Order price does not match'
-    else:
-        assert order_price == order.total_price(), 'Order price does not match'
+    order = review_token.verify_token(token, order_items_data, card_payment) if token else None
+    if order is None:
+        with stage('validate'):
+            order = validate_order_items(order_items_data)
+    check_order_price(order, order_price, card_payment)
 
     return order, pickup_time
 
@@ -339,7 +483,6 @@ def validate_pickup_time(pickup_time: str) -> datetime:
     """
     # Standardize UTC format
     pickup_time = pickup_time.replace('Z', '+00:00')
-    print(pickup_time)
     # Convert to datetime object and Eastern timezone
     utc_time = datetime.fromisoformat(pickup_time)
     eastern_time = utc_time.astimezone(ZoneInfo('US/Eastern'))
@@ -358,44 +501,14 @@ def validate_pickup_time(pickup_time: str) -> datetime:
     # Return utc time
     return utc_time
     
-def to_serializable(obj):
-    """
-    Convert complex objects to JSON-serializable format.
-    
-    Recursively converts objects that are not natively JSON-serializable
-    (like Enums and Pydantic models) into basic Python types that can
-    be serialized to JSON.
-    
-    Args:
-        obj: Object to convert (can be Enum, BaseModel, dict, list, or primitive)
-    
-    Returns:
-        JSON-serializable representation of the object
-        
-    Example:
-        >>> to_serializable(MyEnum.VALUE)
-        'value'
-        >>> to_serializable(MyModel(field="test"))
-        {'field': 'test'}
-    """
-    if isinstance(obj, enum.Enum):
-        return obj.value
-    elif isinstance(obj, BaseModel):
-        return {k: to_serializable(v) for k, v in obj.model_dump().items()}
-    elif isinstance(obj, dict):
-        return {k: to_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [to_serializable(v) for v in obj]
-    else:
-        return obj
-
 def serialize_food_item(item) -> dict:
     """
     Serialize a food item object to a dictionary.
     
-    Converts a food item object into a JSON-serializable dictionary format
-    that includes the item type, price, and all attributes. Used for storing
-    order data and API responses.
+    Converts a food item object into a dictionary that includes the item
+    type, price, and all attributes, using the serializer generated for its
+    class (see ``models.FoodItem``). Enum and Pydantic values are left as-is;
+    ``utils.json_codec`` encodes them natively when the order is stored.
     
     Args:
         item: Food item object (Sandwich, Drink, Combo, etc.)
@@ -405,12 +518,76 @@ def serialize_food_item(item) -> dict:
         
     Example:
         >>> serialize_food_item(sandwich_obj)
-        {'type': 'Sandwich', 'price': 8.99, 'bread': 'white', 'quantity': 1}
+        {'type': 'Sandwich', 'price': 8.99, '_bread': <SandwichBread.WHITE: 'White'>, '_quantity': 1}
+    """
+    return item.serialize()
+
+def stored_item_to_cart_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a stored order item back into the cart format the checkout accepts.
+
+    Stored items (see ``serialize_food_item``) carry prices and underscored
+    attribute names; cart items carry the ``type`` and the schema field names.
+    Topping and add-on masks are decoded into their display values, and the
+    side and drink of a combo are reduced to the fields the client sends (the
+    others are fixed by the combo schemas).
+
+    Args:
+        item (Dict[str, Any]): Item as returned in ``OrderTable.to_dict()['order_items']``
+
+    Returns:
+        Dict[str, Any]: Item in the format of the ``order_items`` form field
+
+    Example:
+        >>> stored_item_to_cart_item({'type': 'Drink', 'price': 2.0, '_quantity': 1, '_size': 'Regular', '_name': 'Coke'})
+        {'type': 'Drink', 'quantity': 1, 'size': 'Regular', 'name': 'Coke'}
     """
-    item_dict = {
-        'type': item.__class__.__name__,
-        'price': item.price
+    cart_item = {'type': item['type']}
+    for key, value in display_item(item).items():
+        if key in ('type', 'price', '_price'):
+            continue
+        cart_item[key[1:] if key.startswith('_') else key] = value
+    if cart_item['type'] == Category.COMBO.value:
+        side, drink = cart_item['side'], cart_item['drink']
+        cart_item['side'] = {'name': side['name'], 'chips_type': side.get('chips_type')}
+        cart_item['drink'] = {'name': drink['name'], 'size': drink['size']}
+    return cart_item
+
+
+def reprice_stored_order(order_row: OrderTable) -> Dict[str, Any]:
+    """
+    Rebuild a past order as a cart priced against the current menu.
+
+    Each item is validated again, so prices and options reflect today's menu.
+    Items that no longer validate (e.g. a discontinued option) are returned
+    separately instead of failing the whole cart.
+
+    Args:
+        order_row (OrderTable): Past order of the customer
+
+    Returns:
+        Dict[str, Any]: The cart, its current prices and any unavailable items
+
+    Example:
+        >>> reprice_stored_order(order_row)['order_price']
+        15.75
+    """
+    order = Order()
+    order_items, unavailable_items = [], []
+    stored = order_row.to_dict()
+    for cart_item in (stored_item_to_cart_item(item) for item in stored['order_items']):
+        item_params = {k: v for k, v in cart_item.items() if k != 'type'}
+        try:
+            order.add_item(validate_and_create_food_item(cart_item['type'], item_params))
+        except ValueError:
+            unavailable_items.append(cart_item)
+            continue
+        order_items.append(cart_item)
+    return {
+        'order_id': stored['id'],
+        'created_at': stored['created_at'],
+        'order_items': order_items,
+        'unavailable_items': unavailable_items,
+        'order_price': order.total_price(),
+        'order_price_with_fee': order.total_price_with_fee(),
     }
-    for attr_name, attr_value in item.__dict__.items():
-        item_dict[attr_name] = to_serializable(attr_value)
-    return item_dict
\ No newline at end of file
@@ -0,0 +1,474 @@
+"""Durable intake journal for verified orders.
+
+``verify_sms`` and ``confirm_payment`` append every verified order to a local
+append-only journal and fsync it before answering. A background applier
+thread then inserts the journaled orders into ``OrderTable``, so a locked,
+slow or backed-up database delays the row, never the customer's answer, and
+a card order is no longer cancelled because its insert failed.
+
+Layout under ``INTAKE_JOURNAL_DIR`` (default ``journal``), one directory per
+open journal, i.e. per worker process, held with an exclusive ``flock``::
+
+    journal/<pid>-<token>/lock
+    journal/<pid>-<token>/00000000000000000001.seg
+    journal/<pid>-<token>/applied        # checkpoint: "<segment> <offset>"
+    journal/rejected.jsonl               # records that can never be applied
+
+Each record is an 8-byte header (payload length, CRC32 of the payload)
+followed by the JSON payload. Segments are rotated at
+``INTAKE_SEGMENT_BYTES`` and deleted once every record in them is applied.
+
+When a journal opens, its applier first takes over the directories of
+journals that are no longer locked (a worker that stopped or crashed),
+replays their records after the checkpoint and removes them. A torn or
+corrupt record ends the scan of its segment. Orders carry the record's
+``intake_id`` under a unique index, so a record applied twice yields one row.
+"""
+
+import atexit
+import fcntl
+import logging
+import os
+import shutil
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, Iterator, Optional, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from db import db
+from models.OrderTable import OrderTable
+from utils import json_codec, kitchen, popularity, stores, tickets
+from utils.metrics import INTAKE_APPLY_FAILURES, INTAKE_BACKLOG, ORDERS_CREATED
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENT_BYTES = 4 * 1024 * 1024
+DEFAULT_APPLY_WAIT = 0.25
+SEGMENT_SUFFIX = ".seg"
+REJECTED_FILE = "rejected.jsonl"
+_HEADER = struct.Struct("<II")
+# Locked, unreachable or restarting database; any other error means the record itself is bad
+_RETRY_ERRORS = (OperationalError,)
+_MAX_BACKOFF = 5.0
+
+
+def encode_record(record: dict) -> bytes:
+    """Return the on-disk form of a record: length and CRC32 header, then JSON."""
+    payload = json_codec.dumps(record).encode("utf-8")
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str, start: int = 0) -> Iterator[Tuple[int, dict]]:
+    """
+    Read the intact records of a segment.
+
+    Args:
+        path: Segment file
+        start: Offset to start reading at
+
+    Yields:
+        Tuple[int, dict]: Offset just past the record, and the record
+
+    Stops at the end of the file or at the first torn or corrupt record.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            length, crc = _HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                logger.warning("Intake journal scan stopped at a corrupt record", extra={"path": path, "offset": offset})
+                return
+            offset += _HEADER.size + length
+            yield offset, json_codec.loads(payload)
+
+
+def _segment_name(number: int) -> str:
+    return f"{number:020d}{SEGMENT_SUFFIX}"
+
+
+def _segments(path: str):
+    """Return the segment numbers in a journal directory, oldest first."""
+    return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(path) if name.endswith(SEGMENT_SUFFIX))
+
+
+def _read_checkpoint(path: str) -> Tuple[int, int]:
+    try:
+        with open(os.path.join(path, "applied")) as f:
+            segment, offset = f.read().split()
+        return int(segment), int(offset)
+    except (OSError, ValueError):
+        return 0, 0
+
+
+def _try_lock(path: str):
+    """Return the locked lock file of a journal directory, or None if another journal holds it."""
+    lock_file = open(os.path.join(path, "lock"), "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class IntakeReceipt:
+    """Acknowledgement of a journaled record; ``wait`` returns its order id once applied."""
+
+    __slots__ = ("intake_id", "order_id", "_applied")
+
+    def __init__(self, intake_id: str):
+        self.intake_id = intake_id
+        self.order_id: Optional[int] = None
+        self._applied = threading.Event()
+
+    def _set(self, order_id: Optional[int]):
+        self.order_id = order_id
+        self._applied.set()
+
+    def wait(self, timeout: float) -> Optional[int]:
+        """
+        Wait for the applier to insert the record.
+
+        Returns:
+            Optional[int]: The order id, or None if not applied within ``timeout``
+        """
+        self._applied.wait(timeout)
+        return self.order_id
+
+
+def _fsync_dir(path: str):
+    """Make the entries created in a directory durable."""
+    dir_fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class IntakeJournal:
+    """
+    One process's journal directory and its applier thread.
+
+    Args:
+        root: ``INTAKE_JOURNAL_DIR``, shared by every journal on the host
+        apply: Inserts a record and returns its order id; must be idempotent
+        segment_bytes: Size after which a new segment is started
+
+    Example:
+        >>> journal = IntakeJournal("journal", apply=lambda record: 1)
+        >>> journal.start()
+        >>> journal.append({"intake_id": "ab12"}).wait(1.0)
+        1
+    """
+
+    def __init__(self, root: str, apply: Callable[[dict], int], segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.root = root
+        self.path = os.path.join(root, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.pid = os.getpid()
+        self.segment_bytes = segment_bytes
+        self._apply = apply
+        os.makedirs(self.path)
+        _fsync_dir(root)
+        self._lock_file = _try_lock(self.path)
+        self._write_lock = threading.Lock()
+        self._cond = threading.Condition()
+        # (segment, offset past the record, record, receipt) not applied yet
+        self._pending: Deque[Tuple[int, int, dict, Optional[IntakeReceipt]]] = deque()
+        self._oldest_segment = 1
+        self._segment = 1
+        self._offset = 0
+        self._file = open(os.path.join(self.path, _segment_name(self._segment)), "ab")
+        _fsync_dir(self.path)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="intake-applier", daemon=True)
+
+    def start(self):
+        """Start the applier; it recovers abandoned journals before anything else."""
+        self._thread.start()
+
+    def append(self, record: dict) -> IntakeReceipt:
+        """
+        Append a record durably.
+
+        Returns once the record is fsync'd; the applier inserts it afterwards.
+
+        Args:
+            record: JSON-serializable record with an ``intake_id``
+
+        Returns:
+            IntakeReceipt: Receipt to wait on for the order id
+
+        Raises:
+            OSError: If the record could not be written; nothing is journaled
+        """
+        data = encode_record(record)
+        receipt = IntakeReceipt(record["intake_id"])
+        with self._write_lock:
+            if self._offset and self._offset + len(data) > self.segment_bytes:
+                self._rotate()
+            try:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError:
+                # Drop the partial record so later appends stay readable
+                self._file.truncate(self._offset)
+                raise
+            self._offset += len(data)
+            with self._cond:
+                self._pending.append((self._segment, self._offset, record, receipt))
+                INTAKE_BACKLOG.inc()
+                self._cond.notify()
+        return receipt
+
+    def _rotate(self):
+        self._file.close()
+        self._segment += 1
+        self._offset = 0
+        self._file = open(os.path.join(self.path, _segment_name(self._segment)), "ab")
+        _fsync_dir(self.path)
+
+    def backlog(self) -> int:
+        """Return the number of journaled records not applied yet."""
+        with self._cond:
+            return len(self._pending)
+
+    def _run(self):
+        self.recover()
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                segment, offset, record, receipt = self._pending[0]
+            order_id = self._apply_with_retry(record)
+            with self._cond:
+                self._pending.popleft()
+                INTAKE_BACKLOG.dec()
+            self._checkpoint(self.path, segment, offset)
+            while self._oldest_segment < segment:
+                os.remove(os.path.join(self.path, _segment_name(self._oldest_segment)))
+                self._oldest_segment += 1
+            if receipt is not None:
+                receipt._set(order_id)
+
+    def _apply_with_retry(self, record: dict) -> Optional[int]:
+        """Apply a record, retrying database errors with backoff until it succeeds or the journal closes."""
+        backoff = 0.1
+        while True:
+            try:
+                return self._apply(record)
+            except _RETRY_ERRORS as e:
+                INTAKE_APPLY_FAILURES.inc()
+                logger.warning(f"Applying intake record {record.get('intake_id')} failed, retrying: {e}")
+                if self._closed:
+                    return None
+                time.sleep(backoff)
+                backoff = min(backoff * 2, _MAX_BACKOFF)
+            except Exception:
+                INTAKE_APPLY_FAILURES.inc()
+                logger.exception(f"Intake record {record.get('intake_id')} cannot be applied, moved to {REJECTED_FILE}")
+                with open(os.path.join(self.root, REJECTED_FILE), "ab") as f:
+                    f.write(json_codec.dumps(record).encode("utf-8") + b"\n")
+                return None
+
+    @staticmethod
+    def _checkpoint(path: str, segment: int, offset: int):
+        # Not fsync'd: replaying an applied record is harmless
+        tmp = os.path.join(path, "applied.tmp")
+        with open(tmp, "w") as f:
+            f.write(f"{segment} {offset}")
+        os.replace(tmp, os.path.join(path, "applied"))
+
+    def recover(self) -> int:
+        """
+        Replay and remove every journal directory no running journal holds.
+
+        Returns:
+            int: Records replayed
+        """
+        replayed = 0
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if path == self.path or not os.path.isdir(path):
+                continue
+            lock_file = _try_lock(path)
+            if lock_file is None:
+                continue
+            try:
+                done_segment, done_offset = _read_checkpoint(path)
+                for segment in _segments(path):
+                    if segment < done_segment:
+                        continue
+                    start = done_offset if segment == done_segment else 0
+                    for offset, record in read_records(os.path.join(path, _segment_name(segment)), start):
+                        self._apply_with_retry(record)
+                        self._checkpoint(path, segment, offset)
+                        replayed += 1
+                    if self._closed:
+                        return replayed
+                shutil.rmtree(path)
+            finally:
+                lock_file.close()
+        if replayed:
+            logger.info(f"Recovered {replayed} intake records")
+        return replayed
+
+    def close(self, timeout: float = 5.0):
+        """
+        Stop the applier after it drains, close the journal and release its lock.
+
+        The directory is removed when every record was applied; otherwise the
+        next journal to open recovers it.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        with self._write_lock:
+            self._file.close()
+        drained = not self._pending
+        if drained:
+            shutil.rmtree(self.path, ignore_errors=True)
+        if self._lock_file is not None:
+            self._lock_file.close()
+
+
+def apply_order(app: Flask, record: dict) -> int:
+    """
+    Insert a journaled order into its store's database, once.
+
+    Args:
+        app: Application whose stores and database to use
+        record: Record written by ``submit_order``
+
+    Returns:
+        int: Id of the order row, existing or new
+    """
+    with stores.store_context(record["store_id"], app):
+        existing = db.session.query(OrderTable.id).filter_by(intake_id=record["intake_id"]).scalar()
+        if existing is not None:
+            return existing
+        order = OrderTable(
+            customer_name=record["customer_name"],
+            phone_number=record["phone_number"],
+            order_items=record["order_items"],
+            total_amount=record["total_amount"],
+            payment_method=record["payment_method"],
+            payment_status=record["payment_status"],
+            payment_intent_id=record["payment_intent_id"],
+            sms_verification_code=record["sms_verification_code"],
+            pickup_at=datetime.fromisoformat(record["pickup_at"]),
+            created_at=datetime.fromisoformat(record["created_at"]),
+            intake_id=record["intake_id"],
+        )
+        db.session.add(order)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            # Applied concurrently by another journal's recovery
+            existing = db.session.query(OrderTable.id).filter_by(intake_id=record["intake_id"]).scalar()
+            if existing is not None:
+                return existing
+            # Another constraint failed: the record is bad, so it is rejected
+            raise
+        ORDERS_CREATED.inc(payment_method=record["payment_method"])
+        popularity.record_order(app, record["store_id"], order.id, order.created_at, record["order_items"])
+        kitchen.record_order(app, record["store_id"], order.id, order.pickup_at, record["payment_status"], record["order_items"])
+        tickets.print_order(app, record["store_id"], order)
+        return order.id
+
+
+_open_lock = threading.Lock()
+
+
+def get_journal(app: Optional[Flask] = None) -> IntakeJournal:
+    """
+    Return this process's journal of an app, opening it on first use.
+
+    Opened lazily, so a preloading gunicorn master never holds a journal its
+    forked workers would share.
+    """
+    app = app or current_app._get_current_object()
+    journal = app.extensions.get("intake_journal")
+    if journal is not None and journal.pid == os.getpid():
+        return journal
+    with _open_lock:
+        journal = app.extensions.get("intake_journal")
+        if journal is None or journal.pid != os.getpid():
+            os.makedirs(app.config["INTAKE_JOURNAL_DIR"], exist_ok=True)
+            journal = IntakeJournal(app.config["INTAKE_JOURNAL_DIR"], lambda record: apply_order(app, record),
+                                    app.config["INTAKE_SEGMENT_BYTES"])
+            journal.start()
+            atexit.register(journal.close)
+            app.extensions["intake_journal"] = journal
+    return journal
+
+
+def submit_order(customer_name: str, phone_number: str, order_items: list, total_amount: float,
+                 payment_method: str, payment_status: str, pickup_at: datetime,
+                 payment_intent_id: Optional[str] = None, sms_verification_code: Optional[str] = None) -> IntakeReceipt:
+    """
+    Journal a verified order of the current store.
+
+    Args:
+        order_items: Serialized items, as stored in ``OrderTable.order_items``
+        pickup_at: Pickup time, timezone-aware
+
+    Returns:
+        IntakeReceipt: Receipt whose ``wait`` gives the order id once inserted
+
+    Raises:
+        OSError: If the journal could not be written
+
+    Example:
+        >>> receipt = submit_order("Ann", "5551234567", items, 12.5, "cash", "pending", pickup)
+        >>> receipt.wait(current_app.config["INTAKE_APPLY_WAIT"])
+        42
+    """
+    return get_journal().append({
+        "intake_id": uuid.uuid4().hex,
+        "store_id": stores.current_store_id(),
+        "customer_name": customer_name,
+        "phone_number": phone_number,
+        "order_items": order_items,
+        "total_amount": total_amount,
+        "payment_method": payment_method,
+        "payment_status": payment_status,
+        "payment_intent_id": payment_intent_id,
+        "sms_verification_code": sms_verification_code,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "pickup_at": pickup_at.isoformat(),
+    })
+
+
+def init_app(app: Flask):
+    """
+    Configure the intake journal from the environment.
+
+    - ``INTAKE_JOURNAL_DIR``: journal directory (default ``journal``)
+    - ``INTAKE_SEGMENT_BYTES``: segment size before rotation (default 4 MiB)
+    - ``INTAKE_APPLY_WAIT``: seconds a checkout waits for its row before
+      answering anyway (default 0.25, 0 to never wait)
+
+    Args:
+        app: Flask application
+    """
+    app.config["INTAKE_JOURNAL_DIR"] = os.getenv("INTAKE_JOURNAL_DIR", "journal")
+    app.config["INTAKE_SEGMENT_BYTES"] = int(os.getenv("INTAKE_SEGMENT_BYTES", DEFAULT_SEGMENT_BYTES))
+    app.config["INTAKE_APPLY_WAIT"] = float(os.getenv("INTAKE_APPLY_WAIT", DEFAULT_APPLY_WAIT))
@@ -0,0 +1,151 @@
+"""JSON encoding and decoding for Steve's Place.
+
+Every blueprint and model goes through this module instead of calling the
+standard library ``json`` directly. When orjson is installed it is used for
+both directions; otherwise the standard library is used with the same
+compact output, so stored order JSON is identical whichever backend wrote it.
+
+Both backends natively handle the types that show up in menu and order
+payloads: enums are written as their value, datetimes and dates in ISO 8601
+format, and Pydantic models as their field dictionary.
+"""
+
+import enum
+import json
+from datetime import date, datetime
+from typing import Any
+
+from flask.json.provider import JSONProvider
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(obj: Any) -> Any:
+    """
+    Convert values neither backend serializes on its own.
+
+    Args:
+        obj: Value the encoder could not serialize
+
+    Returns:
+        A JSON-serializable stand-in for the value
+
+    Raises:
+        TypeError: If the value has no known JSON representation
+    """
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(obj: Any) -> str:
+        """
+        Serialize an object to a JSON string.
+
+        Args:
+            obj: Object to serialize
+
+        Returns:
+            str: Compact JSON text
+        """
+        # Datetimes go through _default so both backends format them the same way
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode()
+
+    def dumps_canonical(obj: Any) -> str:
+        """
+        Serialize an object to JSON with sorted keys, for hashing.
+
+        Args:
+            obj: Object to serialize
+
+        Returns:
+            str: Compact JSON text that is the same for equal objects
+        """
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS | orjson.OPT_SORT_KEYS).decode()
+
+    def loads(data: str | bytes) -> Any:
+        """
+        Deserialize JSON text.
+
+        Args:
+            data: JSON text as ``str`` or ``bytes``
+
+        Returns:
+            The decoded Python object
+        """
+        return orjson.loads(data)
+
+    JSONDecodeError = orjson.JSONDecodeError
+else:
+    _encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+    _canonical_encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False, sort_keys=True)
+
+    def dumps(obj: Any) -> str:
+        """
+        Serialize an object to a JSON string.
+
+        Args:
+            obj: Object to serialize
+
+        Returns:
+            str: Compact JSON text
+        """
+        return _encoder.encode(obj)
+
+    def dumps_canonical(obj: Any) -> str:
+        """
+        Serialize an object to JSON with sorted keys, for hashing.
+
+        Args:
+            obj: Object to serialize
+
+        Returns:
+            str: Compact JSON text that is the same for equal objects
+        """
+        return _canonical_encoder.encode(obj)
+
+    def loads(data: str | bytes) -> Any:
+        """
+        Deserialize JSON text.
+
+        Args:
+            data: JSON text as ``str`` or ``bytes``
+
+        Returns:
+            The decoded Python object
+        """
+        return json.loads(data)
+
+    JSONDecodeError = json.JSONDecodeError
+
+
+class CodecJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by this module.
+
+    Installed on the app in ``create_app`` so ``jsonify`` and
+    ``request.get_json`` use the same codec as the rest of the API.
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return loads(s)
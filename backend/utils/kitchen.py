@@ -0,0 +1,322 @@
+"""Kitchen prep list that batches identical items across open orders.
+
+During a rush the line makes one order at a time, even when several open
+orders hold the same item. The prep list instead groups the items of every
+open order (placed and not yet completed) by pickup window, and within a
+window by configuration: items with the same type, size, options and special
+instructions form one batch with their total quantity and the orders they
+belong to.
+
+Each worker process keeps its own board per store, updated per order rather
+than regrouped:
+
+- orders the worker's intake journal applies are added right away, and
+  orders completed through the worker are removed right away, each in time
+  proportional to the order's items
+- orders placed or completed through other workers are picked up from the
+  database, reading only rows past the highest order id already seen and
+  orders completed since the last read, at most every
+  ``KITCHEN_SYNC_INTERVAL`` seconds
+- the first sync, run when the worker starts, loads today's open orders
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from flask import Flask, current_app
+
+from db import db
+from models.FoodItem import display_item
+from models.OrderTable import OrderTable
+from utils import json_codec, order_items_codec, stores
+
+logger = logging.getLogger(__name__)
+
+EASTERN = ZoneInfo("America/New_York")
+DEFAULT_WINDOW_MINUTES = 15
+DEFAULT_SYNC_INTERVAL = 2.0
+# Stored fields that do not change how an item is made
+_NOT_CONFIGURATION = ("price", "_price", "_quantity")
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands timestamps back without tzinfo; they are stored in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def item_configuration(item: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Return what an item is made from, without its price and quantity.
+
+    Args:
+        item: Stored item of an order, as in ``OrderTable.order_items``, or
+            as serialized before being stored
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: Canonical key, equal for items made the
+        same way, and the configuration with option masks decoded and field
+        names without their leading underscore
+
+    Example:
+        >>> item_configuration({"type": "Drink", "_name": "Coke", "_size": "Regular", "_quantity": 2})[1]
+        {'type': 'Drink', 'name': 'Coke', 'size': 'Regular'}
+    """
+    # Round-trip so enums and schemas of freshly serialized items key like stored ones
+    shown = display_item(json_codec.loads(json_codec.dumps(item)))
+    configuration = {field.lstrip("_"): value for field, value in shown.items() if field not in _NOT_CONFIGURATION}
+    return json_codec.dumps_canonical(configuration), configuration
+
+
+class Batch:
+    """
+    Items of one configuration in one pickup window.
+
+    Attributes:
+        item (Dict[str, Any]): The configuration, see ``item_configuration``
+        quantity (int): Items to make
+        orders (Dict[int, int]): Quantity by order id
+    """
+
+    __slots__ = ("item", "quantity", "orders")
+
+    def __init__(self, item: Dict[str, Any]):
+        self.item = item
+        self.quantity = 0
+        self.orders: Dict[int, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"item": self.item, "quantity": self.quantity, "orders": sorted(self.orders)}
+
+
+class KitchenBoard:
+    """
+    Open items of one store, batched by pickup window and configuration.
+
+    Attributes:
+        window_seconds (int): Length of a pickup window
+        watermark (int): Highest order id read from the database
+        completed_since (Optional[datetime]): Latest completion read from the database
+    """
+
+    def __init__(self, window_minutes: int = DEFAULT_WINDOW_MINUTES, clock=time.time):
+        self.window_seconds = window_minutes * 60
+        self.watermark = 0
+        self.completed_since: Optional[datetime] = None
+        self.synced_at: Optional[float] = None
+        self._clock = clock
+        self._windows: Dict[int, Dict[str, Batch]] = {}  # by window number, then configuration key
+        # Window number and (configuration key, quantity) of every open order, to remove it again
+        self._orders: Dict[int, Tuple[int, List[Tuple[str, int]]]] = {}
+        self._completed: set = set()  # completed before the database read that would add them
+        self._lock = threading.Lock()
+
+    def _window(self, pickup_at: datetime) -> int:
+        return int(_utc(pickup_at).timestamp() // self.window_seconds)
+
+    def _add(self, order_id: int, pickup_at: datetime, items: List[Dict[str, Any]]):
+        if order_id in self._orders or order_id in self._completed:
+            return
+        window = self._window(pickup_at)
+        batches = self._windows.setdefault(window, {})
+        lines = []
+        for item in items:
+            key, configuration = item_configuration(item)
+            quantity = item.get("_quantity") or 1
+            batch = batches.get(key)
+            if batch is None:
+                batch = batches[key] = Batch(configuration)
+            batch.quantity += quantity
+            batch.orders[order_id] = batch.orders.get(order_id, 0) + quantity
+            lines.append((key, quantity))
+        self._orders[order_id] = (window, lines)
+
+    def _remove(self, order_id: int):
+        found = self._orders.pop(order_id, None)
+        if found is None:
+            return
+        window, lines = found
+        batches = self._windows[window]
+        for key, quantity in lines:
+            batch = batches[key]
+            batch.quantity -= quantity
+            batch.orders[order_id] -= quantity
+            if batch.orders[order_id] <= 0:
+                del batch.orders[order_id]
+            if batch.quantity <= 0:
+                del batches[key]
+        if not batches:
+            del self._windows[window]
+
+    def _roll(self, now: float):
+        # Orders picked up before today are never made; forget those left open
+        start_of_day = datetime.fromtimestamp(now, EASTERN).replace(hour=0, minute=0, second=0, microsecond=0)
+        oldest = int(start_of_day.timestamp() // self.window_seconds)
+        for window in [window for window in self._windows if window < oldest]:
+            for order_id in [order_id for order_id, (at, _) in self._orders.items() if at == window]:
+                self._remove(order_id)
+
+    def add_order(self, order_id: int, pickup_at: datetime, items: List[Dict[str, Any]]):
+        """
+        Add an order's items as it is committed; adding it again has no effect.
+
+        Args:
+            order_id: Id of the new order row
+            pickup_at: When the order will be picked up
+            items: Its stored items
+        """
+        with self._lock:
+            self._add(order_id, pickup_at, items)
+
+    def complete_order(self, order_id: int):
+        """Remove a completed order's items."""
+        with self._lock:
+            self._remove(order_id)
+            if order_id > self.watermark:
+                self._completed.add(order_id)
+
+    def sync(self, opened: Iterable[Tuple[int, datetime, str]], completed: Iterable[Tuple[int, datetime]]):
+        """
+        Apply orders read from the database.
+
+        Args:
+            opened: ``(id, pickup_at, order_items)`` of open orders above ``watermark``, by id
+            completed: ``(id, completed_at)`` of orders completed since ``completed_since``
+        """
+        with self._lock:
+            now = self._clock()
+            for order_id, pickup_at, order_items in opened:
+                self._add(order_id, pickup_at, order_items_codec.loads(order_items))
+                self.watermark = max(self.watermark, order_id)
+            for order_id, completed_at in completed:
+                self._remove(order_id)
+                completed_at = _utc(completed_at)
+                if self.completed_since is None or completed_at > self.completed_since:
+                    self.completed_since = completed_at
+            self._completed = {order_id for order_id in self._completed if order_id > self.watermark}
+            self._roll(now)
+            self.synced_at = now
+
+    def prep_list(self) -> List[Dict[str, Any]]:
+        """
+        Return the open batches by pickup window, earliest window first.
+
+        Returns:
+            List[Dict[str, Any]]: ``window_start`` and ``window_end`` (ISO 8601,
+            UTC) and the window's ``batches``, largest first, each with its
+            ``item``, ``quantity`` and ``orders``
+        """
+        with self._lock:
+            self._roll(self._clock())
+            prep = []
+            for window in sorted(self._windows):
+                batches = sorted(self._windows[window].items(), key=lambda entry: (-entry[1].quantity, entry[0]))
+                start = datetime.fromtimestamp(window * self.window_seconds, timezone.utc)
+                end = datetime.fromtimestamp((window + 1) * self.window_seconds, timezone.utc)
+                prep.append({
+                    "window_start": start.isoformat(),
+                    "window_end": end.isoformat(),
+                    "batches": [batch.to_dict() for _, batch in batches],
+                })
+            return prep
+
+
+def _boards(app: Flask) -> Dict[str, KitchenBoard]:
+    return app.extensions.setdefault("kitchen", {})
+
+
+def board(app: Optional[Flask] = None, store_id: Optional[str] = None) -> KitchenBoard:
+    """Return the board of a store, the current one by default."""
+    app = app or current_app._get_current_object()
+    store_id = store_id or stores.current_store_id()
+    boards = _boards(app)
+    found = boards.get(store_id)
+    if found is None:
+        found = boards.setdefault(store_id, KitchenBoard(app.config["KITCHEN_WINDOW_MINUTES"]))
+    return found
+
+
+def is_open(payment_status: str) -> bool:
+    """Whether an order with this payment status is made: cash orders are paid at pickup."""
+    return payment_status != "failed"
+
+
+def record_order(app: Flask, store_id: str, order_id: int, pickup_at: datetime, payment_status: str, items: List[Dict[str, Any]]):
+    """
+    Add an order of a store to its board as it is committed; see ``KitchenBoard.add_order``.
+
+    Never raises, since the order is already stored: an order that cannot be
+    added is only logged, and the next sync cannot add it either, so the
+    kitchen still sees it through ``get_today_orders``.
+    """
+    if not is_open(payment_status):
+        return
+    try:
+        board(app, store_id).add_order(order_id, pickup_at, items)
+    except Exception as e:
+        logger.warning(f"Could not add order {order_id} to the kitchen board: {str(e)}")
+
+
+def sync(force: bool = False) -> KitchenBoard:
+    """
+    Bring the current store's board up to date with its database.
+
+    Reads only open orders for today past the board's watermark and orders
+    completed since the last read, at most every ``KITCHEN_SYNC_INTERVAL``
+    seconds unless forced.
+
+    Returns:
+        KitchenBoard: The current store's board
+    """
+    found = board()
+    now = time.time()
+    started = datetime.now(timezone.utc)
+    if not force and found.synced_at is not None and now - found.synced_at < current_app.config["KITCHEN_SYNC_INTERVAL"]:
+        return found
+    start_of_day = datetime.fromtimestamp(now, EASTERN).replace(hour=0, minute=0, second=0, microsecond=0)
+    opened = db.session.query(OrderTable.id, OrderTable.pickup_at, OrderTable.order_items).filter(
+        OrderTable.id > found.watermark,
+        OrderTable.pickup_at >= start_of_day.astimezone(timezone.utc),
+        OrderTable.completed_at.is_(None),
+        OrderTable.payment_status != "failed",
+    ).order_by(OrderTable.id).all()
+    completed = []
+    if found.completed_since is not None:
+        # Served by the completed_at index; >= so completions with the same timestamp are not missed
+        completed = db.session.query(OrderTable.id, OrderTable.completed_at).filter(
+            OrderTable.completed_at >= found.completed_since,
+        ).all()
+    found.sync(opened, completed)
+    if found.completed_since is None:
+        # Orders completed before the first read were not read as open
+        found.completed_since = started
+    return found
+
+
+def warm(app: Flask):
+    """Load today's open orders of every store from its database, e.g. when a worker starts."""
+    try:
+        with app.app_context():
+            stores.fan_out(lambda: sync(force=True))
+    except Exception as e:
+        # The first request of each store syncs instead
+        logger.warning(f"Could not load the kitchen board at startup: {str(e)}")
+
+
+def init_app(app: Flask):
+    """
+    Configure the kitchen prep list from the environment.
+
+    - ``KITCHEN_WINDOW_MINUTES``: length of a pickup window (default 15)
+    - ``KITCHEN_SYNC_INTERVAL``: seconds between reads of orders placed or
+      completed through other workers (default 2)
+
+    Args:
+        app: Flask application
+    """
+    app.config["KITCHEN_WINDOW_MINUTES"] = int(os.getenv("KITCHEN_WINDOW_MINUTES", DEFAULT_WINDOW_MINUTES))
+    app.config["KITCHEN_SYNC_INTERVAL"] = float(os.getenv("KITCHEN_SYNC_INTERVAL", DEFAULT_SYNC_INTERVAL))
@@ -0,0 +1,237 @@
+"""Application logging for Steve's Place.
+
+``init_app`` installs one logging pipeline for the whole process: records
+from every module go through a ``QueueHandler`` on the root logger, and a
+``QueueListener`` thread writes them out as JSON lines to stderr and to a
+size-rotated file. Request threads only put records on an in-memory queue,
+so they never wait on disk or terminal writes.
+
+Each request gets an id, taken from the ``X-Request-ID`` header when the
+client (or a proxy) sent a sane one and generated otherwise. It is added to
+every record logged while handling the request and echoed back in the
+response header.
+
+Settings come from the environment:
+
+- ``LOG_LEVEL``: root log level (default ``INFO``)
+- ``LOG_DIR``: directory of ``app.log``; empty disables the file (default ``logs``)
+- ``LOG_MAX_BYTES`` / ``LOG_BACKUP_COUNT``: rotation size and files kept
+  (default 10 MB, 5 files)
+- ``LOG_PAYLOAD_SAMPLE_RATE``: fraction of ``sampled_debug`` payload dumps
+  written at ``DEBUG`` level (default 0.01)
+"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, List, Optional
+
+from flask import Flask, g, has_request_context, request
+
+from utils import json_codec
+
+LOG_FILE_NAME = "app.log"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_PAYLOAD_SAMPLE_RATE = 0.01
+# Records waiting for the listener; beyond this new records are dropped rather than blocking requests
+QUEUE_SIZE = 10000
+
+# Incoming request ids are echoed into logs and headers, so only accept plain tokens
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_output_handlers: List[logging.Handler] = []
+_payload_sample_rate = DEFAULT_PAYLOAD_SAMPLE_RATE
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+
+    Every line has ``ts``, ``level``, ``logger`` and ``message``, plus
+    ``request_id`` inside a request, ``exc`` when an exception was logged,
+    and any fields passed through ``extra``.
+
+    Example:
+        >>> logger.info("Order created", extra={"order_id": 42})
+        {"ts":"2024-01-15T12:00:00.000+00:00","level":"INFO","logger":"routes.checkout_api","message":"Order created","order_id":42}
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        try:
+            return json_codec.dumps(entry)
+        except TypeError:
+            return json_codec.dumps({k: v if isinstance(v, (str, int, float, bool, type(None))) else repr(v) for k, v in entry.items()})
+
+
+class RequestQueueHandler(QueueHandler):
+    """
+    Queue handler that stamps records with the request id before queueing.
+
+    The listener thread formats records later, outside the request, so the
+    request id and the rendered message and traceback are captured here.
+    Records are dropped instead of blocking when the queue is full.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        if has_request_context() and "request_id" in g:
+            record.request_id = g.request_id
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def sampled_debug(logger: logging.Logger, message: str, **fields: Any) -> None:
+    """
+    Log a payload dump at ``DEBUG`` level for a sample of calls.
+
+    Payloads such as raw order items are useful when debugging but too
+    large to log on every request. Only a ``LOG_PAYLOAD_SAMPLE_RATE``
+    fraction of calls is written, and nothing is built when ``DEBUG`` is off.
+
+    Args:
+        logger: Logger to write to
+        message: Log message
+        **fields: Payload fields added to the JSON line
+
+    Example:
+        >>> sampled_debug(logger, "Validating item", item_type="hotdog", item_data=item_data)
+    """
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < _payload_sample_rate:
+        logger.debug(message, extra=fields)
+
+
+def mask_phone(phone_number: Any) -> str:
+    """
+    Mask a phone number for logging, keeping the last four digits.
+
+    Example:
+        >>> mask_phone("5551234567")
+        '******4567'
+    """
+    text = str(phone_number)
+    return "*" * max(len(text) - 4, 0) + text[-4:]
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def restart_listener():
+    """
+    Start a new listener thread for the configured handlers.
+
+    Threads do not survive ``fork``; pre-forking servers call this in each
+    worker after forking so queued records are written again.
+    """
+    global _listener
+    if _queue_handler is None:
+        return
+    if _listener is not None and _listener._thread is not None and _listener._thread.is_alive():
+        return
+    # In a forked child the old listener thread is gone and the queue holds the
+    # parent's records (and possibly its locks), so start over with a fresh one
+    _queue_handler.queue = queue.Queue(QUEUE_SIZE)
+    _listener = QueueListener(_queue_handler.queue, *_output_handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def configure_logging():
+    """
+    Install the queue handler on the root logger and start the listener.
+
+    Safe to call again (``create_app`` runs once per test); the previous
+    pipeline is stopped and replaced, so records are never written twice.
+    """
+    global _queue_handler, _output_handlers, _payload_sample_rate
+    _stop_listener()
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+    for handler in _output_handlers:
+        handler.close()
+
+    formatter = JsonFormatter()
+    _output_handlers = [logging.StreamHandler(sys.stderr)]
+    log_dir = os.getenv("LOG_DIR", "logs")
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        _output_handlers.append(RotatingFileHandler(
+            os.path.join(log_dir, LOG_FILE_NAME),
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            backupCount=int(os.getenv("LOG_BACKUP_COUNT", DEFAULT_BACKUP_COUNT)),
+            encoding="utf-8",
+        ))
+    for handler in _output_handlers:
+        handler.setFormatter(formatter)
+    _payload_sample_rate = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", DEFAULT_PAYLOAD_SAMPLE_RATE))
+
+    _queue_handler = RequestQueueHandler(queue.Queue(QUEUE_SIZE))
+    root.addHandler(_queue_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    restart_listener()
+
+
+def _assign_request_id():
+    incoming = request.headers.get("X-Request-ID", "")
+    g.request_id = incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+
+def _echo_request_id(response):
+    request_id = g.get("request_id")
+    if request_id is not None:
+        response.headers["X-Request-ID"] = request_id
+    return response
+
+
+def init_app(app: Flask):
+    """
+    Configure process logging and install the request id middleware.
+
+    Args:
+        app: Flask application
+    """
+    configure_logging()
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
+
+
+# Flush what is still queued when the interpreter exits
+atexit.register(_stop_listener)
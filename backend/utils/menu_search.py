@@ -0,0 +1,233 @@
+"""Menu search for the in-store kiosk.
+
+Indexes every menu item and option defined by the model enums (meats,
+breads, cheeses, toppings, add-ons, dressings, sides, chips and drinks)
+with its category and price, so a type-to-search box can query the server
+instead of downloading every ``get_*`` payload. Sizes are not indexed.
+
+The index is built once when the module is imported:
+
+- a trie over the words of every name answers prefix queries ("pastr")
+- a word index marks exact word matches, which rank first
+- a deletion index over word prefixes answers words with one typo or
+  swapped letters ("pastrmi" and "pastarmi" both find "Hot Pastrami")
+
+Names are matched without case or accents, every word of the query must
+match, and the number of results is capped.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from models.Category import Category
+from models.Drink import DRINK_PRICE_MAP, BottleDrink, DrinkSize, FountainDrink
+from models.EggSandwich import EGG_SANDWICH_ADD_ONS_PRICE_MAP, Egg, EggSandwichAddOns, EggSandwichBread, EggSandwichCheese, EggSandwichMeat, EggSandwichToppings
+from models.Hotdog import HOT_DOG_PRICE_MAP, HotDogMeat, HotDogTopping
+from models.Salad import SALAD_ADD_ONS_PRICE_MAP, SALAD_PRICE_MAP, SaladAddOns, SaladChoice, SaladDressing, SaladTopping
+from models.Sandwich import SANDWICH_ADD_ONS_PRICE_MAP, SANDWICH_PRICE_MAP, SandwichAddOns, SandwichBread, SandwichCheese, SandwichMeat, SandwichToppings
+from models.Side import SIDE_PRICE_MAP, Chips, SideName
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+MAX_QUERY_LENGTH = 64
+# Shortest query word that is also matched with a typo
+FUZZY_MIN_LENGTH = 3
+
+_FOUNTAIN_PRICES = {size: price for size, price in DRINK_PRICE_MAP.items() if size != DrinkSize.BOTTLE}
+
+# (category, option group, enum, prices): prices is a dict by enum value, or
+# the one price of every value, or None when the options are free
+_SOURCES: Tuple[Tuple[Category, str, type, Any], ...] = (
+    (Category.HOTDOG, "Hotdog", HotDogMeat, HOT_DOG_PRICE_MAP),
+    (Category.HOTDOG, "Toppings", HotDogTopping, None),
+    (Category.SANDWICH, "Meat", SandwichMeat, SANDWICH_PRICE_MAP),
+    (Category.SANDWICH, "Bread", SandwichBread, None),
+    (Category.SANDWICH, "Cheese", SandwichCheese, None),
+    (Category.SANDWICH, "Toppings", SandwichToppings, None),
+    (Category.SANDWICH, "Add Ons", SandwichAddOns, SANDWICH_ADD_ONS_PRICE_MAP),
+    (Category.EGGSANDWICH, "Egg", Egg, None),
+    (Category.EGGSANDWICH, "Bread", EggSandwichBread, None),
+    (Category.EGGSANDWICH, "Meat", EggSandwichMeat, None),
+    (Category.EGGSANDWICH, "Cheese", EggSandwichCheese, None),
+    (Category.EGGSANDWICH, "Toppings", EggSandwichToppings, None),
+    (Category.EGGSANDWICH, "Add Ons", EggSandwichAddOns, EGG_SANDWICH_ADD_ONS_PRICE_MAP),
+    (Category.SALAD, "Salad", SaladChoice, SALAD_PRICE_MAP),
+    (Category.SALAD, "Toppings", SaladTopping, None),
+    (Category.SALAD, "Dressing", SaladDressing, None),
+    (Category.SALAD, "Add Ons", SaladAddOns, SALAD_ADD_ONS_PRICE_MAP),
+    (Category.SIDE, "Side", SideName, SIDE_PRICE_MAP),
+    (Category.SIDE, "Chips", Chips, SIDE_PRICE_MAP[SideName.CHIPS]),
+    (Category.DRINK, "Drink", FountainDrink, {drink: _FOUNTAIN_PRICES for drink in FountainDrink}),
+    (Category.DRINK, "Bottled Soda", BottleDrink, DRINK_PRICE_MAP[DrinkSize.BOTTLE]),
+)
+
+
+class SearchEntry(NamedTuple):
+    """
+    One searchable menu item or option.
+
+    Attributes:
+        name (str): Display name, as in the ``get_*`` endpoints
+        category (str): Category the item or option belongs to
+        option (str): Option group within the category, e.g. "Toppings"
+        price (Optional[Any]): Price as formatted by ``get_menu`` (a string,
+            or a string per size), None when the option is free
+    """
+    name: str
+    category: str
+    option: str
+    price: Optional[Any]
+
+
+def normalize(text: str) -> str:
+    """
+    Fold text for matching: lower case, accents removed.
+
+    Args:
+        text: Name or query
+
+    Returns:
+        str: The folded text, e.g. "jalapeño" -> "jalapeno"
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def words(text: str) -> List[str]:
+    """Split normalized text into its words."""
+    return re.findall(r"[a-z0-9]+", normalize(text))
+
+
+def _format_price(price: Any) -> Optional[Any]:
+    if price is None:
+        return None
+    if isinstance(price, dict):
+        return {size.value: f"{value:.2f}" for size, value in price.items()}
+    return f"{price:.2f}"
+
+
+def _deletions(word: str) -> Iterator[str]:
+    yield word
+    for i in range(len(word)):
+        yield word[:i] + word[i + 1:]
+
+
+class MenuIndex:
+    """
+    Prefix, word and one-typo index over menu entries.
+
+    Example:
+        >>> index = MenuIndex.build()
+        >>> [entry.name for entry in index.search("pastr")]
+        ['Hot Pastrami', 'Half Hot Pastrami Half Corned Beef']
+    """
+
+    def __init__(self, entries: List[SearchEntry]):
+        self.entries = entries
+        # Trie node: (children by character, ids of entries with a word below the node)
+        self._trie: Tuple[Dict[str, tuple], Set[int]] = ({}, set())
+        self._words: Dict[str, Set[int]] = {}
+        self._fuzzy: Dict[str, Set[int]] = {}
+        self._first_words = [words(entry.name)[:1] for entry in entries]
+        for entry_id, entry in enumerate(entries):
+            for word in words(entry.name):
+                self._add_word(word, entry_id)
+
+    @classmethod
+    def build(cls) -> "MenuIndex":
+        """Index every item and option of the menu."""
+        entries = []
+        for category, option, options, prices in _SOURCES:
+            for value in options:
+                price = prices.get(value) if isinstance(prices, dict) else prices
+                entries.append(SearchEntry(value.value, category.value, option, _format_price(price)))
+        return cls(entries)
+
+    def _add_word(self, word: str, entry_id: int):
+        self._words.setdefault(word, set()).add(entry_id)
+        node = self._trie
+        for char in word:
+            node = node[0].setdefault(char, ({}, set()))
+            node[1].add(entry_id)
+        for length in range(FUZZY_MIN_LENGTH, len(word) + 1):
+            for key in _deletions(word[:length]):
+                self._fuzzy.setdefault(key, set()).add(entry_id)
+
+    def _prefix(self, word: str) -> Set[int]:
+        node = self._trie
+        for char in word:
+            node = node[0].get(char)
+            if node is None:
+                return set()
+        return node[1]
+
+    def _typo(self, word: str) -> Set[int]:
+        if len(word) < FUZZY_MIN_LENGTH:
+            return set()
+        found: Set[int] = set()
+        for key in _deletions(word):
+            found |= self._fuzzy.get(key, set())
+        return found
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, exclude_categories: frozenset = frozenset()) -> List[SearchEntry]:
+        """
+        Find the entries whose words match every word of a query.
+
+        Each query word matches a word of the name exactly, as a prefix or,
+        when nothing matches it as a prefix, with one typo. Exact words rank
+        above prefixes, prefixes above typos, and names starting with the
+        first query word and shorter names first.
+
+        Args:
+            query: Search text, e.g. "hot past"
+            limit: Maximum number of results
+            exclude_categories: Categories left out, e.g. those a store does not sell
+
+        Returns:
+            List[SearchEntry]: Best matches first
+        """
+        query_words = words(query)
+        if not query_words:
+            return []
+        scores: Optional[Dict[int, int]] = None
+        for word in query_words:
+            matches = self._prefix(word)
+            exact = self._words.get(word, set())
+            weight = 2
+            if not matches:
+                matches, weight = self._typo(word), 1
+            candidates = matches if scores is None else matches & scores.keys()
+            scores = {entry_id: (scores or {}).get(entry_id, 0) + weight + (entry_id in exact) for entry_id in candidates}
+            if not scores:
+                return []
+
+        first = query_words[0]
+        ranked = sorted(
+            (entry_id for entry_id in scores if self.entries[entry_id].category not in exclude_categories),
+            key=lambda entry_id: (
+                -scores[entry_id],
+                not any(word.startswith(first) for word in self._first_words[entry_id]),
+                len(self.entries[entry_id].name),
+                entry_id,
+            ),
+        )
+        return [self.entries[entry_id] for entry_id in ranked[:limit]]
+
+
+MENU_INDEX = MenuIndex.build()
+
+
+def search(query: str, limit: int = DEFAULT_LIMIT, exclude_categories: frozenset = frozenset()) -> List[Dict[str, Any]]:
+    """
+    Search the menu index.
+
+    Args:
+        query: Search text
+        limit: Maximum number of results, at most ``MAX_LIMIT``
+        exclude_categories: Categories left out of the results
+
+    Returns:
+        List[Dict[str, Any]]: ``name``, ``category``, ``option`` and ``price`` of each match
+    """
+    return [entry._asdict() for entry in MENU_INDEX.search(query[:MAX_QUERY_LENGTH], min(limit, MAX_LIMIT), exclude_categories)]
@@ -0,0 +1,305 @@
+"""In-process metrics for Steve's Place, exposed in Prometheus text format.
+
+Defines counters, gauges and histograms with labels, the request
+middleware installed by ``init_app``, and ``stage`` timers for the steps of
+the checkout pipeline. Recording a sample is a dictionary lookup and a few
+additions under a lock, cheap enough to leave on in production.
+
+Metrics live in the memory of the process that records them; with several
+worker processes each one reports its own values and Prometheus sums them
+across scrape targets.
+"""
+
+import abc
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from flask import Flask, g, has_request_context, request
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    """Shared name, help text, labels and lock of every metric type."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._labelset = frozenset(self.labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if labels.keys() != self._labelset:
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]:
+        """Return the metric's sample lines in the text exposition format."""
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count.
+
+    Example:
+        >>> ORDERS = Counter("orders_total", "Orders created", ["payment_method"])
+        >>> ORDERS.inc(payment_method="card")
+    """
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down, e.g. requests in flight.
+
+    Example:
+        >>> IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being served")
+        >>> IN_FLIGHT.inc(); IN_FLIGHT.dec()
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items()) or ([((), 0)] if not self.labelnames else [])
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Example:
+        >>> LATENCY = Histogram("request_seconds", "Request latency", ["route"])
+        >>> LATENCY.observe(0.042, route="/api/get_info/get_menu")
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together at ``/metrics``."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "steves_http_requests_total", "HTTP requests served, by route and status.", ["method", "route", "status"]))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "steves_http_request_duration_seconds", "Time to serve an HTTP request.", ["method", "route"]))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "steves_http_requests_in_flight", "HTTP requests currently being served."))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "steves_checkout_stage_duration_seconds", "Time spent in each checkout stage.", ["route", "stage"]))
+ORDERS_CREATED = REGISTRY.register(Counter(
+    "steves_orders_created_total", "Orders stored, by payment method.", ["payment_method"]))
+RATE_LIMITED = REGISTRY.register(Counter(
+    "steves_rate_limited_total", "Requests refused with 429 by a rate limit, by bucket scope.", ["route", "scope"]))
+LOAD_SHED = REGISTRY.register(Counter(
+    "steves_load_shed_total", "Requests refused with 503 by the provider concurrency limit.", ["route"]))
+INTAKE_BACKLOG = REGISTRY.register(Gauge(
+    "steves_intake_backlog", "Journaled orders not inserted into the database yet."))
+INTAKE_APPLY_FAILURES = REGISTRY.register(Counter(
+    "steves_intake_apply_failures_total", "Failed attempts to insert a journaled order."))
+TICKET_BACKLOG = REGISTRY.register(Gauge(
+    "steves_ticket_backlog", "Kitchen tickets queued and not printed yet."))
+TICKET_PRINT_FAILURES = REGISTRY.register(Counter(
+    "steves_ticket_print_failures_total", "Failed attempts to write kitchen tickets to the printer."))
+REVIEW_TOKENS = REGISTRY.register(Counter(
+    "steves_review_tokens_total", "Review tokens presented at checkout, by result (accepted, stale, invalid).", ["result"]))
+DB_QUERIES = REGISTRY.register(Histogram(
+    "steves_db_queries_per_request", "SQL statements executed per request.", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34)))
+DB_DURATION = REGISTRY.register(Histogram(
+    "steves_db_duration_seconds", "Time spent in SQL statements per request.", ["route"]))
+DB_QUERY_BUDGET_EXCEEDED = REGISTRY.register(Counter(
+    "steves_db_query_budget_exceeded_total", "Requests that ran more SQL statements than the query budget.", ["route"]))
+DB_REPEATED_QUERIES = REGISTRY.register(Counter(
+    "steves_db_repeated_queries_total", "Requests that ran one SQL statement repeatedly (possible N+1).", ["route"]))
+
+
+def route_label() -> str:
+    """Return the URL rule of the current request, keeping label cardinality bounded."""
+    if not has_request_context():
+        return "none"
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a stage of the checkout pipeline.
+
+    Args:
+        name: Stage name, e.g. ``"parse"``, ``"validate"``, ``"stripe"`` or ``"db"``
+
+    Example:
+        >>> with stage("db"):
+        ...     db.session.commit()
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, route=route_label(), stage=name)
+
+
+def timed_stage(name: str):
+    """Decorator form of ``stage`` for helper functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    IN_FLIGHT.inc()
+
+
+def _after_request(response):
+    start = g.get("metrics_start")
+    if start is not None:
+        route = route_label()
+        REQUEST_DURATION.observe(time.perf_counter() - start, method=request.method, route=route)
+        REQUESTS.inc(method=request.method, route=route, status=str(response.status_code))
+    return response
+
+
+def _teardown_request(exc):
+    # Runs even when the request failed, so the gauge never drifts
+    if g.pop("metrics_start", None) is not None:
+        IN_FLIGHT.dec()
+
+
+def init_app(app: Flask):
+    """
+    Install the request middleware that records request metrics.
+
+    Args:
+        app: Flask application
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
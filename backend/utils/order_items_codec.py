@@ -0,0 +1,324 @@
+"""Storage encodings for the order items column of Steve's Place.
+
+``OrderTable.order_items`` holds the serialized items of an order. Two
+encodings are supported and can be mixed freely within one table:
+
+- ``json``: the output of ``serialize_food_item`` as JSON text (the original
+  format, and still the default)
+- ``compact``: a versioned binary format, stored as ``c1:`` followed by
+  base64 so it fits the existing text column
+
+The compact format drops what every JSON item repeats: the item type is a
+small code, attribute names are implied by the model's ``__slots__`` layout,
+enum display strings are dictionary-coded as (enum, ordinal) pairs and
+prices are stored in cents. Anything the format has no shorter form for
+(free text, legacy item layouts, unknown strings) is still stored, just
+less compactly, so every item round-trips to exactly what ``json`` would
+have stored.
+
+Compatibility rules for version 1: ``ITEM_TYPES`` and ``ENUM_TABLE`` are
+append-only, enums must only be appended to (the rule ``OptionMask``
+already relies on), and changing a model's ``__slots__`` requires a new
+format version.
+
+The deployment picks the encoding for new rows with the
+``ORDER_ITEMS_ENCODING`` setting; existing rows are converted with
+``flask order-items migrate``.
+"""
+
+import base64
+import struct
+from enum import Enum
+from typing import Any, Dict, List, Tuple
+
+from pydantic import BaseModel
+
+from utils import json_codec
+from models.FoodItem import FoodItem
+from models.Sandwich import SandwichSize, SandwichBread, SandwichMeat, SandwichCheese, SandwichToppings, SandwichAddOns
+from models.EggSandwich import Egg, EggSandwichBread, EggSandwichMeat, EggSandwichCheese, EggSandwichToppings, EggSandwichAddOns
+from models.Salad import SaladChoice, SaladTopping, SaladDressing, SaladAddOns
+from models.Hotdog import HotDogMeat, HotDogTopping
+from models.Side import SideSize, Chips, SideName
+from models.Drink import DrinkSize, FountainDrink, BottleDrink
+from models.Combo import Combo  # noqa: F401 - registers the Combo layout
+
+ENCODINGS = ("json", "compact")
+COMPACT_PREFIX = "c1:"
+
+# Item type codes; code 0 marks an item stored as a generic dictionary
+ITEM_TYPES: Tuple[str, ...] = ("Sandwich", "EggSandwich", "Salad", "Hotdog", "Side", "Drink", "Combo")
+
+# Enums whose display strings are dictionary-coded, by position
+ENUM_TABLE: Tuple[type, ...] = (
+    SandwichSize, SandwichBread, SandwichMeat, SandwichCheese, SandwichToppings, SandwichAddOns,
+    Egg, EggSandwichBread, EggSandwichMeat, EggSandwichCheese, EggSandwichToppings, EggSandwichAddOns,
+    SaladChoice, SaladTopping, SaladDressing, SaladAddOns,
+    HotDogMeat, HotDogTopping,
+    SideSize, Chips, SideName,
+    DrinkSize, FountainDrink, BottleDrink,
+)
+
+# Value tags
+_NONE, _FALSE, _TRUE, _INT, _NEG_INT, _CENTS, _FLOAT, _STR, _ENUM, _LIST, _DICT = range(11)
+
+_ITEM_CODES: Dict[str, int] = {name: code for code, name in enumerate(ITEM_TYPES, start=1)}
+_ENUM_IDS: Dict[type, int] = {enum_cls: index for index, enum_cls in enumerate(ENUM_TABLE)}
+_ORDINALS: Dict[Enum, int] = {
+    member: ordinal for enum_cls in ENUM_TABLE for ordinal, member in enumerate(enum_cls)
+}
+_ENUM_CODES: Dict[str, Tuple[int, int]] = {}
+for _enum_id, _enum_cls in enumerate(ENUM_TABLE):
+    for _ordinal, _member in enumerate(_enum_cls):
+        _ENUM_CODES.setdefault(_member.value, (_enum_id, _ordinal))
+_ENUM_VALUES: Tuple[Tuple[str, ...], ...] = tuple(
+    tuple(member.value for member in enum_cls) for enum_cls in ENUM_TABLE
+)
+_DOUBLE = struct.Struct("<d")
+
+
+# Keys implied by each item type: ``price`` then its slots, ``_price`` being a copy of ``price``
+_LAYOUTS: Dict[str, Tuple[str, ...]] = {
+    name: ("price",) + tuple(slot for slot in FoodItem.registry[name].__slots__ if slot != "_price")
+    for name in ITEM_TYPES
+}
+
+
+def _write_uint(out: bytearray, value: int):
+    """Append an unsigned integer as a LEB128 varint."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_uint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Read a LEB128 varint, returning the value and the next position."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _write_str(out: bytearray, value: str):
+    """Append a length-prefixed UTF-8 string."""
+    raw = value.encode()
+    _write_uint(out, len(raw))
+    out += raw
+
+
+def _read_str(data: bytes, pos: int) -> Tuple[str, int]:
+    """Read a length-prefixed UTF-8 string."""
+    length, pos = _read_uint(data, pos)
+    return data[pos:pos + length].decode(), pos + length
+
+
+def _write_value(out: bytearray, value: Any):
+    """Append one tagged value."""
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, Enum):
+        if value in _ORDINALS:
+            out.append(_ENUM)
+            _write_uint(out, _ENUM_IDS[type(value)])
+            _write_uint(out, _ORDINALS[value])
+        else:
+            _write_value(out, value.value)
+    elif isinstance(value, int):
+        out.append(_INT if value >= 0 else _NEG_INT)
+        _write_uint(out, abs(value))
+    elif isinstance(value, float):
+        cents = round(value * 100)
+        if cents >= 0 and cents / 100 == value:
+            out.append(_CENTS)
+            _write_uint(out, cents)
+        else:
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(value)
+    elif isinstance(value, str):
+        code = _ENUM_CODES.get(value)
+        if code is not None:
+            out.append(_ENUM)
+            _write_uint(out, code[0])
+            _write_uint(out, code[1])
+        else:
+            out.append(_STR)
+            _write_str(out, value)
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _write_uint(out, len(value))
+        for element in value:
+            _write_value(out, element)
+    elif isinstance(value, BaseModel):
+        _write_value(out, value.model_dump())
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        _write_uint(out, len(value))
+        for key, element in value.items():
+            _write_value(out, key)
+            _write_value(out, element)
+    else:
+        raise TypeError(f"Cannot encode value of type {type(value).__name__}")
+
+
+def _read_value(data: bytes, pos: int) -> Tuple[Any, int]:
+    """Read one tagged value, returning it as JSON would decode it."""
+    tag = data[pos]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _INT:
+        return _read_uint(data, pos)
+    if tag == _NEG_INT:
+        value, pos = _read_uint(data, pos)
+        return -value, pos
+    if tag == _CENTS:
+        cents, pos = _read_uint(data, pos)
+        return cents / 100, pos
+    if tag == _FLOAT:
+        return _DOUBLE.unpack_from(data, pos)[0], pos + _DOUBLE.size
+    if tag == _STR:
+        return _read_str(data, pos)
+    if tag == _ENUM:
+        enum_id, pos = _read_uint(data, pos)
+        ordinal, pos = _read_uint(data, pos)
+        return _ENUM_VALUES[enum_id][ordinal], pos
+    if tag == _LIST:
+        length, pos = _read_uint(data, pos)
+        values = []
+        for _ in range(length):
+            value, pos = _read_value(data, pos)
+            values.append(value)
+        return values, pos
+    if tag == _DICT:
+        length, pos = _read_uint(data, pos)
+        values = {}
+        for _ in range(length):
+            key, pos = _read_value(data, pos)
+            values[key], pos = _read_value(data, pos)
+        return values, pos
+    raise ValueError(f"Unknown value tag {tag} in compact order items")
+
+
+def _write_item(out: bytearray, item: Dict[str, Any]):
+    """Append one item, using its type's slot layout when it matches."""
+    code = _ITEM_CODES.get(item.get("type"))
+    if code is not None:
+        layout = _LAYOUTS[item["type"]]
+        if (len(item) == len(layout) + 2 and item.get("_price") == item.get("price")
+                and all(key in item for key in layout)):
+            _write_uint(out, code)
+            for key in layout:
+                _write_value(out, item[key])
+            return
+    # Items that do not match their current layout, e.g. from older releases
+    _write_uint(out, 0)
+    _write_value(out, item)
+
+
+def _read_item(data: bytes, pos: int) -> Tuple[Dict[str, Any], int]:
+    """Read one item, restoring the key order ``serialize_food_item`` produces."""
+    code, pos = _read_uint(data, pos)
+    if code == 0:
+        return _read_value(data, pos)
+    type_name = ITEM_TYPES[code - 1]
+    values: Dict[str, Any] = {}
+    for key in _LAYOUTS[type_name]:
+        values[key], pos = _read_value(data, pos)
+    item: Dict[str, Any] = {"type": type_name, "price": values["price"]}
+    for name in FoodItem.registry[type_name].__slots__:
+        item[name] = values["price"] if name == "_price" else values[name]
+    return item, pos
+
+
+def encode_compact(items: List[Dict[str, Any]]) -> str:
+    """
+    Encode serialized order items in the compact format.
+
+    Args:
+        items: Items as produced by ``serialize_food_item`` (or loaded from JSON)
+
+    Returns:
+        str: ``c1:`` followed by the base64 of the packed items
+
+    Example:
+        >>> encode_compact([serialize_food_item(hotdog)])
+        'c1:AQQM...'
+    """
+    out = bytearray()
+    _write_uint(out, len(items))
+    for item in items:
+        _write_item(out, item)
+    return COMPACT_PREFIX + base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode_compact(text: str) -> List[Dict[str, Any]]:
+    """
+    Decode items written by ``encode_compact``.
+
+    Args:
+        text: Stored column value starting with ``c1:``
+
+    Returns:
+        List of item dictionaries, equal to what the JSON encoding would load
+    """
+    data = base64.b64decode(text[len(COMPACT_PREFIX):])
+    count, pos = _read_uint(data, 0)
+    items = []
+    for _ in range(count):
+        item, pos = _read_item(data, pos)
+        items.append(item)
+    return items
+
+
+def dumps(items: List[Dict[str, Any]], encoding: str = "json") -> str:
+    """
+    Encode order items for the ``order_items`` column.
+
+    Args:
+        items: Serialized order items
+        encoding: ``"json"`` or ``"compact"``
+
+    Returns:
+        str: Column value
+
+    Raises:
+        ValueError: If the encoding is unknown
+    """
+    if encoding == "json":
+        return json_codec.dumps(items)
+    if encoding == "compact":
+        return encode_compact(items)
+    raise ValueError(f"Unknown order items encoding: {encoding}")
+
+
+def loads(text: str) -> List[Dict[str, Any]]:
+    """
+    Decode an ``order_items`` column value in either encoding.
+
+    Args:
+        text: Stored column value
+
+    Returns:
+        List of item dictionaries
+    """
+    if text.startswith(COMPACT_PREFIX):
+        return decode_compact(text)
+    return json_codec.loads(text)
+
+
+def encoding_of(text: str) -> str:
+    """Return the encoding a stored column value was written with."""
+    return "compact" if text.startswith(COMPACT_PREFIX) else "json"
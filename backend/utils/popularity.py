@@ -0,0 +1,372 @@
+"""What is selling now, for ordering the menu and customize page hints.
+
+Counts how often each category, item and option is ordered, for today
+(Eastern Time, like the dashboard) and for the last hour, without scanning
+``OrderTable`` on every request.
+
+Counts are kept in Space-Saving sketches: each keeps at most ``capacity``
+names per option group and answers its top K from those alone, so memory
+and query time stay bounded whatever is ordered. Counting a name costs
+O(log capacity), amortized; a query selects the top K of each sketch in
+O(capacity log K), independent of the number of orders. The last hour is
+twelve five-minute buckets, also summed into one sketch as orders are
+counted; the sum is rebuilt only when a bucket expires, at most every five
+minutes, not per query.
+
+Each worker process keeps its own tracker per store:
+
+- orders the worker's intake journal applies are counted right away
+- orders applied by other workers are picked up from the database, reading
+  only rows past the highest order id already counted, at most every
+  ``POPULAR_SYNC_INTERVAL`` seconds
+- the first sync, run when the worker starts, rebuilds today's counts
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from flask import Flask, current_app
+from pydantic import BaseModel
+
+from db import db
+from models.FoodItem import display_item
+from models.OrderTable import OrderTable
+from utils import order_items_codec, stores
+
+logger = logging.getLogger(__name__)
+
+EASTERN = ZoneInfo("America/New_York")
+DEFAULT_CAPACITY = 64
+DEFAULT_SYNC_INTERVAL = 5.0
+BUCKET_SECONDS = 5 * 60
+HOUR_BUCKETS = 12
+WINDOWS = ("hour", "today")
+MAX_K = 20
+
+# Option groups counted for each item type, by the stored field they are read
+# from; the names match the option groups of the menu search
+ITEM_OPTIONS: Dict[str, Dict[str, str]] = {
+    "Sandwich": {"_meat": "Meat", "_bread": "Bread", "_cheese": "Cheese", "_toppings": "Toppings", "_add_ons": "Add Ons"},
+    "EggSandwich": {"_egg": "Egg", "_meat": "Meat", "_bread": "Bread", "_cheese": "Cheese", "_toppings": "Toppings", "_add_ons": "Add Ons"},
+    "Hotdog": {"_dog_type": "Hotdog", "_toppings": "Toppings"},
+    "Salad": {"_choice": "Salad", "_toppings": "Toppings", "_dressing": "Dressing", "_add_ons": "Add Ons"},
+    "Side": {"_name": "Side", "_chips_type": "Chips"},
+    "Drink": {"_name": "Drink"},
+    "Combo": {"_side": "Side", "_drink": "Drink"},
+}
+# Option group of the category counts themselves
+CATEGORY_GROUP = ("", "Category")
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters sketch (Metwally et al.).
+
+    Keeps at most ``capacity`` counters. A name that is not counted yet
+    replaces the smallest counter and inherits its count, so counts can be
+    overestimated by at most that inherited amount, and any name with a
+    count above ``total / capacity`` is always present.
+
+    The smallest counter is found through a min-heap of ``(count, name)``
+    whose outdated entries are skipped when popped and dropped when the heap
+    is rebuilt, so ``add`` costs O(log capacity) amortized.
+
+    Example:
+        >>> sketch = SpaceSaving(2)
+        >>> for name in ["Ham", "Ham", "Turkey", "BLT"]:
+        ...     sketch.add(name)
+        >>> sketch.top(1)
+        [('Ham', 2)]
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        # (count, name), including outdated entries whose count has changed since
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, name: str, weight: int = 1):
+        counts = self.counts
+        if name in counts or len(counts) < self.capacity:
+            counts[name] = counts.get(name, 0) + weight
+        else:
+            heap = self._heap
+            while heap[0][0] != counts.get(heap[0][1]):
+                heapq.heappop(heap)
+            smallest = heapq.heappop(heap)[1]
+            counts[name] = counts.pop(smallest) + weight
+        if len(self._heap) > 4 * self.capacity:
+            # Drop the outdated entries; amortized over the pushes that made them
+            self._heap = [(count, counted) for counted, count in counts.items()]
+            heapq.heapify(self._heap)
+        else:
+            heapq.heappush(self._heap, (counts[name], name))
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        """Return the ``k`` largest counts, largest first, in O(capacity log k)."""
+        return heapq.nlargest(k, self.counts.items(), key=lambda entry: (entry[1], entry[0]))
+
+
+def _option_names(value: Any) -> Iterator[str]:
+    if value is None or isinstance(value, bool):
+        return
+    if isinstance(value, (list, tuple)):
+        for element in value:
+            yield from _option_names(element)
+    elif isinstance(value, BaseModel):
+        yield from _option_names(getattr(value, "name", None))
+    elif isinstance(value, dict):
+        # Combo sides and drinks are stored as their schema's fields
+        yield from _option_names(value.get("name"))
+    else:
+        yield str(getattr(value, "value", value))
+
+
+def item_counts(items: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Tuple[str, str], str, int]]:
+    """
+    Yield what an order's items count towards.
+
+    Args:
+        items: Stored items of one order, as in ``OrderTable.order_items``,
+            or as serialized before being stored
+
+    Yields:
+        Tuple[Tuple[str, str], str, int]: ``(category, option group)``, name
+        and quantity; categories themselves are counted in ``CATEGORY_GROUP``
+    """
+    for item in items:
+        item_type = item.get("type")
+        options = ITEM_OPTIONS.get(item_type)
+        if options is None:
+            continue
+        quantity = item.get("_quantity") or 1
+        yield CATEGORY_GROUP, item_type, quantity
+        decoded = display_item(item)
+        for field, group in options.items():
+            for name in _option_names(decoded.get(field)):
+                yield (item_type, group), name, quantity
+
+
+class _Window:
+    """Sketches of one time window, one per option group."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.groups: Dict[Tuple[str, str], SpaceSaving] = {}
+
+    def add(self, group: Tuple[str, str], name: str, weight: int):
+        sketch = self.groups.get(group)
+        if sketch is None:
+            sketch = self.groups[group] = SpaceSaving(self.capacity)
+        sketch.add(name, weight)
+
+
+class PopularityTracker:
+    """
+    Today's and the last hour's popular categories, items and options of one store.
+
+    Attributes:
+        watermark (int): Highest order id counted from the database
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, clock=time.time):
+        self.capacity = capacity
+        self.watermark = 0
+        self.synced_at: Optional[float] = None
+        self._clock = clock
+        self._day = None
+        self._today = _Window(capacity)
+        self._hour: Dict[int, _Window] = {}  # by five-minute bucket number
+        # Sum of the hour buckets, kept as orders are counted; None once a bucket expired
+        self._hour_total: Optional[_Window] = None
+        # Ids above the watermark already counted when their order was applied
+        self._counted: set = set()
+        self._lock = threading.Lock()
+
+    def _roll(self, now: float):
+        day = datetime.fromtimestamp(now, EASTERN).date()
+        if day != self._day:
+            self._day, self._today = day, _Window(self.capacity)
+        oldest = int(now // BUCKET_SECONDS) - HOUR_BUCKETS + 1
+        for bucket in [bucket for bucket in self._hour if bucket < oldest]:
+            del self._hour[bucket]
+            self._hour_total = None
+
+    def _add(self, created_at: datetime, items: List[Dict[str, Any]], now: float):
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        windows = []
+        if created_at.astimezone(EASTERN).date() == self._day:
+            windows.append(self._today)
+        bucket = int(created_at.timestamp() // BUCKET_SECONDS)
+        if bucket > int(now // BUCKET_SECONDS) - HOUR_BUCKETS:
+            hour = self._hour.get(bucket)
+            if hour is None:
+                hour = self._hour[bucket] = _Window(self.capacity)
+            windows.append(hour)
+            if self._hour_total is not None:
+                windows.append(self._hour_total)
+        for group, name, weight in item_counts(items):
+            for window in windows:
+                window.add(group, name, weight)
+
+    def record(self, order_id: int, created_at: datetime, items: List[Dict[str, Any]]):
+        """
+        Count an order as it is committed.
+
+        Args:
+            order_id: Id of the new order row
+            created_at: When the order was placed
+            items: Its stored items
+        """
+        with self._lock:
+            now = self._clock()
+            self._roll(now)
+            if order_id <= self.watermark or order_id in self._counted:
+                return
+            self._counted.add(order_id)
+            self._add(created_at, items, now)
+
+    def sync(self, rows: Iterable[Tuple[int, datetime, str]]):
+        """
+        Count orders read from the database that were not counted yet.
+
+        Args:
+            rows: ``(id, created_at, order_items)`` of orders above ``watermark``, by id
+        """
+        with self._lock:
+            now = self._clock()
+            self._roll(now)
+            for order_id, created_at, order_items in rows:
+                if order_id in self._counted:
+                    self._counted.discard(order_id)
+                elif order_id > self.watermark:
+                    self._add(created_at, order_items_codec.loads(order_items), now)
+                self.watermark = max(self.watermark, order_id)
+            self._counted = {order_id for order_id in self._counted if order_id > self.watermark}
+            self.synced_at = now
+
+    def _hour_sum(self) -> _Window:
+        if self._hour_total is None:
+            total = _Window(self.capacity * HOUR_BUCKETS)
+            for bucket in self._hour.values():
+                for group, sketch in bucket.groups.items():
+                    for name, count in sketch.counts.items():
+                        total.add(group, name, count)
+            self._hour_total = total
+        return self._hour_total
+
+    def top(self, window: str, k: int, categories: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Return the most ordered categories, and items and options per category.
+
+        Costs O(capacity log k) per option group; the last hour's sum is only
+        rebuilt after a bucket expired.
+
+        Args:
+            window: ``"hour"`` or ``"today"``
+            k: Names returned per option group
+            categories: Categories whose items and options to return; all when None
+
+        Returns:
+            Dict[str, Any]: ``categories`` as ``[{"name", "count"}]`` and
+            ``options`` as ``{category: {option group: [{"name", "count"}]}}``
+        """
+        with self._lock:
+            self._roll(self._clock())
+            if window == "today":
+                merged = self._today.groups
+            else:
+                merged = self._hour_sum().groups
+            wanted = None if categories is None else set(categories)
+            result: Dict[str, Any] = {"categories": [], "options": {}}
+            for (category, group), sketch in merged.items():
+                ranked = [{"name": name, "count": count} for name, count in sketch.top(k)]
+                if (category, group) == CATEGORY_GROUP:
+                    result["categories"] = [entry for entry in ranked if wanted is None or entry["name"] in wanted]
+                elif wanted is None or category in wanted:
+                    result["options"].setdefault(category, {})[group] = ranked
+            return result
+
+
+def _trackers(app: Flask) -> Dict[str, PopularityTracker]:
+    return app.extensions.setdefault("popularity", {})
+
+
+def tracker(app: Optional[Flask] = None, store_id: Optional[str] = None) -> PopularityTracker:
+    """Return the tracker of a store, the current one by default."""
+    app = app or current_app._get_current_object()
+    store_id = store_id or stores.current_store_id()
+    trackers = _trackers(app)
+    found = trackers.get(store_id)
+    if found is None:
+        found = trackers.setdefault(store_id, PopularityTracker(app.config["POPULAR_CAPACITY"]))
+    return found
+
+
+def record_order(app: Flask, store_id: str, order_id: int, created_at: datetime, items: List[Dict[str, Any]]):
+    """
+    Count an order of a store as it is committed; see ``PopularityTracker.record``.
+
+    Never raises, since the order is already stored: an order that cannot be
+    counted is only logged.
+    """
+    try:
+        tracker(app, store_id).record(order_id, created_at, items)
+    except Exception as e:
+        logger.warning(f"Could not count order {order_id} for popular items: {str(e)}")
+
+
+def sync(force: bool = False) -> PopularityTracker:
+    """
+    Bring the current store's tracker up to date with its database.
+
+    Reads only orders of today and the last hour past the tracker's watermark, and at most
+    every ``POPULAR_SYNC_INTERVAL`` seconds unless forced.
+
+    Returns:
+        PopularityTracker: The current store's tracker
+    """
+    found = tracker()
+    now = time.time()
+    if not force and found.synced_at is not None and now - found.synced_at < current_app.config["POPULAR_SYNC_INTERVAL"]:
+        return found
+    start_of_day = datetime.fromtimestamp(now, EASTERN).replace(hour=0, minute=0, second=0, microsecond=0)
+    since = min(start_of_day.timestamp(), now - HOUR_BUCKETS * BUCKET_SECONDS)
+    rows = db.session.query(OrderTable.id, OrderTable.created_at, OrderTable.order_items).filter(
+        OrderTable.id > found.watermark,
+        OrderTable.created_at >= datetime.fromtimestamp(since, timezone.utc),
+    ).order_by(OrderTable.id).all()
+    found.sync(rows)
+    return found
+
+
+def warm(app: Flask):
+    """Rebuild today's counts of every store from its database, e.g. when a worker starts."""
+    try:
+        with app.app_context():
+            stores.fan_out(lambda: sync(force=True))
+    except Exception as e:
+        # The first request of each store syncs instead
+        logger.warning(f"Could not rebuild popular items at startup: {str(e)}")
+
+
+def init_app(app: Flask):
+    """
+    Configure popularity tracking from the environment.
+
+    - ``POPULAR_CAPACITY``: names kept per option group and window (default 64)
+    - ``POPULAR_SYNC_INTERVAL``: seconds between reads of orders applied by
+      other workers (default 5)
+
+    Args:
+        app: Flask application
+    """
+    app.config["POPULAR_CAPACITY"] = int(os.getenv("POPULAR_CAPACITY", DEFAULT_CAPACITY))
+    app.config["POPULAR_SYNC_INTERVAL"] = float(os.getenv("POPULAR_SYNC_INTERVAL", DEFAULT_SYNC_INTERVAL))
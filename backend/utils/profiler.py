@@ -0,0 +1,119 @@
+"""In-process sampling profiler for Steve's Place.
+
+Samples the stacks of every thread of the worker with
+``sys._current_frames`` at a fixed rate and counts identical stacks. The
+result renders in the collapsed-stack format read by flame graph tools
+(``flamegraph.pl``, speedscope, inferno): one line per distinct stack,
+frames from the root to the leaf separated by ``;``, then the number of
+samples.
+
+Sampling only reads frame objects, so its cost is proportional to the
+number of threads and their stack depth. It is bounded by the sampling
+rate, a maximum stack depth and a maximum number of distinct stacks kept.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Iterable, Optional, Tuple
+
+MAX_RATE_HZ = 250
+MAX_DEPTH = 128
+# Distinct stacks kept; samples of further new stacks are counted under TRUNCATED_STACK
+MAX_STACKS = 10000
+TRUNCATED_STACK = ("[truncated]",)
+
+
+class Profile:
+    """
+    Result of a sampling run.
+
+    Attributes:
+        stacks (Counter): Samples per stack, each a tuple of frames from root to leaf
+        samples (int): Sampling rounds taken
+        duration (float): Seconds the run lasted
+        sampling_time (float): Seconds spent taking samples, i.e. the profiler's own cost
+    """
+
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self.sampling_time = 0.0
+
+    def collapsed(self) -> str:
+        """
+        Render the stacks in collapsed-stack format, most sampled first.
+
+        Example:
+            >>> print(profile.collapsed())
+            MainThread;app.py:<module>;serving.py:serve_forever;checkout_api.py:confirm_payment 42
+        """
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _stack(frame, max_depth: int) -> Tuple[str, ...]:
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+def sample(seconds: float, rate_hz: float, exclude: Optional[Iterable[int]] = None, max_depth: int = MAX_DEPTH) -> Profile:
+    """
+    Sample the stacks of all threads for a while.
+
+    Runs in the calling thread, which is never sampled itself.
+
+    Args:
+        seconds: How long to sample
+        rate_hz: Sampling rounds per second, capped at ``MAX_RATE_HZ``
+        exclude: Further thread idents not to sample
+        max_depth: Deepest frames kept per stack; the outermost ones are dropped
+
+    Returns:
+        Profile: Sample counts per thread stack, the thread name as root frame
+
+    Example:
+        >>> profile = sample(seconds=10, rate_hz=100)
+        >>> profile.collapsed()
+    """
+    interval = 1.0 / min(max(rate_hz, 1.0), MAX_RATE_HZ)
+    skipped = {threading.get_ident(), *(exclude or ())}
+    profile = Profile()
+    start = time.perf_counter()
+    deadline = start + seconds
+    next_sample = start
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if now < next_sample:
+            time.sleep(min(next_sample, deadline) - now)
+            continue
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        for ident, frame in frames.items():
+            if ident in skipped:
+                continue
+            stack = (names.get(ident, f"thread-{ident}"),) + _stack(frame, max_depth)
+            if stack not in profile.stacks and len(profile.stacks) >= MAX_STACKS:
+                stack = TRUNCATED_STACK
+            profile.stacks[stack] += 1
+        # Drop the frame references so finished threads' frames can be freed
+        del frames, frame
+        profile.samples += 1
+        profile.sampling_time += time.perf_counter() - now
+        # Falling behind skips samples instead of sampling back to back
+        next_sample = max(next_sample + interval, time.perf_counter())
+    profile.duration = time.perf_counter() - start
+    return profile
@@ -0,0 +1,144 @@
+"""Per-request SQL statement accounting for Steve's Place.
+
+SQLAlchemy engine events time every statement executed while a request is
+being handled. At the end of the request the totals are:
+
+- sent to the client in a ``Server-Timing`` header
+  (``db;dur=<ms>;desc="<n> queries"``), visible in browser dev tools
+- recorded in the ``steves_db_*`` metrics at ``/metrics``
+- logged as a warning when the request ran more statements than
+  ``QUERY_BUDGET``, or repeated one statement ``QUERY_REPEAT_LIMIT`` times
+  or more, the usual sign of an N+1 query pattern
+
+Statements run outside a request (CLI commands, ``create_all``) are not
+counted.
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from typing import Optional
+
+from flask import Flask, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.metrics import DB_DURATION, DB_QUERIES, DB_QUERY_BUDGET_EXCEEDED, DB_REPEATED_QUERIES, route_label
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_BUDGET = 10
+DEFAULT_QUERY_REPEAT_LIMIT = 5
+# Longest statement text kept for the warning log
+MAX_STATEMENT_LENGTH = 300
+
+_listening = False
+
+
+class QueryStats:
+    """
+    SQL statements executed during one request.
+
+    Attributes:
+        count (int): Statements executed
+        duration (float): Total seconds spent executing them
+        slowest_duration (float): Seconds taken by the slowest statement
+        slowest_statement (Optional[str]): SQL text of the slowest statement
+        statements (Counter): Executions per distinct SQL text
+    """
+
+    __slots__ = ("count", "duration", "slowest_duration", "slowest_statement", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        if duration >= self.slowest_duration:
+            self.slowest_duration = duration
+            self.slowest_statement = statement
+
+    def most_repeated(self):
+        """Return the most executed statement and its count, or ``(None, 0)``."""
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+    def server_timing(self) -> str:
+        noun = "query" if self.count == 1 else "queries"
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} {noun}"'
+
+
+def current() -> Optional[QueryStats]:
+    """Return the query stats of the current request, if any."""
+    return g.get("query_stats") if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current() is not None and context is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current()
+    start = getattr(context, "_query_stats_start", None)
+    if stats is not None and start is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def _start_request():
+    g.query_stats = QueryStats()
+
+
+def _finish_request(response):
+    stats = g.pop("query_stats", None)
+    if stats is None:
+        return response
+    response.headers.add("Server-Timing", stats.server_timing())
+    route = route_label()
+    DB_QUERIES.observe(stats.count, route=route)
+    DB_DURATION.observe(stats.duration, route=route)
+
+    budget = int(os.getenv("QUERY_BUDGET", DEFAULT_QUERY_BUDGET))
+    if stats.count > budget:
+        DB_QUERY_BUDGET_EXCEEDED.inc(route=route)
+        logger.warning(
+            f"Request to {route} ran {stats.count} queries (budget {budget}) in {stats.duration * 1000:.1f} ms",
+            extra={"route": route, "query_count": stats.count, "db_ms": round(stats.duration * 1000, 2),
+                   "slowest_ms": round(stats.slowest_duration * 1000, 2),
+                   "slowest_statement": (stats.slowest_statement or "")[:MAX_STATEMENT_LENGTH]},
+        )
+    statement, repeats = stats.most_repeated()
+    if repeats >= int(os.getenv("QUERY_REPEAT_LIMIT", DEFAULT_QUERY_REPEAT_LIMIT)):
+        DB_REPEATED_QUERIES.inc(route=route)
+        logger.warning(
+            f"Request to {route} ran the same query {repeats} times (possible N+1)",
+            extra={"route": route, "repeats": repeats, "statement": statement[:MAX_STATEMENT_LENGTH]},
+        )
+    return response
+
+
+def init_app(app: Flask):
+    """
+    Start counting SQL statements per request.
+
+    The engine listeners are installed once for every engine of the process,
+    so engines created later (tests, extra binds) are covered as well.
+
+    Args:
+        app: Flask application
+    """
+    global _listening
+    if not _listening:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listening = True
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,292 @@
+"""Rate limiting and load shedding for Steve's Place.
+
+Two protections for endpoints that cost money or hold a worker thread while
+waiting on Stripe or Twilio:
+
+- Token buckets: each bucket holds up to ``Rate.limit`` tokens, refilled
+  continuously at ``limit / period`` per second, and every request takes
+  one. An empty bucket answers 429 with a ``Retry-After`` of the time until
+  the next token. Buckets are keyed per client IP, per phone number or
+  globally per endpoint.
+- A concurrency limit: at most ``CHECKOUT_MAX_CONCURRENCY`` requests per
+  worker process run provider calls at once; the excess is answered 503
+  immediately instead of queueing behind them.
+
+Bucket state lives in a backend chosen with ``RATE_LIMIT_BACKEND``:
+``memory`` (default, per worker process) or ``sqlite:///<path>``, a file
+shared by every worker on the host. Set ``RATE_LIMIT_ENABLED=0`` to turn
+both protections off.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from flask import Blueprint, Flask, current_app, g, jsonify, request
+
+from utils.metrics import LOAD_SHED, RATE_LIMITED, route_label
+
+DEFAULT_MAX_CONCURRENCY = 3
+
+
+class Rate(NamedTuple):
+    """
+    Bucket size and refill period.
+
+    Attributes:
+        limit (int): Requests allowed in a burst, refilled over ``period``
+        period (float): Seconds to refill a whole bucket
+
+    Example:
+        >>> Rate(3, 600)  # bursts of 3, then one request every 200 seconds
+    """
+    limit: int
+    period: float
+
+    @property
+    def per_second(self) -> float:
+        return self.limit / self.period
+
+
+def _refill(tokens: float, updated: float, now: float, rate: Rate) -> float:
+    return min(float(rate.limit), tokens + (now - updated) * rate.per_second)
+
+
+def _take(tokens: float, rate: Rate, cost: float) -> Tuple[float, float]:
+    """Return the tokens left and the seconds to wait (0 when the request is allowed)."""
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate.per_second
+
+
+class MemoryBackend:
+    """
+    Token buckets in process memory.
+
+    The least recently used buckets are dropped beyond ``max_keys``; a
+    dropped bucket starts full again, so the bound only ever loosens limits.
+    """
+
+    def __init__(self, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: Rate, cost: float = 1.0) -> float:
+        """
+        Take tokens from a bucket.
+
+        Args:
+            key: Bucket key
+            rate: Size and refill period of the bucket
+            cost: Tokens to take
+
+        Returns:
+            float: 0 when allowed, otherwise seconds until enough tokens are back
+        """
+        with self._lock:
+            now = self._clock()
+            tokens, updated = self._buckets.pop(key, (float(rate.limit), now))
+            tokens, wait = _take(_refill(tokens, updated, now, rate), rate, cost)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class SQLiteBackend:
+    """
+    Token buckets in a SQLite file shared by the worker processes of a host.
+
+    Each check is one short write transaction, so use it where limits must
+    hold across workers; the memory backend is faster.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                         "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key: str, rate: Rate, cost: float = 1.0) -> float:
+        """Same as ``MemoryBackend.consume``, atomically across processes."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row is not None else (float(rate.limit), now)
+            tokens, wait = _take(_refill(tokens, updated, now, rate), rate, cost)
+            conn.execute("INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                         (key, tokens, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def backend_from_url(url: str):
+    """
+    Build a backend from its ``RATE_LIMIT_BACKEND`` setting.
+
+    Raises:
+        ValueError: If the setting is not ``memory`` or ``sqlite:///<path>``
+    """
+    if url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unknown rate limit backend: {url}")
+
+
+class ConcurrencyLimit:
+    """Non-blocking cap on requests running at once in this process."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def try_acquire(self) -> bool:
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self):
+        self._semaphore.release()
+
+
+class RateLimiter:
+    """Bucket backend and concurrency limit of one app, kept in ``app.extensions``."""
+
+    def __init__(self, backend, max_concurrency: int, enabled: bool = True):
+        self.backend = backend
+        self.concurrency = ConcurrencyLimit(max_concurrency)
+        self.enabled = enabled
+
+
+def _phone_key() -> Optional[str]:
+    digits = "".join(ch for ch in request.form.get("phone_number", "") if ch.isdigit())
+    return digits or None
+
+
+# Scope name -> bucket key for the current request (None skips the bucket)
+SCOPES: Dict[str, Callable[[], Optional[str]]] = {
+    "ip": lambda: request.remote_addr or "unknown",
+    "phone": _phone_key,
+    "global": lambda: "all",
+}
+
+
+def _too_many_requests(retry_after: float):
+    response = jsonify({'error': 'Too many requests, please try again later'})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _consume(limiter: RateLimiter, endpoint: str, scope: str, value: str, rate: Rate):
+    wait = limiter.backend.consume(f"{endpoint}:{scope}:{value}", rate)
+    if wait > 0:
+        RATE_LIMITED.inc(route=route_label(), scope=scope)
+        return _too_many_requests(wait)
+    return None
+
+
+def check(endpoint: str, scope: str, value: str, rate: Rate):
+    """
+    Take a token from one bucket from inside a view.
+
+    For keys only known once the view has read the body, such as the phone
+    number of a streamed bulk order.
+
+    Args:
+        endpoint: Endpoint function name the bucket belongs to
+        scope: Scope name, used in the key and the metric
+        value: Bucket key within the scope
+        rate: Size and refill period of the bucket
+
+    Returns:
+        A 429 response when the bucket is empty, otherwise None
+
+    Example:
+        >>> limited = check('bulk_order', 'phone', phone_number, Rate(3, 600))
+        >>> if limited is not None:
+        ...     return limited
+    """
+    limiter: Optional[RateLimiter] = current_app.extensions.get("rate_limiter")
+    if limiter is None or not limiter.enabled:
+        return None
+    return _consume(limiter, endpoint, scope, value, rate)
+
+
+def protect(blueprint: Blueprint, limits: Dict[str, Iterable[Tuple[str, Rate]]], shed_endpoints: Set[str]):
+    """
+    Apply rate limits and load shedding to a blueprint's endpoints.
+
+    Args:
+        blueprint: Blueprint whose requests are checked
+        limits: Buckets per endpoint function name, as ``(scope, rate)`` pairs
+            with scope ``"ip"``, ``"phone"`` (the ``phone_number`` form field)
+            or ``"global"``
+        shed_endpoints: Endpoint function names counted against the
+            concurrency limit
+
+    Example:
+        >>> protect(routes, {'send_sms_verification': [('phone', Rate(3, 600))]}, {'send_sms_verification'})
+    """
+    @blueprint.before_request
+    def _check_limits():
+        limiter: Optional[RateLimiter] = current_app.extensions.get("rate_limiter")
+        if limiter is None or not limiter.enabled:
+            return None
+        endpoint = request.endpoint.rpartition(".")[2] if request.endpoint else ""
+        for scope, rate in limits.get(endpoint, ()):
+            value = SCOPES[scope]()
+            if value is None:
+                continue
+            limited = _consume(limiter, endpoint, scope, value, rate)
+            if limited is not None:
+                return limited
+        if endpoint in shed_endpoints:
+            if not limiter.concurrency.try_acquire():
+                LOAD_SHED.inc(route=route_label())
+                response = jsonify({'error': 'Server busy, please try again'})
+                response.status_code = 503
+                response.headers["Retry-After"] = "1"
+                return response
+            g.rate_limit_slot = limiter.concurrency
+        return None
+
+    @blueprint.teardown_request
+    def _release_slot(exc):
+        slot = g.pop("rate_limit_slot", None)
+        if slot is not None:
+            slot.release()
+
+
+def init_app(app: Flask):
+    """
+    Create the app's rate limiter from the environment.
+
+    Args:
+        app: Flask application
+    """
+    enabled = os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ("0", "false", "no")
+    app.extensions["rate_limiter"] = RateLimiter(
+        backend_from_url(os.getenv("RATE_LIMIT_BACKEND", "memory")),
+        int(os.getenv("CHECKOUT_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        enabled=enabled,
+    )
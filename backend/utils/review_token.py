@@ -0,0 +1,194 @@
+"""Signed cart review tokens for Steve's Place.
+
+The review endpoint validates and prices a cart once and returns a token
+signed with ``REVIEW_TOKEN_SECRET``. The token holds, in a compact form:
+
+- a fingerprint of the cart items exactly as the client sent them
+- the store, the payment mode (cash or card) and the menu version
+- the subtotal in cents
+- the validated items in the compact storage encoding
+- an expiry time
+
+At checkout, ``validate_order`` accepts a token that is correctly signed,
+unexpired and matches the submitted cart, store, payment mode and current
+menu in place of validating and pricing every item again. Any other token
+is ignored and the cart is re-priced in full, so a stale token never fails
+a checkout. Nothing is stored on the server, so any worker can verify a
+token issued by another as long as they share the secret.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import time
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, current_app
+
+from models.Combo import COMBO_BASE_PRICE, DRINK_UPGRADE_COST
+from models.Drink import DRINK_PRICE_MAP
+from models.EggSandwich import EGG_SANDWICH_ADD_ONS_PRICE_MAP
+from models.Hotdog import HOT_DOG_PRICE_MAP
+from models.Order import Order, price_with_fee
+from models.Salad import SALAD_ADD_ONS_PRICE_MAP, SALAD_PRICE_MAP
+from models.Sandwich import SANDWICH_ADD_ONS_PRICE_MAP, SANDWICH_PRICE_MAP
+from models.Side import SIDE_PRICE_MAP
+from utils import json_codec, order_items_codec, stores
+from utils.metrics import REVIEW_TOKENS
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION = "r1"
+DEFAULT_TOKEN_TTL = 15 * 60
+
+# Every table a cart price is derived from; changing any of them changes the menu version
+_PRICE_TABLES = (
+    HOT_DOG_PRICE_MAP, SANDWICH_PRICE_MAP, SANDWICH_ADD_ONS_PRICE_MAP, EGG_SANDWICH_ADD_ONS_PRICE_MAP,
+    SALAD_PRICE_MAP, SALAD_ADD_ONS_PRICE_MAP, SIDE_PRICE_MAP, DRINK_PRICE_MAP, COMBO_BASE_PRICE, DRINK_UPGRADE_COST,
+)
+_PRICES_DIGEST = hashlib.sha256(repr(_PRICE_TABLES).encode()).hexdigest()
+
+
+class ReviewedOrder:
+    """
+    An order rebuilt from a verified review token.
+
+    Stands in for ``Order`` at checkout: it has the same totals and provides
+    the stored form of its items, without any food item being built.
+
+    Attributes:
+        subtotal_cents (int): Order total without the card fee, in cents
+    """
+
+    def __init__(self, subtotal_cents: int, compact_items: str):
+        self.subtotal_cents = subtotal_cents
+        self._compact_items = compact_items
+
+    def serialized_items(self) -> List[Dict[str, Any]]:
+        """Return the items as they are stored with the order."""
+        return order_items_codec.decode_compact(self._compact_items)
+
+    def total_price(self) -> float:
+        return self.subtotal_cents / 100
+
+    def total_price_with_fee(self) -> float:
+        return price_with_fee(self.total_price())
+
+
+def menu_version() -> str:
+    """
+    Return the version of the current store's menu.
+
+    Derived from the price tables and the categories the store does not sell,
+    so it changes whenever a reviewed price could.
+
+    Returns:
+        str: Short hex digest
+    """
+    disabled = ",".join(sorted(stores.disabled_categories()))
+    return hashlib.sha256(f"{_PRICES_DIGEST}|{disabled}".encode()).hexdigest()[:16]
+
+
+def cart_fingerprint(order_items: List[Dict[str, Any]]) -> str:
+    """
+    Return a digest of cart items as the client sent them.
+
+    Args:
+        order_items: Raw cart items
+
+    Returns:
+        str: Hex digest, equal for carts with equal items in the same order
+    """
+    return hashlib.sha256(json_codec.dumps_canonical(order_items).encode()).hexdigest()[:32]
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(body: str) -> str:
+    key = current_app.config["REVIEW_TOKEN_SECRET"].encode()
+    return _encode(hmac.new(key, f"{TOKEN_VERSION}.{body}".encode(), hashlib.sha256).digest())
+
+
+def issue_token(order_items: List[Dict[str, Any]], order: Order, card_payment: bool, now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Sign a review token for a validated cart of the current store.
+
+    Args:
+        order_items: Raw cart items, as they will be sent to checkout
+        order: The order validated from them
+        card_payment: Whether the order will be paid by card
+        now: Current Unix time, for tests
+
+    Returns:
+        Dict[str, Any]: ``review_token`` and its ``expires_at`` Unix time
+    """
+    expires_at = int(now if now is not None else time.time()) + current_app.config["REVIEW_TOKEN_TTL"]
+    payload = {
+        "f": cart_fingerprint(order_items),
+        "s": stores.current_store_id(),
+        "m": "card" if card_payment else "cash",
+        "v": menu_version(),
+        "c": round(order.total_price() * 100),
+        "e": expires_at,
+        "i": order_items_codec.encode_compact([item.serialize() for item in order.items]),
+    }
+    body = _encode(json_codec.dumps(payload).encode())
+    return {"review_token": f"{TOKEN_VERSION}.{body}.{_sign(body)}", "expires_at": expires_at}
+
+
+def verify_token(token: str, order_items: List[Dict[str, Any]], card_payment: bool, now: Optional[float] = None) -> Optional[ReviewedOrder]:
+    """
+    Check a review token against the cart submitted at checkout.
+
+    Args:
+        token: Token returned by the review endpoint
+        order_items: Raw cart items submitted at checkout
+        card_payment: Whether the order is paid by card
+        now: Current Unix time, for tests
+
+    Returns:
+        Optional[ReviewedOrder]: The reviewed order, or None if the token is
+        malformed, forged, expired or for a different cart, store, payment
+        mode or menu
+    """
+    try:
+        version, body, signature = token.split(".")
+        if version != TOKEN_VERSION or not hmac.compare_digest(signature, _sign(body)):
+            REVIEW_TOKENS.inc(result="invalid")
+            return None
+        payload = json_codec.loads(_decode(body))
+    except (ValueError, binascii.Error):
+        REVIEW_TOKENS.inc(result="invalid")
+        return None
+    current = (cart_fingerprint(order_items), stores.current_store_id(), "card" if card_payment else "cash", menu_version())
+    if payload["e"] <= (now if now is not None else time.time()) or (payload["f"], payload["s"], payload["m"], payload["v"]) != current:
+        REVIEW_TOKENS.inc(result="stale")
+        return None
+    REVIEW_TOKENS.inc(result="accepted")
+    return ReviewedOrder(payload["c"], payload["i"])
+
+
+def init_app(app: Flask):
+    """
+    Configure review tokens from the environment.
+
+    - ``REVIEW_TOKEN_SECRET``: signing key shared by every worker; when unset
+      a random key is made per process, so tokens only verify on the worker
+      (or preloaded worker group) that issued them
+    - ``REVIEW_TOKEN_TTL``: seconds a token stays valid (default 900)
+
+    Args:
+        app: Flask application
+    """
+    app.config["REVIEW_TOKEN_SECRET"] = os.getenv("REVIEW_TOKEN_SECRET") or secrets.token_hex(32)
+    app.config["REVIEW_TOKEN_TTL"] = int(os.getenv("REVIEW_TOKEN_TTL", DEFAULT_TOKEN_TTL))
@@ -0,0 +1,257 @@
+"""Shop locations served by one Steve's Place backend.
+
+Every location (store) keeps its orders and closed dates in its own
+database, so one store's lunch rush never holds a lock another store is
+waiting on, and a busy location can be moved to its own database server.
+
+- The ``main`` store always exists and uses ``DATABASE_URL``; existing
+  single-store deployments keep their data where it is.
+- ``STORES`` lists further store ids, e.g. ``STORES=downtown,airport``.
+  Each uses ``STORE_<ID>_DATABASE_URL`` when set, otherwise
+  ``STORE_DATABASE_URL_TEMPLATE`` (default ``sqlite:///store_{store_id}.sqlite``).
+- Reads of dashboard and menu routes go to a read-only engine per store:
+  ``DATABASE_READ_URL`` / ``STORE_<ID>_READ_DATABASE_URL`` (e.g. a replica),
+  otherwise SQLite files are opened a second time with ``mode=ro``. Other
+  databases without a read URL serve reads from the writer.
+- ``STORE_CATALOG_FILE`` optionally points at a JSON file of per-store
+  catalog overrides, e.g. ``{"airport": {"disabled_categories": ["Hotdog"]}}``.
+
+Requests to the checkout, close-store and get_info blueprints pick their
+store with the ``X-Store-ID`` header or a ``store_id`` query/form field,
+defaulting to ``main``. The session of ``db`` then sends every statement of
+the request to that store's database (see ``db.StoreRoutingSession``).
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, FrozenSet, Iterable, NamedTuple, Optional, TypeVar
+
+from flask import Blueprint, Flask, current_app, g, has_app_context, jsonify, request
+from sqlalchemy.engine import make_url
+
+from utils import json_codec
+
+DEFAULT_STORE_ID = "main"
+DEFAULT_DATABASE_URL_TEMPLATE = "sqlite:///store_{store_id}.sqlite"
+# Store ids end up in bind keys, file names and metric labels
+_STORE_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+T = TypeVar("T")
+
+
+class Store(NamedTuple):
+    """
+    Configuration of one location.
+
+    Attributes:
+        store_id (str): Store id used in requests and stored on rows
+        database_url (str): SQLAlchemy URL of the store's database
+        bind_key (Optional[str]): Flask-SQLAlchemy bind of the database, None for ``main``
+        disabled_categories (FrozenSet[str]): Menu categories this store does not sell
+        read_database_url (Optional[str]): SQLAlchemy URL of the store's read-only engine
+        read_bind_key (Optional[str]): Bind of the read-only engine, None when reads use the writer
+    """
+    store_id: str
+    database_url: str
+    bind_key: Optional[str]
+    disabled_categories: FrozenSet[str] = frozenset()
+    read_database_url: Optional[str] = None
+    read_bind_key: Optional[str] = None
+
+
+def _load_catalog_overrides() -> dict:
+    path = os.getenv("STORE_CATALOG_FILE")
+    if not path:
+        return {}
+    with open(path, "rb") as f:
+        return json_codec.loads(f.read())
+
+
+def read_only_url(database_url: str) -> Optional[str]:
+    """
+    Return a read-only URL of the same SQLite file, None for other databases.
+
+    Example:
+        >>> read_only_url("sqlite:///db.sqlite")
+        'sqlite:///file:db.sqlite?mode=ro&uri=true'
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:") or url.query.get("uri"):
+        return None
+    return url.set(database=f"file:{url.database}", query={**url.query, "mode": "ro", "uri": "true"}).render_as_string(hide_password=False)
+
+
+def load_stores(default_database_url: str) -> Dict[str, Store]:
+    """
+    Read the store configuration from the environment.
+
+    Args:
+        default_database_url: Database URL of the ``main`` store
+
+    Returns:
+        Dict[str, Store]: Stores by id, ``main`` first
+
+    Raises:
+        ValueError: If a store id or catalog override is invalid
+    """
+    from models.Category import Category
+
+    store_ids = [DEFAULT_STORE_ID]
+    for store_id in os.getenv("STORES", "").split(","):
+        store_id = store_id.strip()
+        if not store_id or store_id in store_ids:
+            continue
+        if not _STORE_ID.match(store_id):
+            raise ValueError(f"Invalid store id: {store_id!r}")
+        store_ids.append(store_id)
+
+    overrides = _load_catalog_overrides()
+    unknown = set(overrides) - set(store_ids)
+    if unknown:
+        raise ValueError(f"Catalog overrides for unknown stores: {sorted(unknown)}")
+    categories = {category.value for category in Category}
+    template = os.getenv("STORE_DATABASE_URL_TEMPLATE", DEFAULT_DATABASE_URL_TEMPLATE)
+
+    stores = {}
+    for store_id in store_ids:
+        disabled = frozenset(overrides.get(store_id, {}).get("disabled_categories", ()))
+        if disabled - categories:
+            raise ValueError(f"Unknown categories disabled for {store_id}: {sorted(disabled - categories)}")
+        env_prefix = f"STORE_{store_id.upper().replace('-', '_')}_"
+        if store_id == DEFAULT_STORE_ID:
+            url, bind_key = default_database_url, None
+            read_url = os.getenv("DATABASE_READ_URL")
+        else:
+            url = os.getenv(f"{env_prefix}DATABASE_URL") or template.format(store_id=store_id)
+            bind_key = f"store_{store_id}"
+            read_url = os.getenv(f"{env_prefix}READ_DATABASE_URL")
+        read_url = read_url or read_only_url(url)
+        read_bind_key = f"store_{store_id}_read" if read_url else None
+        stores[store_id] = Store(store_id, url, bind_key, disabled, read_url, read_bind_key)
+    return stores
+
+
+def init_app(app: Flask):
+    """
+    Configure the stores, a database bind for each non-default store and a
+    bind for each store's read-only engine.
+
+    Must run before ``db.init_app`` so the binds' engines are created.
+
+    Args:
+        app: Flask application with ``SQLALCHEMY_DATABASE_URI`` set
+    """
+    stores = load_stores(app.config["SQLALCHEMY_DATABASE_URI"])
+    app.config["STORES"] = stores
+    binds = {}
+    for store in stores.values():
+        if store.bind_key is not None:
+            binds[store.bind_key] = store.database_url
+        if store.read_bind_key is not None:
+            binds[store.read_bind_key] = store.read_database_url
+    app.config["SQLALCHEMY_BINDS"] = binds
+
+
+def all_stores() -> Dict[str, Store]:
+    """Return every configured store of the current app."""
+    return current_app.config["STORES"]
+
+
+def current_store() -> Optional[Store]:
+    """Return the store of the current request or store context, ``main`` by default; None outside an app."""
+    if not has_app_context():
+        return None
+    return all_stores()[g.get("store_id", DEFAULT_STORE_ID)]
+
+
+def current_store_id() -> str:
+    """Return the id of the current store, ``main`` outside an app."""
+    store = current_store()
+    return store.store_id if store is not None else DEFAULT_STORE_ID
+
+
+def disabled_categories() -> FrozenSet[str]:
+    """Return the menu categories the current store does not sell."""
+    store = current_store()
+    return store.disabled_categories if store is not None else frozenset()
+
+
+def _select(store: Store):
+    g.store_id = store.store_id
+    # Read by db.StoreRoutingSession.get_bind
+    g.store_bind_key = store.bind_key
+    g.store_read_bind_key = store.read_bind_key
+
+
+def use_store(blueprint: Blueprint):
+    """
+    Resolve the store of every request to a blueprint.
+
+    The store comes from the ``X-Store-ID`` header or a ``store_id`` query or
+    form field; unknown stores are answered 404.
+
+    Args:
+        blueprint: Blueprint whose requests are store-scoped
+    """
+    @blueprint.before_request
+    def _resolve_store():
+        store_id = (request.headers.get("X-Store-ID") or request.args.get("store_id")
+                    or request.form.get("store_id") or DEFAULT_STORE_ID)
+        store = all_stores().get(store_id)
+        if store is None:
+            response = jsonify({'error': f'Unknown store: {store_id}'})
+            response.status_code = 404
+            return response
+        _select(store)
+        return None
+
+
+@contextmanager
+def store_context(store_id: str, app: Optional[Flask] = None):
+    """
+    Push an app context whose database session uses a store's database.
+
+    Args:
+        store_id: Store to use
+        app: Application, the current one by default
+
+    Example:
+        >>> with store_context("downtown"):
+        ...     OrderTable.query.count()
+    """
+    app = app or current_app._get_current_object()
+    with app.app_context():
+        _select(app.config["STORES"][store_id])
+        yield
+
+
+def fan_out(func: Callable[[], T], store_ids: Optional[Iterable[str]] = None, max_workers: int = 8) -> Dict[str, T]:
+    """
+    Run a function once per store, in parallel, each in its store's context.
+
+    Args:
+        func: Function to run; its database queries go to the store's database
+        store_ids: Stores to run for, every store by default
+        max_workers: Stores queried at once
+
+    Returns:
+        Dict[str, T]: Result per store id, in store order
+
+    Example:
+        >>> fan_out(lambda: OrderTable.query.count())
+        {'main': 120, 'downtown': 45}
+    """
+    app = current_app._get_current_object()
+    store_ids = list(store_ids or app.config["STORES"])
+    # Report routes fan out from a request that reads from the read-only engines
+    use_reader = g.get("db_use_reader", False)
+
+    def run(store_id):
+        with store_context(store_id, app):
+            g.db_use_reader = use_reader
+            return func()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(store_ids)) or 1) as pool:
+        return dict(zip(store_ids, pool.map(run, store_ids)))
@@ -0,0 +1,435 @@
+"""Kitchen tickets for ESC/POS thermal printers.
+
+Tickets are rendered from stored orders (``OrderTable.to_dict()``) straight
+to printer command bytes:
+
+- one template per item type names the title and detail lines of the item;
+  templates are compiled once at import, labels already encoded
+- text is encoded once per field in the printer's code page (PC437) and
+  wrapped to the paper's fixed width on the encoded bytes; characters the
+  printer cannot print, such as emoji in special instructions, become ``?``
+- many tickets are rendered per call into one caller-owned ``bytearray``,
+  which the spooler clears and reuses for every batch
+
+Each worker process prints the orders its intake journal applies through a
+``TicketSpooler``: a thread that writes everything queued since its last
+write as one batch to ``TICKET_PRINTER``, a printer device such as
+``/dev/usb/lp0`` or a spool file. Applying an order only queues it, so a
+slow or unplugged printer never holds up order intake; the queue is printed
+once the printer is back.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from flask import Flask
+
+from utils import kitchen
+from utils.metrics import TICKET_BACKLOG, TICKET_PRINT_FAILURES
+
+logger = logging.getLogger(__name__)
+
+EASTERN = ZoneInfo("America/New_York")
+CODE_PAGE = "cp437"
+# Characters per line of 80 mm paper in the printer's default font; 58 mm paper fits 32
+DEFAULT_WIDTH = 42
+DEFAULT_MAX_BATCH = 64
+_MAX_BACKOFF = 5.0
+
+# ESC/POS commands
+INIT = b"\x1b@"
+CODE_PAGE_437 = b"\x1bt\x00"
+ALIGN_LEFT = b"\x1ba\x00"
+ALIGN_CENTER = b"\x1ba\x01"
+BOLD_ON = b"\x1bE\x01"
+BOLD_OFF = b"\x1bE\x00"
+DOUBLE_SIZE = b"\x1b!\x30"
+NORMAL_SIZE = b"\x1b!\x00"
+FEED_AND_CUT = b"\x1dVB\x00"  # feed to the cutter, then partial cut
+LF = b"\n"
+
+
+class TicketTemplate(NamedTuple):
+    """
+    How an item type is printed.
+
+    Attributes:
+        title (Tuple[str, ...]): Stored fields joined into the item's title
+        suffix (str): Text after the title fields, e.g. " Sandwich"
+        lines (Tuple[Tuple[str, str], ...]): ``(label, field)`` of each detail
+            line; a line whose field is empty, False or None is left out
+    """
+    title: Tuple[str, ...]
+    suffix: str
+    lines: Tuple[Tuple[str, str], ...]
+
+
+TEMPLATES: Dict[str, TicketTemplate] = {
+    "Sandwich": TicketTemplate(("_size", "_meat"), " Sandwich", (
+        ("Bread", "_bread"), ("Toast", "_toast"), ("Grilled", "_grilled"), ("Cheese", "_cheese"),
+        ("Toppings", "_toppings"), ("Add Ons", "_add_ons"))),
+    "EggSandwich": TicketTemplate(("_egg",), " Sandwich", (
+        ("Meat", "_meat"), ("Bread", "_bread"), ("Toast", "_toasted"), ("Grilled", "_grilled"),
+        ("Cheese", "_cheese"), ("Toppings", "_toppings"), ("Add Ons", "_add_ons"))),
+    "Hotdog": TicketTemplate(("_dog_type",), " Hot Dog", (("Toppings", "_toppings"),)),
+    "Salad": TicketTemplate(("_choice",), "", (
+        ("Toppings", "_toppings"), ("Dressing", "_dressing"), ("Add Ons", "_add_ons"))),
+    "Side": TicketTemplate(("_size", "_name"), "", (("Chips", "_chips_type"),)),
+    "Drink": TicketTemplate(("_size", "_name"), "", ()),
+    "Combo": TicketTemplate((), "Combo", (("Side", "_side"), ("Drink", "_drink"))),
+}
+# Special instructions close every item, in bold
+NOTE = ("Note", "_special_instructions")
+
+
+def encode(text: str) -> bytes:
+    """
+    Encode text for the printer.
+
+    Accents the code page lacks are dropped from their letters, anything
+    else it cannot print becomes ``?``.
+
+    Example:
+        >>> encode("Jalapeño 🌶")
+        b'Jalape\\xa4o ?'
+    """
+    try:
+        return text.encode(CODE_PAGE)
+    except UnicodeEncodeError:
+        pass
+    folded = []
+    for char in text:
+        try:
+            folded.append(char.encode(CODE_PAGE))
+        except UnicodeEncodeError:
+            base = unicodedata.normalize("NFKD", char)[:1]
+            folded.append(base.encode(CODE_PAGE) if base != char and base.isascii() else b"?")
+    return b"".join(folded)
+
+
+def _text(value: Any) -> str:
+    if value is True:
+        return "Yes"
+    if isinstance(value, list):
+        return ", ".join(_text(element) for element in value)
+    if isinstance(value, dict):
+        # Combo sides and drinks: "(Regular) French Fries, Lays Plain"
+        text = f"({value.get('size')}) {value.get('name')}" if value.get("size") else str(value.get("name"))
+        return f"{text}, {value['chips_type']}" if value.get("chips_type") else text
+    return str(value)
+
+
+def wrap(out: bytearray, text: bytes, width: int, prefix: bytes = b"", indent: int = 0):
+    """
+    Append text to a buffer, wrapped at spaces to a fixed width.
+
+    Args:
+        out: Buffer to append to
+        text: Encoded text
+        width: Characters per line
+        prefix: Encoded text starting the first line, e.g. ``b"  Bread: "``
+        indent: Spaces starting every further line
+    """
+    out += prefix
+    line = start = len(prefix)
+    for word in text.split():
+        if line > start:
+            if line + 1 + len(word) <= width:
+                out += b" "
+                line += 1
+            else:
+                out += LF + b" " * indent
+                line = start = indent
+        while line + len(word) > width:
+            # A word longer than the rest of the line is broken
+            cut = max(width - line, 0)
+            out += word[:cut] + LF + b" " * indent
+            word = word[cut:]
+            line = start = indent
+        out += word
+        line += len(word)
+    out += LF
+
+
+class _CompiledTemplate(NamedTuple):
+    title: Tuple[str, ...]
+    suffix: str
+    # (encoded "  Label: ", field)
+    lines: Tuple[Tuple[bytes, str], ...]
+
+
+def _compile(template: TicketTemplate) -> _CompiledTemplate:
+    return _CompiledTemplate(template.title, template.suffix,
+                             tuple((encode(f"  {label}: "), field) for label, field in template.lines))
+
+
+_COMPILED = {item_type: _compile(template) for item_type, template in TEMPLATES.items()}
+_NOTE_PREFIX = encode(f"  {NOTE[0]}: ")
+# Continuation lines of details start under the first detail character
+_DETAIL_INDENT = 4
+
+
+class TicketRenderer:
+    """
+    Renders orders as ESC/POS kitchen tickets.
+
+    Args:
+        width: Characters per line of the printer's paper
+
+    Example:
+        >>> buffer = bytearray()
+        >>> TicketRenderer().render_into(buffer, [order.to_dict() for order in orders])
+        >>> printer.write(buffer)
+    """
+
+    def __init__(self, width: int = DEFAULT_WIDTH):
+        self.width = width
+        self._rule = b"-" * width + LF
+
+    def render_into(self, out: bytearray, orders: Iterable[Dict[str, Any]]):
+        """
+        Append one ticket per order to a buffer, each ending with a paper cut.
+
+        Args:
+            out: Buffer to append to, e.g. one cleared and reused per batch
+            orders: Orders as returned by ``OrderTable.to_dict()``
+        """
+        for order in orders:
+            self._render_order(out, order)
+
+    def render(self, orders: Iterable[Dict[str, Any]]) -> bytes:
+        """Return the tickets of orders; see ``render_into``."""
+        out = bytearray()
+        self.render_into(out, orders)
+        return bytes(out)
+
+    def _render_order(self, out: bytearray, order: Dict[str, Any]):
+        width = self.width
+        out += INIT
+        out += CODE_PAGE_437
+        out += ALIGN_CENTER
+        out += DOUBLE_SIZE
+        # Double-size characters take two columns
+        wrap(out, encode(f"#{order['id']} {order['customer_name']}"), width // 2)
+        out += NORMAL_SIZE
+        pickup_at = order.get("pickup_at")
+        if pickup_at:
+            pickup = datetime.fromisoformat(pickup_at).astimezone(EASTERN).strftime("%I:%M %p").lstrip("0")
+            wrap(out, encode(f"Pickup {pickup}"), width)
+        paid = "PAID" if order.get("payment_status") == "succeeded" else "UNPAID"
+        wrap(out, encode(f"{str(order.get('payment_method', '')).upper()} - {paid}"), width)
+        out += ALIGN_LEFT
+        out += self._rule
+
+        count = 0
+        for item in order["order_items"]:
+            quantity = item.get("_quantity") or 1
+            count += quantity
+            compiled = _COMPILED.get(item.get("type"))
+            if compiled is None:
+                wrap(out, encode(f"{quantity} x {item.get('type')}"), width)
+                continue
+            title = " ".join(str(item[field]) for field in compiled.title if item.get(field))
+            out += BOLD_ON
+            wrap(out, encode(f"{quantity} x {title}{compiled.suffix}"), width, indent=_DETAIL_INDENT)
+            out += BOLD_OFF
+            for prefix, field in compiled.lines:
+                value = item.get(field)
+                if value in (None, False, "", []):
+                    continue
+                wrap(out, encode(_text(value)), width, prefix, _DETAIL_INDENT)
+            note = item.get(NOTE[1])
+            if note:
+                out += BOLD_ON
+                wrap(out, encode(str(note)), width, _NOTE_PREFIX, _DETAIL_INDENT)
+                out += BOLD_OFF
+
+        out += self._rule
+        wrap(out, encode(f"{count} item{'s' if count != 1 else ''}"), width)
+        out += FEED_AND_CUT
+
+
+class TicketSpooler:
+    """
+    Prints queued tickets from a background thread.
+
+    Each write holds every ticket queued since the last one, up to
+    ``max_batch``, rendered into one reused buffer. Write errors (printer
+    unplugged, out of paper) are retried with backoff, reopening the device,
+    and the tickets stay queued meanwhile.
+
+    Args:
+        path: Printer device or spool file, opened for appending
+        renderer: Renders the tickets
+        max_batch: Tickets per write
+
+    Example:
+        >>> spooler = TicketSpooler("/dev/usb/lp0", TicketRenderer())
+        >>> spooler.start()
+        >>> spooler.submit(order.to_dict())
+    """
+
+    def __init__(self, path: str, renderer: TicketRenderer, max_batch: int = DEFAULT_MAX_BATCH):
+        self.path = path
+        self.pid = os.getpid()
+        self.renderer = renderer
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._buffer = bytearray()
+        self._device = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="ticket-spooler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, order: Dict[str, Any]):
+        """Queue an order's ticket; returns at once."""
+        with self._cond:
+            self._pending.append(order)
+            TICKET_BACKLOG.inc()
+            self._cond.notify()
+
+    def backlog(self) -> int:
+        """Return the number of tickets not printed yet."""
+        with self._cond:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                batch = [self._pending[i] for i in range(min(len(self._pending), self.max_batch))]
+            buffer = self._buffer
+            buffer.clear()
+            try:
+                self.renderer.render_into(buffer, batch)
+            except Exception:
+                # One bad order must not stop the queue behind it
+                logger.exception(f"Could not render a batch of {len(batch)} tickets, printing them one by one")
+                buffer.clear()
+                for order in batch:
+                    try:
+                        self.renderer.render_into(buffer, [order])
+                    except Exception:
+                        logger.exception(f"Could not render the ticket of order {order.get('id')}, skipped")
+            if not self._write_with_retry(buffer):
+                return
+            with self._cond:
+                for _ in batch:
+                    self._pending.popleft()
+                TICKET_BACKLOG.dec(len(batch))
+
+    def _write_with_retry(self, data: bytearray) -> bool:
+        """Write a batch, retrying with backoff until it succeeds or the spooler closes."""
+        backoff = 0.1
+        while True:
+            try:
+                if self._device is None:
+                    self._device = open(self.path, "ab", buffering=0)
+                self._device.write(data)
+                return True
+            except OSError as e:
+                TICKET_PRINT_FAILURES.inc()
+                logger.warning(f"Printing to {self.path} failed, retrying: {e}")
+                if self._device is not None:
+                    try:
+                        self._device.close()
+                    except OSError:
+                        pass
+                    self._device = None
+                if self._closed:
+                    return False
+                time.sleep(backoff)
+                backoff = min(backoff * 2, _MAX_BACKOFF)
+
+    def close(self, timeout: float = 5.0):
+        """Stop the spooler after it prints what is queued, or after ``timeout``."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._device is not None:
+            self._device.close()
+            self._device = None
+
+
+_open_lock = threading.Lock()
+
+
+def get_spooler(app: Flask, store_id: str) -> Optional[TicketSpooler]:
+    """
+    Return this process's spooler for a store's printer, starting it on first use.
+
+    Started lazily, so a preloading gunicorn master never runs a spooler
+    thread its forked workers would lose.
+
+    Returns:
+        Optional[TicketSpooler]: None when ``TICKET_PRINTER`` is not set
+    """
+    template = app.config["TICKET_PRINTER"]
+    if not template:
+        return None
+    path = template.format(store_id=store_id)
+    spoolers = app.extensions.setdefault("ticket_spoolers", {})
+    spooler = spoolers.get(path)
+    if spooler is not None and spooler.pid == os.getpid():
+        return spooler
+    with _open_lock:
+        spooler = spoolers.get(path)
+        if spooler is None or spooler.pid != os.getpid():
+            spooler = TicketSpooler(path, TicketRenderer(app.config["TICKET_WIDTH"]))
+            spooler.start()
+            atexit.register(spooler.close)
+            spoolers[path] = spooler
+    return spooler
+
+
+def print_order(app: Flask, store_id: str, order):
+    """
+    Queue the ticket of a newly stored order of a store, if tickets are printed.
+
+    Never raises, since the order is already stored: an order that cannot be
+    queued is only logged.
+
+    Args:
+        app: Flask application
+        store_id: Store the order was placed at
+        order (OrderTable): The stored order
+    """
+    if not kitchen.is_open(order.payment_status):
+        return
+    try:
+        spooler = get_spooler(app, store_id)
+        if spooler is not None:
+            spooler.submit(order.to_dict())
+    except Exception as e:
+        logger.warning(f"Could not queue the ticket of order {order.id}: {str(e)}")
+
+
+def init_app(app: Flask):
+    """
+    Configure ticket printing from the environment.
+
+    - ``TICKET_PRINTER``: printer device or spool file tickets are written to,
+      ``{store_id}`` is replaced by the order's store; unset, nothing is printed
+    - ``TICKET_WIDTH``: characters per line (default 42, 32 for 58 mm paper)
+
+    Args:
+        app: Flask application
+    """
+    app.config["TICKET_PRINTER"] = os.getenv("TICKET_PRINTER")
+    app.config["TICKET_WIDTH"] = int(os.getenv("TICKET_WIDTH", DEFAULT_WIDTH))
@@ -0,0 +1,15 @@
+"""WSGI entry point for production servers.
+
+Gunicorn loads ``wsgi:app`` with the settings of ``gunicorn.conf.py``:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+``app.py`` keeps Flask's development server for local work.
+"""
+
+from app import create_app
+from utils.checkout_api_helper import preload_provider_sdks
+
+app = create_app()
+# Imported here, in the preloading master, the SDKs are shared by every worker
+preload_provider_sdks()